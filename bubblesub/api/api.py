@@ -27,11 +27,13 @@ from bubblesub.api.audio import AudioApi
 from bubblesub.api.audio_view import AudioViewApi
 from bubblesub.api.gui import GuiApi
 from bubblesub.api.log import LogApi
+from bubblesub.api.open_pipeline import OpenPipelineApi
 from bubblesub.api.playback import PlaybackApi
 from bubblesub.api.subs import SubtitlesApi
 from bubblesub.api.threading import ThreadingApi
 from bubblesub.api.undo import UndoApi
 from bubblesub.api.video import VideoApi
+from bubblesub.api.video_prefetcher import FramePrefetcher
 from bubblesub.api.video_view import VideoViewApi
 from bubblesub.cfg import Config
 
@@ -51,29 +53,34 @@ class Api:
         self.subs = SubtitlesApi(self.cfg)
         self.undo = UndoApi(self.cfg, self.subs)
 
-        self.threading = ThreadingApi(self.log)
+        self.threading = ThreadingApi(self.log, self.cfg)
 
-        self.video = VideoApi(self.threading, self.log, self.subs)
-        self.audio = AudioApi(self.threading, self.log)
+        self.video = VideoApi(self.threading, self.log, self.subs, self.cfg)
+        self.audio = AudioApi(self.threading, self.log, self.cfg)
         self.playback = PlaybackApi(
             self.log, self.subs, self.video, self.audio
         )
 
-        self.audio.view = AudioViewApi(self.subs, self.audio, self.video)
+        self.audio.view = AudioViewApi(
+            self.subs, self.audio, self.video, self.cfg
+        )
         self.video.view = VideoViewApi(self.subs)
+        self.video.prefetcher = FramePrefetcher(
+            self.threading,
+            self.log,
+            self.subs,
+            self.video,
+            self.playback,
+            self.cfg,
+        )
+        self.open_pipeline = OpenPipelineApi(
+            self.log, self.subs, self.video, self.audio
+        )
 
         self.gui = GuiApi(self)
         self.cmd = bubblesub.api.cmd.CommandApi(self)
 
         self.gui.terminated.connect(self.audio.unload_all_streams)
+        self.gui.terminated.connect(self.video.prefetcher.stop)
         self.gui.terminated.connect(self.video.unload_all_streams)
         self.gui.terminated.connect(self.cmd.unload)
-        self.subs.loaded.connect(self._on_subs_load)
-
-    def _on_subs_load(self) -> None:
-        self.video.unload_all_streams()
-        self.audio.unload_all_streams()
-        for i, path in enumerate(self.subs.remembered_video_paths):
-            self.video.load_stream(path, switch=i == 0)
-        for i, path in enumerate(self.subs.remembered_audio_paths):
-            self.audio.load_stream(path, switch=i == 0)
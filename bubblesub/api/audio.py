@@ -17,25 +17,47 @@
 """Audio stream API."""
 
 from pathlib import Path
+from typing import Any
+
+import numpy as np
 
 from bubblesub.api.audio_stream import AudioStream
 from bubblesub.api.base_streams_api import BaseStreamsApi
 from bubblesub.api.log import LogApi
 from bubblesub.api.threading import ThreadingApi
+from bubblesub.cache import LruCache
+from bubblesub.cfg import Config
 
 
 class AudioApi(BaseStreamsApi[AudioStream]):
     """Manages audio streams."""
 
-    def __init__(self, threading_api: ThreadingApi, log_api: LogApi) -> None:
+    def __init__(
+        self, threading_api: ThreadingApi, log_api: LogApi, cfg: Config
+    ) -> None:
         """Initialize self.
 
         :param threading_api: threading API
         :param log_api: logging API
+        :param cfg: program configuration
         """
         super().__init__()
         self._threading_api = threading_api
         self._log_api = log_api
+        self._cfg = cfg
+        # spectrogram columns and video band pixels shown in the audio panel
+        # share a single memory budget
+        self.view_cache: LruCache[tuple[Any, ...], np.ndarray] = LruCache(
+            cfg.opt["audio"]["view_cache_size"] * 1024 * 1024,
+            lambda array: array.nbytes,
+        )
+
+        cfg.opt.changed.connect(self._on_options_change)
 
     def _create_stream(self, path: Path) -> AudioStream:
-        return AudioStream(self._threading_api, self._log_api, path)
+        return AudioStream(self._threading_api, self._log_api, self._cfg, path)
+
+    def _on_options_change(self) -> None:
+        self.view_cache.max_size = (
+            self._cfg.opt["audio"]["view_cache_size"] * 1024 * 1024
+        )
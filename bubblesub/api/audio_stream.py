@@ -16,9 +16,8 @@
 
 """Audio stream."""
 
-import threading
-import time
 import uuid
+from collections.abc import Callable
 from contextlib import nullcontext
 from pathlib import Path
 from typing import IO, ClassVar, ContextManager, Optional, Union, cast
@@ -28,12 +27,21 @@ import numpy as np
 from PyQt5.QtCore import QObject, pyqtBoundSignal, pyqtSignal
 
 from bubblesub.api.base_stream import BaseStream, StreamUnavailable
+from bubblesub.api.ffms_index import IndexingCanceled, get_index
 from bubblesub.api.log import LogApi
+from bubblesub.api.pcm_cache import PcmCache, build_pcm_cache, samples_to_float
+from bubblesub.api.sampler_pool import SamplerPool
 from bubblesub.api.threading import ThreadingApi
+from bubblesub.api.waveform import WaveformSummary, build_waveform_summary
+from bubblesub.cfg import Config
 from bubblesub.fmt.wav import write_wav
 
-_LOADING = object()
-_SAMPLER_LOCK = threading.Lock()
+
+def _slice_samples(
+    samples: np.ndarray, start_frame: int, count: int
+) -> np.ndarray:
+    start_frame = max(0, start_frame)
+    return samples[start_frame : max(start_frame, start_frame + count)]
 
 
 class AudioStreamUnavailable(StreamUnavailable):
@@ -50,15 +58,27 @@ class AudioStreamUnavailable(StreamUnavailable):
 
 
 def _load_audio_source(
-    log_api: LogApi, uid: uuid.UUID, path: Path
-) -> Optional[ffms2.AudioSource]:
-    """Create FFMS audio source.
+    log_api: LogApi,
+    uid: uuid.UUID,
+    path: Path,
+    pool_size: int,
+    progress_callback: Callable[[int, int], bool],
+    is_canceled: Callable[[], bool],
+) -> Optional[SamplerPool[ffms2.AudioSource]]:
+    """Create a pool of FFMS audio sources.
 
     :param log_api: logging API
     :param uid: uid of the stream (for logging)
     :param path: path to the audio file
-    :return: resulting FFMS audio source or None if failed to create
+    :param pool_size: maximum number of sources decoding at the same time
+    :param progress_callback: function receiving indexing progress
+    :param is_canceled: function returning whether to stop loading
+    :return: resulting pool of FFMS audio sources or None if failed to create
     """
+    if is_canceled():
+        log_api.info(f"audio {uid} loading canceled")
+        return None
+
     log_api.info(f"audio {uid} started loading ({path})")
 
     if not path.exists():
@@ -66,10 +86,16 @@ def _load_audio_source(
         return None
 
     try:
-        indexer = ffms2.Indexer(str(path))
-        for track in indexer.track_info_list:
-            indexer.track_index_settings(track.num, 1, 0)
-        index = indexer.do_indexing2()
+        index = get_index(
+            log_api,
+            path,
+            "audio",
+            ffms2.FFMS_TYPE_AUDIO,
+            progress_callback,
+        )
+    except IndexingCanceled:
+        log_api.info(f"audio {uid} loading canceled")
+        return None
     except ffms2.Error as ex:
         log_api.error(f"error loading audio {uid} ({ex})")
         return None
@@ -83,7 +109,11 @@ def _load_audio_source(
         log_api.error(f"error loading audio {uid} ({ex})")
         return None
     log_api.info(f"audio {uid} finished loading")
-    return source
+    return SamplerPool(
+        lambda: ffms2.AudioSource(str(path), track_number, index),
+        pool_size,
+        first=source,
+    )
 
 
 class AudioStream(BaseStream, QObject):
@@ -92,19 +122,26 @@ class AudioStream(BaseStream, QObject):
     errored = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
     changed = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
     loaded = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
+    progressed = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
 
     def __init__(
-        self, threading_api: ThreadingApi, log_api: LogApi, path: Path
+        self,
+        threading_api: ThreadingApi,
+        log_api: LogApi,
+        cfg: Config,
+        path: Path,
     ) -> None:
         """Initialize self.
 
         :param threading_api: threading API
         :param log_api: logging API
+        :param cfg: program configuration
         :param path: path to the audio file to load
         """
         super().__init__()
         self._threading_api = threading_api
         self._log_api = log_api
+        self._cfg = cfg
 
         self.uid = uuid.uuid4()
 
@@ -118,11 +155,21 @@ class AudioStream(BaseStream, QObject):
         self._path = path
         self._delay = 0
 
-        self._source: Union[None, ffms2.AudioSource] = None
+        self._samplers: Optional[SamplerPool[ffms2.AudioSource]] = None
+        self._pcm_cache: Optional[PcmCache] = None
+        self._waveform_summary: Optional[WaveformSummary] = None
+        self._waveform_summary_requested = False
 
         self._log_api.info(f"audio: loading {path}")
         self._threading_api.schedule_task(
-            lambda: _load_audio_source(self._log_api, self.uid, self._path),
+            lambda: _load_audio_source(
+                self._log_api,
+                self.uid,
+                self._path,
+                self._cfg.opt["audio"]["sampler_pool_size"],
+                self._on_index_progress,
+                lambda: self.is_canceled,
+            ),
             self._got_source,
         )
 
@@ -140,7 +187,7 @@ class AudioStream(BaseStream, QObject):
 
         :return: whether the audio is loaded
         """
-        return self._source is not None
+        return self._samplers is not None
 
     @property
     def channel_count(self) -> int:
@@ -243,27 +290,92 @@ class AudioStream(BaseStream, QObject):
         self._delay = value
         self.changed.emit()
 
+    @property
+    def is_pcm_cached(self) -> bool:
+        """Return whether the decoded samples are mapped from the disk cache.
+
+        :return: whether the decoded samples are mapped from the disk cache
+        """
+        return self._pcm_cache is not None
+
+    @property
+    def pcm_cache(self) -> Optional[PcmCache]:
+        """Return the decoded samples mapped from the disk cache.
+
+        :return: decoded samples or None if not cached
+        """
+        return self._pcm_cache
+
+    @property
+    def waveform_summary(self) -> Optional[WaveformSummary]:
+        """Return the peak and RMS summary of the samples.
+
+        :return: waveform summary or None if it wasn't built yet
+        """
+        return self._waveform_summary
+
+    def build_waveform_summary(self) -> None:
+        """Build the peak and RMS summary of the samples in the background.
+
+        Emits the changed signal once the summary is ready. Does nothing if
+        the summary was already requested or the stream isn't loaded yet.
+        """
+        if self._waveform_summary_requested or not self.is_ready:
+            return
+        self._waveform_summary_requested = True
+        self._threading_api.schedule_long_task(
+            lambda: build_waveform_summary(
+                self._log_api,
+                self._path,
+                self.get_mono_samples,
+                self.sample_count,
+                lambda: self.is_canceled,
+            ),
+            self._got_waveform_summary,
+        )
+
     def get_samples(self, start_frame: int, count: int) -> np.ndarray:
         """Get raw audio samples from the currently loaded audio source.
         Doesn't take delay into account.
 
+        Always returns samples in the native format of the source, even once
+        the decoded samples are cached on the disk.
+
         :param start_frame: start frame (not PTS)
         :param count: how many samples to get
         :return: numpy array of samples
         """
-        with _SAMPLER_LOCK:
-            self._wait_for_source()
-            if not self._source:
-                channel_count = max(1, self.channel_count)
-                return np.zeros(count * channel_count).reshape(
-                    (count, channel_count)
-                )
-            if start_frame + count > self.sample_count:
-                count = max(0, self.sample_count - start_frame)
-            if not count:
-                return self._create_empty_sample_buffer()
-            self._source.init_buffer(count)
-            return self._source.get_audio(start_frame)
+        if not self._samplers:
+            channel_count = max(1, self.channel_count)
+            return np.zeros(count * channel_count).reshape(
+                (count, channel_count)
+            )
+        if start_frame + count > self.sample_count:
+            count = max(0, self.sample_count - start_frame)
+        if not count:
+            return self._create_empty_sample_buffer()
+        with self._samplers.acquire() as source:
+            source.init_buffer(count)
+            return source.get_audio(start_frame)
+
+    def get_mono_samples(self, start_frame: int, count: int) -> np.ndarray:
+        """Get audio samples downmixed to a single channel.
+        Doesn't take delay into account.
+
+        Once the decoded samples are cached on the disk, returns a read-only
+        view of the cached samples instead of decoding them again.
+
+        :param start_frame: start frame (not PTS)
+        :param count: how many samples to get
+        :return: numpy array of float32 samples in range -1..1
+        """
+        if self._pcm_cache is not None:
+            return _slice_samples(
+                self._pcm_cache.mono_samples, start_frame, count
+            )
+        return samples_to_float(self.get_samples(start_frame, count)).mean(
+            axis=1
+        )
 
     def save_wav(
         self,
@@ -312,29 +424,49 @@ class AudioStream(BaseStream, QObject):
             }[self.sample_format],
         ).reshape(0, max(1, self.channel_count))
 
-    def _got_source(self, source: Optional[ffms2.AudioSource]) -> None:
-        self._source = source
-
-        if source is None:
-            self.errored.emit()
+    def _got_source(
+        self, samplers: Optional[SamplerPool[ffms2.AudioSource]]
+    ) -> None:
+        # the stream might have been unloaded while its source was loading
+        if samplers is None or self.is_canceled:
+            self._set_load_failed()
+            if not self.is_canceled:
+                self.errored.emit()
             return
 
-        self._min_time = round(cast(float, source.properties.FirstTime) * 1000)
-        self._max_time = round(cast(float, source.properties.LastTime) * 1000)
-        self._channel_count = cast(int, source.properties.Channels)
-        self._bits_per_sample = cast(int, source.properties.BitsPerSample)
-        self._sample_count = cast(int, source.properties.NumSamples)
-        self._sample_rate = cast(int, source.properties.SampleRate)
-        self._sample_format = cast(
-            Optional[int], source.properties.SampleFormat
-        )
+        with samplers.acquire() as source:
+            properties = source.properties
+        self._min_time = round(cast(float, properties.FirstTime) * 1000)
+        self._max_time = round(cast(float, properties.LastTime) * 1000)
+        self._channel_count = cast(int, properties.Channels)
+        self._bits_per_sample = cast(int, properties.BitsPerSample)
+        self._sample_count = cast(int, properties.NumSamples)
+        self._sample_rate = cast(int, properties.SampleRate)
+        self._sample_format = cast(Optional[int], properties.SampleFormat)
+        self._samplers = samplers
+        self._set_loaded()
         self.loaded.emit()
 
-    def _wait_for_source(self) -> bool:
-        if self._source is None:
-            return False
-        while self._source is _LOADING:
-            time.sleep(0.01)
-        if self._source is None:
-            return False
-        return True
+        if self._cfg.opt["audio"]["pcm_cache"]:
+            self._threading_api.schedule_long_task(
+                lambda: build_pcm_cache(
+                    self._log_api,
+                    self._path,
+                    samplers,
+                    cast(int, properties.NumSamples),
+                    cast(int, properties.Channels),
+                    lambda: self.is_canceled,
+                ),
+                self._got_pcm_cache,
+            )
+
+    def _got_waveform_summary(
+        self, summary: Optional[WaveformSummary]
+    ) -> None:
+        if summary is not None and not self.is_canceled:
+            self._waveform_summary = summary
+            self.changed.emit()
+
+    def _got_pcm_cache(self, pcm_cache: Optional[PcmCache]) -> None:
+        if pcm_cache is not None and not self.is_canceled:
+            self._pcm_cache = pcm_cache
@@ -16,6 +16,7 @@
 
 """API for GUI spectrogram."""
 
+import enum
 from typing import Union
 
 from PyQt5.QtCore import QObject, pyqtSignal
@@ -25,28 +26,50 @@ from bubblesub.api.audio_stream import AudioStream
 from bubblesub.api.subs import SubtitlesApi
 from bubblesub.api.video import VideoApi
 from bubblesub.api.video_stream import VideoStream
+from bubblesub.cfg import Config
 from bubblesub.errors import ResourceUnavailable
 
 
+class AudioPreviewMode(enum.Enum):
+    """What the audio preview shows."""
+
+    SPECTROGRAM = "spectrogram"
+    WAVEFORM = "waveform"
+
+    def __str__(self) -> str:
+        """Return the name of the mode.
+
+        :return: name of the mode
+        """
+        return self.value
+
+
 class AudioViewApi(QObject):
     """API for spectrogram preview."""
 
     view_changed = pyqtSignal()
     selection_changed = pyqtSignal()
+    mode_changed = pyqtSignal()
 
     def __init__(
-        self, subs_api: SubtitlesApi, audio_api: AudioApi, video_api: VideoApi
+        self,
+        subs_api: SubtitlesApi,
+        audio_api: AudioApi,
+        video_api: VideoApi,
+        cfg: Config,
     ) -> None:
         """Initialize self.
 
         :param subs_api: subtitles API
         :param audio_api: audio API
         :param video_api: video API
+        :param cfg: program configuration
         """
         super().__init__()
         self._subs_api = subs_api
         self._audio_api = audio_api
         self._video_api = video_api
+        self._cfg = cfg
 
         self._min = 0
         self._max = 0
@@ -109,6 +132,24 @@ class AudioViewApi(QObject):
         """
         return self._view_end - self._view_start
 
+    @property
+    def mode(self) -> AudioPreviewMode:
+        """Return what the audio preview shows.
+
+        :return: preview mode
+        """
+        return AudioPreviewMode(self._cfg.opt["audio"]["preview_mode"])
+
+    @mode.setter
+    def mode(self, value: AudioPreviewMode) -> None:
+        """Set what the audio preview shows.
+
+        :param value: new preview mode
+        """
+        if value != self.mode:
+            self._cfg.opt["audio"]["preview_mode"] = value.value
+            self.mode_changed.emit()
+
     @property
     def selection_start(self) -> int:
         """Return selection start PTS.
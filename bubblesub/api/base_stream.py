@@ -16,9 +16,13 @@
 
 """Common class for audio and video streams."""
 
+import asyncio
+import threading
+import time
 import uuid
+from concurrent.futures import Future
 from pathlib import Path
-from typing import ClassVar
+from typing import ClassVar, Optional
 
 from PyQt5.QtCore import pyqtBoundSignal
 
@@ -38,6 +42,125 @@ class BaseStream:
     loaded: ClassVar[pyqtBoundSignal]
     changed: ClassVar[pyqtBoundSignal]
     errored: ClassVar[pyqtBoundSignal]
+    progressed: ClassVar[pyqtBoundSignal]
+
+    def __init__(self) -> None:
+        """Initialize self."""
+        super().__init__()
+        self._load_started = time.monotonic()
+        self._load_progress = 0.0
+        self._cancel_event = threading.Event()
+        self._ready_event = threading.Event()
+        self._ready_future: "Future[None]" = Future()
+
+    @property
+    def load_progress(self) -> float:
+        """Return how much of the stream source was indexed so far.
+
+        :return: progress in range 0..1
+        """
+        return self._load_progress
+
+    @property
+    def load_eta(self) -> Optional[float]:
+        """Return estimated time until the stream source finishes indexing.
+
+        :return: remaining time in seconds or None if unknown
+        """
+        if self._load_progress <= 0 or self._load_progress >= 1:
+            return None
+        elapsed = time.monotonic() - self._load_started
+        return elapsed * (1 - self._load_progress) / self._load_progress
+
+    @property
+    def is_canceled(self) -> bool:
+        """Return whether loading of this stream was canceled.
+
+        :return: whether loading of this stream was canceled
+        """
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """Stop loading the stream source as soon as possible.
+
+        Aborts indexing, releasing the worker thread it runs on, and stops
+        any background work on the stream, such as building its caches.
+        A stream that has already finished loading stays usable, but
+        doesn't receive the results of that work anymore.
+        """
+        self._cancel_event.set()
+        self._set_load_failed()
+
+    @property
+    def ready_event(self) -> threading.Event:
+        """Return event set once the stream stops loading.
+
+        The event is set both when the stream loads and when loading fails or
+        gets canceled, so worker threads should check is_ready after waiting
+        for it.
+
+        :return: thread-safe event
+        """
+        return self._ready_event
+
+    def ready(self) -> "asyncio.Future[None]":
+        """Return future resolved once the stream is loaded.
+
+        The future fails with StreamUnavailable if loading fails or gets
+        canceled. Canceling the returned future doesn't cancel loading.
+
+        :return: awaitable future
+        """
+        return asyncio.shield(asyncio.wrap_future(self._ready_future))
+
+    async def wait_ready(self, timeout: Optional[float] = None) -> None:
+        """Wait until the stream is loaded.
+
+        Raises StreamUnavailable if the stream fails to load in time.
+
+        :param timeout: how many seconds to wait at most, None to wait forever
+        """
+        if self._ready_future.done():
+            self._ready_future.result()
+            return
+        try:
+            await asyncio.wait_for(self.ready(), timeout)
+        except asyncio.TimeoutError as ex:
+            raise StreamUnavailable(
+                f"timed out waiting for {self.path} to load"
+            ) from ex
+
+    def _set_loaded(self) -> None:
+        """Mark the stream as loaded and wake up everyone waiting for it."""
+        if not self._ready_future.done():
+            self._ready_future.set_result(None)
+        self._ready_event.set()
+
+    def _set_load_failed(self) -> None:
+        """Mark the stream as unable to load and wake up everyone waiting for
+        it.
+        """
+        if not self._ready_future.done():
+            self._ready_future.set_exception(
+                StreamUnavailable(f"failed to load {self.path}")
+            )
+        self._ready_event.set()
+
+    def _on_index_progress(self, current: int, total: int) -> bool:
+        """Record source indexing progress.
+
+        Called from the worker thread that indexes the source.
+
+        :param current: number of processed bytes
+        :param total: total number of bytes
+        :return: whether to abort indexing
+        """
+        if total > 0:
+            progress = min(1.0, current / total)
+            if int(progress * 100) != int(self._load_progress * 100):
+                self._load_progress = progress
+                self.progressed.emit()
+        return self._cancel_event.is_set()
 
     @property
     def path(self) -> Path:
@@ -46,3 +169,11 @@ class BaseStream:
         :return: path
         """
         raise NotImplementedError("not implemented")
+
+    @property
+    def is_ready(self) -> bool:
+        """Return whether the stream source is loaded.
+
+        :return: whether the stream source is loaded
+        """
+        raise NotImplementedError("not implemented")
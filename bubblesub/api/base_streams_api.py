@@ -41,6 +41,7 @@ class BaseStreamsApi(Generic[T], QObject):
     stream_changed = pyqtSignal(object)
     stream_errored = pyqtSignal(object)
     stream_loaded = pyqtSignal(object)
+    stream_progressed = pyqtSignal(object)
     stream_unloaded = pyqtSignal(object)
 
     def __init__(self) -> None:
@@ -53,6 +54,7 @@ class BaseStreamsApi(Generic[T], QObject):
     def unload_all_streams(self) -> None:
         """Unload all loaded streams."""
         for stream in self._streams:
+            stream.cancel()
             self.stream_unloaded.emit(stream)
         self._streams = []
         self.switch_stream(None)
@@ -75,6 +77,7 @@ class BaseStreamsApi(Generic[T], QObject):
         stream.loaded.connect(partial(self._on_stream_load, stream))
         stream.errored.connect(partial(self._on_stream_error, stream))
         stream.changed.connect(partial(self._on_stream_change, stream))
+        stream.progressed.connect(partial(self._on_stream_progress, stream))
         self._streams.append(stream)
         self.stream_created.emit(stream)
 
@@ -105,6 +108,7 @@ class BaseStreamsApi(Generic[T], QObject):
         if index is None:
             return
         old_stream = self._streams[index]
+        old_stream.cancel()
         self._streams = [
             stream for stream in self._streams if stream.uid != uid
         ]
@@ -198,6 +202,10 @@ class BaseStreamsApi(Generic[T], QObject):
     def _on_stream_change(self, stream: T) -> None:
         self.stream_changed.emit(stream)
 
+    @synchronized(lock=stream_lock)
+    def _on_stream_progress(self, stream: T) -> None:
+        self.stream_progressed.emit(stream)
+
     def _create_stream(self, path: Path) -> T:
         raise NotImplementedError
 
@@ -0,0 +1,198 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Prioritized execution of decode requests."""
+
+import enum
+import heapq
+import itertools
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from typing import Generic, Optional, TypeVar
+
+from PyQt5.QtCore import QRunnable, QThreadPool
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ResultT = TypeVar("ResultT")
+
+
+class DecodePriority(enum.IntEnum):
+    """Priority of a decode request. Lower values are decoded first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+@dataclass
+class _DecodeRequest(Generic[KeyT, ResultT]):
+    key: KeyT
+    priority: DecodePriority
+    future: "Future[ResultT]" = field(default_factory=Future)
+    consumers: set[Hashable] = field(default_factory=set)
+    anonymous: bool = False
+
+
+class _DecodeRunnable(QRunnable):
+    def __init__(self, executor: "DecodeExecutor") -> None:
+        """Initialize self.
+
+        :param executor: executor to take the request from
+        """
+        super().__init__()
+        self._executor = executor
+
+    def run(self) -> None:
+        """Decode the most important pending request."""
+        self._executor._run_next()  # pylint: disable=protected-access
+
+
+class DecodeExecutor(Generic[KeyT, ResultT]):
+    """Runs decode requests on a dedicated thread pool.
+
+    Pending requests are ordered by priority, then by submission order.
+    Duplicate requests for the same key share a single result. A consumer
+    can have only one pending request - submitting a new one on its behalf
+    cancels the previous one, unless someone else still waits for it.
+    """
+
+    def __init__(
+        self, decode: Callable[[KeyT], ResultT], thread_count: int
+    ) -> None:
+        """Initialize self.
+
+        :param decode: function decoding the data for given key
+        :param thread_count: number of requests to decode at the same time
+        """
+        self._decode = decode
+        self._lock = threading.Lock()
+        self._queue: list[tuple[int, int, KeyT]] = []
+        self._pending: dict[KeyT, _DecodeRequest[KeyT, ResultT]] = {}
+        self._consumer_keys: dict[Hashable, KeyT] = {}
+        self._counter = itertools.count()
+        self._thread_pool = QThreadPool()
+        self._thread_pool.setMaxThreadCount(max(1, thread_count))
+
+    @property
+    def pending_count(self) -> int:
+        """Return number of requests waiting to be decoded.
+
+        :return: number of pending requests
+        """
+        return len(self._pending)
+
+    def submit(
+        self,
+        key: KeyT,
+        priority: DecodePriority = DecodePriority.INTERACTIVE,
+        consumer: Optional[Hashable] = None,
+    ) -> "Future[ResultT]":
+        """Schedule decoding the data for given key.
+
+        :param key: what to decode
+        :param priority: how urgently the result is needed
+        :param consumer:
+            who requests the data; supersedes the previous request of the
+            same consumer
+        :return: future holding the decoded data
+        """
+        with self._lock:
+            if consumer is not None:
+                old_key = self._consumer_keys.pop(consumer, None)
+                if old_key is not None and old_key != key:
+                    self._release(old_key, consumer)
+
+            request = self._pending.get(key)
+            if request is None:
+                request = _DecodeRequest(key=key, priority=priority)
+                self._pending[key] = request
+                self._enqueue(request)
+            elif priority < request.priority:
+                request.priority = priority
+                self._enqueue(request)
+
+            if consumer is None:
+                request.anonymous = True
+            else:
+                request.consumers.add(consumer)
+                self._consumer_keys[consumer] = key
+            return request.future
+
+    def cancel(self, consumer: Hashable) -> None:
+        """Drop the pending request of given consumer.
+
+        :param consumer: who requested the data
+        """
+        with self._lock:
+            key = self._consumer_keys.pop(consumer, None)
+            if key is not None:
+                self._release(key, consumer)
+
+    def shutdown(self) -> None:
+        """Drop all pending requests."""
+        with self._lock:
+            for request in self._pending.values():
+                request.future.cancel()
+            self._pending.clear()
+            self._consumer_keys.clear()
+            self._queue.clear()
+
+    def _enqueue(self, request: _DecodeRequest[KeyT, ResultT]) -> None:
+        heapq.heappush(
+            self._queue,
+            (request.priority, next(self._counter), request.key),
+        )
+        self._thread_pool.start(_DecodeRunnable(self))
+
+    def _release(self, key: KeyT, consumer: Hashable) -> None:
+        request = self._pending.get(key)
+        if request is None:
+            return
+        request.consumers.discard(consumer)
+        if not request.consumers and not request.anonymous:
+            del self._pending[key]
+            request.future.cancel()
+
+    def _take_next(self) -> Optional[_DecodeRequest[KeyT, ResultT]]:
+        with self._lock:
+            while self._queue:
+                priority, _order, key = heapq.heappop(self._queue)
+                request = self._pending.get(key)
+                # skip entries of canceled requests and outdated entries of
+                # requests whose priority was raised
+                if request is None or request.priority != priority:
+                    continue
+                del self._pending[key]
+                for consumer in request.consumers:
+                    if self._consumer_keys.get(consumer) == key:
+                        del self._consumer_keys[consumer]
+                return request
+            return None
+
+    def _run_next(self) -> None:
+        request = self._take_next()
+        if (
+            request is None
+            or not request.future.set_running_or_notify_cancel()
+        ):
+            return
+        try:
+            result = self._decode(request.key)
+        except BaseException as ex:  # pylint: disable=broad-except
+            request.future.set_exception(ex)
+        else:
+            request.future.set_result(result)
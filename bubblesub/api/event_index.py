@@ -0,0 +1,179 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Index of ASS events by their time range."""
+
+import bisect
+from collections.abc import Iterable
+
+from ass_parser import AssEvent
+
+BLOCK_SIZE = 64
+
+# (start, end, key) - events with end before start are stored reversed
+_Entry = tuple[int, int, int]
+
+
+def _get_entry(event: AssEvent) -> _Entry:
+    start, end = sorted((event.start, event.end))
+    return (start, end, id(event))
+
+
+class EventIndex:
+    """Index answering which ASS events overlap given time range.
+
+    Events are kept sorted by their start in blocks of bounded size. Each
+    block tracks the latest end among its events, so that queries skip
+    whole blocks that end before the queried range, and stop at the first
+    event that starts after it.
+    """
+
+    def __init__(self, block_size: int = BLOCK_SIZE) -> None:
+        """Initialize self.
+
+        :param block_size: how many events a block holds before it's split
+        """
+        self._block_size = block_size
+        self._blocks: list[list[_Entry]] = []
+        self._block_firsts: list[_Entry] = []
+        self._block_ends: list[int] = []
+        self._entries: dict[int, tuple[_Entry, AssEvent]] = {}
+
+    def __len__(self) -> int:
+        """Return number of indexed events.
+
+        :return: number of indexed events
+        """
+        return len(self._entries)
+
+    def reset(self, events: Iterable[AssEvent]) -> None:
+        """Replace indexed events with given ones.
+
+        :param events: events to index
+        """
+        self._entries = {
+            id(event): (_get_entry(event), event) for event in events
+        }
+        self._rebuild()
+
+    def add(self, events: Iterable[AssEvent]) -> None:
+        """Add given events to the index.
+
+        :param events: events to add
+        """
+        events = list(events)
+        if len(events) > len(self._entries):
+            for event in events:
+                self._entries[id(event)] = (_get_entry(event), event)
+            self._rebuild()
+            return
+        self.remove(events)
+        for event in events:
+            entry = _get_entry(event)
+            self._entries[id(event)] = (entry, event)
+            self._insert(entry)
+
+    def remove(self, events: Iterable[AssEvent]) -> None:
+        """Remove given events from the index.
+
+        :param events: events to remove
+        """
+        for event in events:
+            item = self._entries.pop(id(event), None)
+            if item is not None:
+                self._remove(item[0])
+
+    def update(self, event: AssEvent) -> None:
+        """Move given event within the index after its times changed.
+
+        :param event: changed event
+        """
+        item = self._entries.get(id(event))
+        if item is None:
+            return
+        old_entry = item[0]
+        new_entry = _get_entry(event)
+        if new_entry == old_entry:
+            return
+        self._entries[id(event)] = (new_entry, event)
+        self._remove(old_entry)
+        self._insert(new_entry)
+
+    def query(self, start: int, end: int) -> list[AssEvent]:
+        """Return events overlapping given time range.
+
+        :param start: start of the range, inclusive
+        :param end: end of the range, inclusive
+        :return: overlapping events, in no particular order
+        """
+        ret: list[AssEvent] = []
+        count = bisect.bisect_left(self._block_firsts, (end + 1,))
+        for i in range(count):
+            if self._block_ends[i] < start:
+                continue
+            for entry in self._blocks[i]:
+                if entry[0] > end:
+                    break
+                if entry[1] >= start:
+                    ret.append(self._entries[entry[2]][1])
+        return ret
+
+    def _rebuild(self) -> None:
+        entries = sorted(entry for entry, _event in self._entries.values())
+        self._blocks = [
+            entries[i : i + self._block_size]
+            for i in range(0, len(entries), self._block_size)
+        ]
+        self._block_firsts = [block[0] for block in self._blocks]
+        self._block_ends = [
+            max(entry[1] for entry in block) for block in self._blocks
+        ]
+
+    def _insert(self, entry: _Entry) -> None:
+        if not self._blocks:
+            self._blocks.append([entry])
+            self._block_firsts.append(entry)
+            self._block_ends.append(entry[1])
+            return
+
+        i = max(bisect.bisect_right(self._block_firsts, entry) - 1, 0)
+        block = self._blocks[i]
+        bisect.insort(block, entry)
+        self._block_firsts[i] = block[0]
+        self._block_ends[i] = max(self._block_ends[i], entry[1])
+
+        if len(block) > self._block_size * 2:
+            half = block[self._block_size :]
+            del block[self._block_size :]
+            self._blocks.insert(i + 1, half)
+            self._block_firsts.insert(i + 1, half[0])
+            self._block_ends[i] = max(item[1] for item in block)
+            self._block_ends.insert(i + 1, max(item[1] for item in half))
+
+    def _remove(self, entry: _Entry) -> None:
+        i = bisect.bisect_right(self._block_firsts, entry) - 1
+        block = self._blocks[i]
+        del block[bisect.bisect_left(block, entry)]
+
+        if not block:
+            del self._blocks[i]
+            del self._block_firsts[i]
+            del self._block_ends[i]
+            return
+
+        self._block_firsts[i] = block[0]
+        if entry[1] == self._block_ends[i]:
+            self._block_ends[i] = max(item[1] for item in block)
@@ -0,0 +1,128 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Persistent FFMS indexes."""
+
+import os
+from collections.abc import Callable
+from pathlib import Path
+from typing import Any, Optional
+
+import ffms2
+
+from bubblesub.api.log import LogApi
+from bubblesub.cache import (
+    INDEX_SUFFIX,
+    get_cache_file_path,
+    get_source_cache_name,
+    prune_source_cache,
+)
+
+
+class IndexingCanceled(ffms2.Error):
+    """Exception raised when indexing is aborted by the progress callback."""
+
+
+def get_index_cache_path(path: Path, kind: str) -> Path:
+    """Return path to the cached FFMS index of given source file.
+
+    The path is bound to the source file identity and to the FFMS version,
+    since the index format is not guaranteed to be stable across versions.
+
+    :param path: path to the source file
+    :param kind: what tracks the index covers ("audio", "video")
+    :return: path to the index file
+    """
+    cache_name = get_source_cache_name(path, f"{kind}-index")
+    return get_cache_file_path(
+        f"{cache_name}-ffms{ffms2.get_version()}", INDEX_SUFFIX
+    )
+
+
+def _read_index(
+    log_api: LogApi, path: Path, index_path: Path, track_type: int
+) -> ffms2.Index:
+    index = ffms2.Index.read(index_file=str(index_path), source_file=str(path))
+    index.get_first_indexed_track_of_type(track_type)
+    log_api.info(f"reusing cached index for {path}")
+    return index
+
+
+def _write_index(
+    log_api: LogApi, index: ffms2.Index, index_path: Path
+) -> None:
+    tmp_path = index_path.with_suffix(".tmp")
+    try:
+        index_path.parent.mkdir(parents=True, exist_ok=True)
+        index.write(str(tmp_path))
+        os.replace(tmp_path, index_path)
+    except (OSError, ffms2.Error) as ex:
+        log_api.warn(f"error caching index {index_path} ({ex})")
+        tmp_path.unlink(missing_ok=True)
+
+
+def get_index(
+    log_api: LogApi,
+    path: Path,
+    kind: str,
+    track_type: int,
+    progress_callback: Optional[Callable[[int, int], bool]] = None,
+) -> ffms2.Index:
+    """Return FFMS index of given source file.
+
+    Reuses the index from the disk cache if the source file hasn't changed
+    since it was last indexed. Otherwise indexes the file from scratch and
+    replaces any stale cached index with the new one.
+
+    :param log_api: logging API
+    :param path: path to the source file
+    :param kind: what tracks the index covers ("audio", "video")
+    :param track_type: FFMS track type to index
+    :param progress_callback:
+        optional function receiving the number of processed and total bytes;
+        returning True from it aborts indexing with IndexingCanceled
+    :return: FFMS index
+    """
+    index_path = get_index_cache_path(path, kind)
+    if index_path.exists():
+        try:
+            return _read_index(log_api, path, index_path, track_type)
+        except ffms2.Error as ex:
+            log_api.warn(f"discarding cached index {index_path} ({ex})")
+            index_path.unlink(missing_ok=True)
+
+    indexer = ffms2.Indexer(str(path))
+    for track in indexer.track_info_list:
+        indexer.track_index_settings(track.num, track.type == track_type, 0)
+    canceled = False
+    if progress_callback is not None:
+
+        def _progress(current: int, total: int, _private: Any) -> int:
+            nonlocal canceled
+            canceled = progress_callback(current, total)
+            return int(canceled)
+
+        indexer.set_progress_callback(_progress)
+    try:
+        index = indexer.do_indexing2()
+    except ffms2.Error as ex:
+        if canceled:
+            raise IndexingCanceled(str(ex)) from ex
+        raise
+
+    _write_index(log_api, index, index_path)
+    prune_source_cache(path, f"{kind}-index", keep=index_path)
+    return index
@@ -0,0 +1,177 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Project open pipeline API."""
+
+import enum
+import time
+import uuid
+from typing import Optional
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from bubblesub.api.audio import AudioApi
+from bubblesub.api.audio_stream import AudioStream
+from bubblesub.api.log import LogApi
+from bubblesub.api.subs import SubtitlesApi
+from bubblesub.api.video import VideoApi
+from bubblesub.api.video_stream import VideoStream
+from bubblesub.errors import ResourceUnavailable
+
+
+class OpenStage(enum.Enum):
+    """Stage of opening a project."""
+
+    SUBS = "subs"
+    TIMECODES = "timecodes"
+    AUDIO = "audio"
+    SPECTROGRAM = "spectrogram"
+
+
+class OpenPipelineApi(QObject):
+    """Loads the streams associated with subtitles and tracks the progress.
+
+    Once the ASS file is parsed, all of its video and audio streams start
+    indexing at the same time, bounded by the size of the task thread pool.
+    Video streams are queued first, so that the frame timecodes, which most
+    of the editing depends on, are available as soon as possible.
+    """
+
+    stage_ready = pyqtSignal(object)
+    finished = pyqtSignal()
+
+    def __init__(
+        self,
+        log_api: LogApi,
+        subs_api: SubtitlesApi,
+        video_api: VideoApi,
+        audio_api: AudioApi,
+    ) -> None:
+        """Initialize self.
+
+        :param log_api: logging API
+        :param subs_api: subtitles API
+        :param video_api: video API
+        :param audio_api: audio API
+        """
+        super().__init__()
+        self._log_api = log_api
+        self._subs_api = subs_api
+        self._video_api = video_api
+        self._audio_api = audio_api
+
+        self._started: Optional[float] = None
+        self._timings: dict[OpenStage, float] = {}
+        self._pending_video: Optional[uuid.UUID] = None
+        self._pending_audio: set[uuid.UUID] = set()
+
+        subs_api.about_to_load.connect(self._on_subs_about_to_load)
+        subs_api.loaded.connect(self._on_subs_load)
+        video_api.stream_loaded.connect(self._on_video_stream_done)
+        video_api.stream_errored.connect(self._on_video_stream_done)
+        audio_api.stream_loaded.connect(self._on_audio_stream_done)
+        audio_api.stream_errored.connect(self._on_audio_stream_done)
+
+    @property
+    def timings(self) -> dict[OpenStage, float]:
+        """Return how long it took for each ready stage to become ready.
+
+        :return: map of stages to seconds since the project started opening
+        """
+        return dict(self._timings)
+
+    def is_stage_ready(self, stage: OpenStage) -> bool:
+        """Return whether given stage of opening the project has finished.
+
+        :param stage: stage to check
+        :return: whether the stage has finished
+        """
+        return stage in self._timings
+
+    def mark_spectrogram_ready(self) -> None:
+        """Report that the spectrogram of the first view has been drawn.
+
+        Does nothing unless the pipeline waits for the spectrogram.
+        """
+        if self.is_stage_ready(OpenStage.AUDIO):
+            self._mark_ready(OpenStage.SPECTROGRAM)
+
+    def _on_subs_about_to_load(self) -> None:
+        self._started = time.monotonic()
+
+    def _on_subs_load(self) -> None:
+        if self._started is None:
+            self._started = time.monotonic()
+        self._timings = {}
+        self._pending_video = None
+        self._pending_audio = set()
+
+        self._video_api.unload_all_streams()
+        self._audio_api.unload_all_streams()
+        self._mark_ready(OpenStage.SUBS)
+
+        for i, path in enumerate(self._subs_api.remembered_video_paths):
+            self._video_api.load_stream(path, switch=i == 0)
+            if i == 0:
+                self._pending_video = self._video_api.current_stream.uid
+        for i, path in enumerate(self._subs_api.remembered_audio_paths):
+            self._audio_api.load_stream(path, switch=i == 0)
+        self._pending_audio = {
+            stream.uid for stream in self._audio_api.streams
+        }
+
+        if self._pending_video is None:
+            self._mark_ready(OpenStage.TIMECODES)
+        if not self._pending_audio:
+            self._mark_ready(OpenStage.AUDIO)
+            self._mark_ready(OpenStage.SPECTROGRAM)
+
+    def _on_video_stream_done(self, stream: VideoStream) -> None:
+        if stream.uid == self._pending_video:
+            self._pending_video = None
+            self._mark_ready(OpenStage.TIMECODES)
+
+    def _on_audio_stream_done(self, stream: AudioStream) -> None:
+        if stream.uid not in self._pending_audio:
+            return
+        self._pending_audio.remove(stream.uid)
+        if not self._pending_audio:
+            self._mark_ready(OpenStage.AUDIO)
+            try:
+                has_spectrogram = self._audio_api.current_stream.is_ready
+            except ResourceUnavailable:
+                has_spectrogram = False
+            if not has_spectrogram:
+                self._mark_ready(OpenStage.SPECTROGRAM)
+
+    def _mark_ready(self, stage: OpenStage) -> None:
+        if self._started is None or stage in self._timings:
+            return
+        elapsed = time.monotonic() - self._started
+        self._timings[stage] = elapsed
+        self._log_api.info(f"open: {stage.value} ready after {elapsed:.2f} s")
+        self.stage_ready.emit(stage)
+
+        if len(self._timings) == len(OpenStage):
+            breakdown = ", ".join(
+                f"{stage.value}: {self._timings[stage]:.2f} s"
+                for stage in OpenStage
+            )
+            self._log_api.info(
+                f"open: project ready after {elapsed:.2f} s ({breakdown})"
+            )
+            self._started = None
+            self.finished.emit()
@@ -0,0 +1,187 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Persistent decoded audio samples."""
+
+import os
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+import ffms2
+import numpy as np
+
+from bubblesub.api.log import LogApi
+from bubblesub.api.sampler_pool import SamplerPool
+from bubblesub.cache import (
+    PCM_SUFFIX,
+    get_cache_file_path,
+    get_source_cache_name,
+    prune_source_cache,
+)
+
+PCM_DTYPE = np.float32
+CHUNK_SIZE = 1 << 18
+
+
+@dataclass
+class PcmCache:
+    """Memory-mapped decoded samples of an audio stream.
+
+    Both arrays hold float32 samples in range -1..1.
+    """
+
+    samples: np.memmap
+    mono_samples: np.memmap
+
+
+def samples_to_float(samples: np.ndarray) -> np.ndarray:
+    """Convert raw samples to float32 samples in range -1..1.
+
+    :param samples: samples in any format produced by ffms2
+    :return: float32 samples
+    """
+    if samples.dtype == np.uint8:
+        return (samples.astype(PCM_DTYPE) - 128) / 128
+    if samples.dtype.kind == "i":
+        return samples.astype(PCM_DTYPE) / (
+            1 << (samples.dtype.itemsize * 8 - 1)
+        )
+    return samples.astype(PCM_DTYPE, copy=False)
+
+
+def get_pcm_cache_path(path: Path) -> Path:
+    """Return path to the decoded samples of given audio file.
+
+    :param path: path to the audio file
+    :return: path to the cache file
+    """
+    return get_cache_file_path(
+        get_source_cache_name(path, "audio-pcm"), PCM_SUFFIX
+    )
+
+
+def _map_pcm_cache(
+    cache_path: Path, sample_count: int, channel_count: int
+) -> PcmCache:
+    # channels are interleaved, the mono downmix follows all of them
+    return PcmCache(
+        samples=np.memmap(
+            cache_path,
+            dtype=PCM_DTYPE,
+            mode="r",
+            shape=(sample_count, channel_count),
+        ),
+        mono_samples=np.memmap(
+            cache_path,
+            dtype=PCM_DTYPE,
+            mode="r",
+            offset=sample_count * channel_count * np.dtype(PCM_DTYPE).itemsize,
+            shape=(sample_count,),
+        ),
+    )
+
+
+def load_pcm_cache(
+    path: Path, sample_count: int, channel_count: int
+) -> Optional[PcmCache]:
+    """Map decoded samples of given audio file if they are cached.
+
+    :param path: path to the audio file
+    :param sample_count: number of samples per channel
+    :param channel_count: number of channels
+    :return: decoded samples or None if not cached
+    """
+    cache_path = get_pcm_cache_path(path)
+    expected_size = (
+        sample_count * (channel_count + 1) * np.dtype(PCM_DTYPE).itemsize
+    )
+    try:
+        if cache_path.stat().st_size != expected_size:
+            return None
+        return _map_pcm_cache(cache_path, sample_count, channel_count)
+    except (OSError, ValueError):
+        return None
+
+
+def build_pcm_cache(
+    log_api: LogApi,
+    path: Path,
+    samplers: SamplerPool[Any],
+    sample_count: int,
+    channel_count: int,
+    is_canceled: Callable[[], bool],
+) -> Optional[PcmCache]:
+    """Decode the whole audio file into the disk cache.
+
+    Reuses the cache if the audio file hasn't changed since it was last
+    decoded.
+
+    :param log_api: logging API
+    :param path: path to the audio file
+    :param samplers: FFMS audio sources to decode with
+    :param sample_count: number of samples per channel
+    :param channel_count: number of channels
+    :param is_canceled: function returning whether to stop decoding
+    :return: decoded samples or None if decoding failed or was canceled
+    """
+    if not sample_count or not channel_count:
+        return None
+
+    cached = load_pcm_cache(path, sample_count, channel_count)
+    if cached is not None:
+        log_api.info(f"reusing decoded samples for {path}")
+        return cached
+
+    cache_path = get_pcm_cache_path(path)
+    tmp_path = cache_path.with_suffix(".tmp")
+    try:
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        output = np.memmap(
+            tmp_path,
+            dtype=PCM_DTYPE,
+            mode="w+",
+            shape=(sample_count * (channel_count + 1),),
+        )
+        samples = output[: sample_count * channel_count].reshape(
+            sample_count, channel_count
+        )
+        mono_samples = output[sample_count * channel_count :]
+
+        for start in range(0, sample_count, CHUNK_SIZE):
+            if is_canceled():
+                del output, samples, mono_samples
+                tmp_path.unlink(missing_ok=True)
+                return None
+            count = min(CHUNK_SIZE, sample_count - start)
+            with samplers.acquire() as source:
+                source.init_buffer(count)
+                chunk = samples_to_float(source.get_audio(start))
+            samples[start : start + count] = chunk
+            mono_samples[start : start + count] = chunk.mean(axis=1)
+
+        output.flush()
+        del output, samples, mono_samples
+        os.replace(tmp_path, cache_path)
+    except (OSError, ValueError, ffms2.Error) as ex:
+        log_api.warn(f"error caching decoded samples for {path} ({ex})")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+    prune_source_cache(path, "audio-pcm", keep=cache_path)
+    log_api.info(f"cached decoded samples for {path}")
+    return _map_pcm_cache(cache_path, sample_count, channel_count)
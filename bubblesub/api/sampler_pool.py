@@ -0,0 +1,91 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Pools of stream samplers."""
+
+import contextlib
+import threading
+from collections.abc import Callable, Iterator
+from typing import Generic, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class SamplerPool(Generic[T]):
+    """Pool of independent samplers reading the same source.
+
+    Samplers are not thread safe, but distinct samplers can decode
+    concurrently. The pool lends each sampler to one thread at a time and
+    creates new samplers on demand, up to the given size.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], T],
+        size: int,
+        first: Optional[T] = None,
+    ) -> None:
+        """Initialize self.
+
+        :param factory: function creating a new sampler
+        :param size: maximum number of samplers
+        :param first: already created sampler to start the pool with
+        """
+        self._factory = factory
+        self._size = max(1, size)
+        self._idle: list[T] = [] if first is None else [first]
+        self._created = len(self._idle)
+        self._condition = threading.Condition()
+
+    @property
+    def size(self) -> int:
+        """Return the maximum number of samplers.
+
+        :return: maximum number of samplers
+        """
+        return self._size
+
+    @contextlib.contextmanager
+    def acquire(self) -> Iterator[T]:
+        """Borrow a sampler for the duration of the context.
+
+        Blocks if all samplers are in use and the pool is full.
+
+        :return: context manager yielding the sampler
+        """
+        sampler = self._take()
+        try:
+            yield sampler
+        finally:
+            with self._condition:
+                self._idle.append(sampler)
+                self._condition.notify()
+
+    def _take(self) -> T:
+        with self._condition:
+            while not self._idle and self._created >= self._size:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            self._created += 1
+
+        try:
+            return self._factory()
+        except BaseException:
+            with self._condition:
+                self._created -= 1
+                self._condition.notify()
+            raise
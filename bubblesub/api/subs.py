@@ -16,6 +16,7 @@
 
 """Subtitles API."""
 
+import itertools
 from collections.abc import Iterable
 from pathlib import Path
 from typing import Optional, Union, cast
@@ -27,12 +28,15 @@ from ass_parser import (
     AssScriptInfo,
     AssStyle,
     AssStyleList,
+    ObservableSequenceItemInsertionEvent,
+    ObservableSequenceItemModificationEvent,
     ObservableSequenceItemRemovalEvent,
     read_ass,
     write_ass,
 )
 from PyQt5.QtCore import QObject, pyqtSignal
 
+from bubblesub.api.event_index import EventIndex
 from bubblesub.cfg import Config
 from bubblesub.util import first
 
@@ -41,8 +45,18 @@ class SubtitlesApi(QObject):
     """The subtitles API.
 
     Encapsulates ASS styles, subtitles and subtitle selection.
+
+    Every change to the events, the styles, the script info or the selection
+    bumps the revision of the changed part, which lets consumers tell
+    whether anything changed without comparing the whole document. All
+    revisions are drawn from a single counter, so they never repeat, even
+    across loads.
+
+    The events are also indexed by their time range, which lets consumers
+    look up events around given time without walking the whole list.
     """
 
+    about_to_load = pyqtSignal()
     loaded = pyqtSignal()
     saved = pyqtSignal()
     selection_changed = pyqtSignal(list, bool)
@@ -57,6 +71,12 @@ class SubtitlesApi(QObject):
         self._selected_indexes: list[int] = []
         self._selection_to_commit: list[AssEvent] = []
         self._path: Optional[Path] = None
+        self._revision_counter = itertools.count(1)
+        self._events_revision = 0
+        self._styles_revision = 0
+        self._script_info_revision = 0
+        self._selection_revision = 0
+        self._event_index = EventIndex()
         self.ass_file = AssFile()
 
         self.loaded.connect(self._on_subs_load)
@@ -87,6 +107,50 @@ class SubtitlesApi(QObject):
         """
         return self.ass_file.script_info
 
+    @property
+    def events_revision(self) -> int:
+        """Return revision of the ASS events.
+
+        :return: number that changes whenever any event changes
+        """
+        return self._events_revision
+
+    @property
+    def styles_revision(self) -> int:
+        """Return revision of the ASS styles.
+
+        :return: number that changes whenever any style changes
+        """
+        return self._styles_revision
+
+    @property
+    def script_info_revision(self) -> int:
+        """Return revision of the additional information.
+
+        :return: number that changes whenever the script info changes
+        """
+        return self._script_info_revision
+
+    @property
+    def selection_revision(self) -> int:
+        """Return revision of the event selection.
+
+        :return: number that changes whenever the selection changes
+        """
+        return self._selection_revision
+
+    @property
+    def revision(self) -> int:
+        """Return revision of the whole ASS file, excluding the selection.
+
+        :return: number that changes whenever the file contents change
+        """
+        return max(
+            self._events_revision,
+            self._styles_revision,
+            self._script_info_revision,
+        )
+
     @property
     def remembered_video_paths(self) -> Iterable[Path]:
         """Return path of the associated video files.
@@ -185,6 +249,8 @@ class SubtitlesApi(QObject):
         new_selection = list(sorted(new_selection))
         changed = new_selection != self._selected_indexes
         self._selected_indexes = new_selection
+        if changed:
+            self._selection_revision = next(self._revision_counter)
         self.selection_changed.emit(new_selection, changed)
 
     @property
@@ -206,6 +272,28 @@ class SubtitlesApi(QObject):
             return style.name
         return "Default"
 
+    def events_in_range(self, start: int, end: int) -> list[AssEvent]:
+        """Return events overlapping given time range.
+
+        Events that end before they start are treated as if their times
+        were swapped.
+
+        :param start: start of the range, inclusive
+        :param end: end of the range, inclusive
+        :return: overlapping events, sorted by their index
+        """
+        return sorted(
+            self._event_index.query(start, end), key=lambda event: event.index
+        )
+
+    def events_at(self, pts: int) -> list[AssEvent]:
+        """Return events that span given time.
+
+        :param pts: time to look up
+        :return: events spanning given time, sorted by their index
+        """
+        return self.events_in_range(pts, pts)
+
     def unload(self) -> None:
         """Load empty ASS file."""
         self._path = None
@@ -224,6 +312,7 @@ class SubtitlesApi(QObject):
         """
         assert path
         path = Path(path)
+        self.about_to_load.emit()
         with path.open("r", encoding="utf-8") as handle:
             self.ass_file = read_ass(handle)
 
@@ -253,10 +342,30 @@ class SubtitlesApi(QObject):
             self._cfg.opt.add_recent_file(path)
 
     def _on_subs_load(self) -> None:
+        self._on_events_change()
+        self._on_styles_change()
+        self._on_script_info_change()
+        self._event_index.reset(self.events)
+        self.events.changed.subscribe(lambda _event: self._on_events_change())
+        self.styles.changed.subscribe(lambda _event: self._on_styles_change())
+        self.script_info.changed.subscribe(
+            lambda _event: self._on_script_info_change()
+        )
         self.events.items_about_to_be_removed.subscribe(
             self._on_items_about_to_be_removed
         )
         self.events.items_removed.subscribe(self._on_items_removed)
+        self.events.items_inserted.subscribe(self._on_items_inserted)
+        self.events.items_modified.subscribe(self._on_item_modified)
+
+    def _on_events_change(self) -> None:
+        self._events_revision = next(self._revision_counter)
+
+    def _on_styles_change(self) -> None:
+        self._styles_revision = next(self._revision_counter)
+
+    def _on_script_info_change(self) -> None:
+        self._script_info_revision = next(self._revision_counter)
 
     def _on_items_about_to_be_removed(
         self, event: ObservableSequenceItemRemovalEvent
@@ -272,7 +381,19 @@ class SubtitlesApi(QObject):
     def _on_items_removed(
         self, event: ObservableSequenceItemRemovalEvent
     ) -> None:
+        self._event_index.remove(event.items)
+
         # fix selection after reindexing
         self.selected_indexes = [
             event.index for event in self._selection_to_commit
         ]
+
+    def _on_items_inserted(
+        self, event: ObservableSequenceItemInsertionEvent
+    ) -> None:
+        self._event_index.add(event.items)
+
+    def _on_item_modified(
+        self, event: ObservableSequenceItemModificationEvent
+    ) -> None:
+        self._event_index.update(event.item)
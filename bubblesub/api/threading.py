@@ -16,14 +16,16 @@
 
 """Threading API."""
 
-import queue
-import time
-from collections.abc import Callable
-from typing import Any, ContextManager, TypeVar, cast
+import heapq
+import itertools
+import threading
+from collections.abc import Callable, Hashable
+from typing import Any, ContextManager, Optional, TypeVar, cast
 
 from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
 
 from bubblesub.api.log import LogApi
+from bubblesub.cfg import Config
 
 T = TypeVar("T", bound=Callable[..., Any])
 
@@ -51,7 +53,12 @@ class _WorkerSignals(QObject):
 
 
 class QueueWorker(QRunnable):
-    """Worker thread for continuous task queues."""
+    """Worker thread for continuous task queues.
+
+    Pending tasks are ordered by priority, then by submission order. Each
+    task can belong to a group, such as the stream it works on, so that the
+    tasks of a single group can be dropped without touching the others.
+    """
 
     def __init__(self, log_api: LogApi) -> None:
         """Initialize self.
@@ -60,11 +67,19 @@ class QueueWorker(QRunnable):
         """
         super().__init__()
         self._log_api = log_api
-        self._running = False
-        self._clearing = False
-        self._queue: queue.Queue[  # pylint: disable=unsubscriptable-object
-            Any
-        ] = queue.Queue()
+        self._stopping = False
+        self._condition = threading.Condition()
+        self._queue: list[tuple[float, int, Hashable, Any]] = []
+        self._counter = itertools.count()
+
+    @property
+    def pending_count(self) -> int:
+        """Return number of tasks waiting to be processed.
+
+        :return: number of pending tasks
+        """
+        with self._condition:
+            return len(self._queue)
 
     def run(self) -> None:
         """Run the thread.
@@ -74,20 +89,17 @@ class QueueWorker(QRunnable):
         Erroneous tasks (processing of which throws an exception) are
         discarded, and the exception is logged to stdout.
         """
-        self._running = True
         with self._log_api.exception_guard():
             self._started()
-        while self._running:
-            if self._clearing:
-                time.sleep(0.1)
-                continue
-
-            task = self._queue.get()
-            if task is None:
-                break
+        while True:
+            with self._condition:
+                while not self._queue and not self._stopping:
+                    self._condition.wait()
+                if self._stopping:
+                    break
+                _priority, _order, _group, task = heapq.heappop(self._queue)
             with self._log_api.exception_guard():
                 self._process_task(task)
-            self._queue.task_done()
         with self._log_api.exception_guard():
             self._finished()
 
@@ -100,29 +112,48 @@ class QueueWorker(QRunnable):
     def stop(self) -> None:
         """Stop processing any remaining tasks and quit the thread ASAP."""
         self.clear_tasks()
-        self._running = False
-        self._queue.put(None)  # make sure run() exits
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
 
-    def schedule_task(self, task_data: Any) -> None:
+    def schedule_task(
+        self,
+        task_data: Any,
+        priority: float = 0,
+        group: Hashable = None,
+    ) -> None:
         """Put a new task onto internal task queue.
 
         :param task_data: task to process
+        :param priority: lower values are processed first
+        :param group: key of the group the task belongs to
         """
-        self._queue.put(task_data)
-
-    def clear_tasks(self) -> None:
-        """Remove all remaining tasks.
+        with self._condition:
+            heapq.heappush(
+                self._queue,
+                (priority, next(self._counter), group, task_data),
+            )
+            self._condition.notify()
+
+    def clear_tasks(
+        self, predicate: Optional[Callable[[Hashable], bool]] = None
+    ) -> None:
+        """Remove remaining tasks.
 
         Doesn't fire the finished signal.
+
+        :param predicate:
+            function telling whether to remove the tasks of given group;
+            if omitted, all tasks are removed
         """
-        self._clearing = True
-        while not self._queue.empty():
-            try:
-                self._queue.get(False)
-            except queue.Empty:
-                continue
-            self._queue.task_done()
-        self._clearing = False
+        with self._condition:
+            if predicate is None:
+                self._queue.clear()
+                return
+            self._queue = [
+                entry for entry in self._queue if not predicate(entry[2])
+            ]
+            heapq.heapify(self._queue)
 
     def _started(self) -> None:
         """Called when the thread starts."""
@@ -156,13 +187,26 @@ class OneShotWorker(QRunnable):
 class ThreadingApi:
     """API for scheduling background tasks."""
 
-    def __init__(self, log_api: LogApi) -> None:
+    def __init__(self, log_api: LogApi, cfg: Config) -> None:
         """Initialize self.
 
+        One shot tasks run on their own thread pool so that long running
+        queue workers cannot starve them, and so that the number of files
+        indexed at the same time stays bounded. Long tasks, such as building
+        caches of whole files, get yet another pool so that they cannot
+        hold up indexing.
+
         :param log_api: logging API
+        :param cfg: program configuration
         """
         self._log_api = log_api
+        self._cfg = cfg
         self._thread_pool = QThreadPool()
+        self._task_pool = QThreadPool()
+        self._long_task_pool = QThreadPool()
+
+        self._on_options_change()
+        cfg.opt.changed.connect(self._on_options_change)
 
     def schedule_task(
         self,
@@ -178,7 +222,24 @@ class ThreadingApi:
         """
         worker = OneShotWorker(self._log_api, function)
         worker.signals.finished.connect(complete_callback)
-        self._thread_pool.start(worker)
+        self._task_pool.start(worker)
+
+    def schedule_long_task(
+        self,
+        function: Callable[..., Any],
+        complete_callback: Callable[..., Any],
+    ) -> None:
+        """Schedule a long running task, such as building a cache of a whole
+        file, to run in the background thread pool reserved for such tasks.
+
+        :param function: function to run
+        :param complete_callback:
+            callback to execute when the function finishes
+            (executed in the qt thread)
+        """
+        worker = OneShotWorker(self._log_api, function)
+        worker.signals.finished.connect(complete_callback)
+        self._long_task_pool.start(worker)
 
     def schedule_runnable(self, runnable: QRunnable) -> None:
         """Schedule a QRunnable to run in the background thread pool.
@@ -186,3 +247,8 @@ class ThreadingApi:
         :param runnable: QRunnable to schedule
         """
         self._thread_pool.start(runnable)
+
+    def _on_options_change(self) -> None:
+        self._task_pool.setMaxThreadCount(
+            max(1, self._cfg.opt["basic"]["max_task_threads"])
+        )
@@ -36,14 +36,17 @@ class UndoState:
         self,
         ass_file: AssFile,
         selected_indexes: list[int],
+        revision: int,
     ) -> None:
         """Initialize self.
 
         :param ass_file: currently loaded ASS file
         :param selected_indexes: current selection on the subtitle grid
+        :param revision: revision of the ASS file matching this state
         """
         self._ass_file = _pickle(ass_file)
         self.selected_indexes = selected_indexes
+        self.revision = revision
 
     @property
     def ass_file(self) -> AssFile:
@@ -123,6 +126,11 @@ class UndoApi:
 
         :return: whether there are any unsaved changes
         """
+        if (
+            self._saved_state is not None
+            and self._saved_state.revision == self._subs_api.revision
+        ):
+            return False
         return self._make_state() != self._saved_state
 
     @property
@@ -198,8 +206,12 @@ class UndoApi:
         if self._ignore:
             return False
         old_state = self._stack[self._stack_pos]
+        if old_state.revision == self._subs_api.revision:
+            return False
         cur_state = self._make_state()
         if old_state == cur_state:
+            # the changes cancelled each other out
+            old_state.revision = cur_state.revision
             return False
         self._discard_redo()
         self._stack.append(cur_state)
@@ -220,6 +232,7 @@ class UndoApi:
         return UndoState(
             ass_file=self._subs_api.ass_file,
             selected_indexes=self._subs_api.selected_indexes,
+            revision=self._subs_api.revision,
         )
 
     def _apply_state(self, state: UndoState) -> None:
@@ -232,3 +245,5 @@ class UndoApi:
         self._subs_api.ass_file.script_info.clear()
         self._subs_api.ass_file.script_info.update(state.ass_file.script_info)
         self._subs_api.selected_indexes = state.selected_indexes
+        # the document matches the state again, despite the new revision
+        state.revision = self._subs_api.revision
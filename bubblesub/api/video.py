@@ -16,13 +16,18 @@
 
 """Video stream API."""
 
+import uuid
 from pathlib import Path
 
+import numpy as np
+
 from bubblesub.api.base_streams_api import BaseStreamsApi
 from bubblesub.api.log import LogApi
 from bubblesub.api.subs import SubtitlesApi
 from bubblesub.api.threading import ThreadingApi
 from bubblesub.api.video_stream import VideoStream
+from bubblesub.cache import LruCache
+from bubblesub.cfg import Config
 
 
 class VideoApi(BaseStreamsApi[VideoStream]):
@@ -33,19 +38,44 @@ class VideoApi(BaseStreamsApi[VideoStream]):
         threading_api: ThreadingApi,
         log_api: LogApi,
         subs_api: SubtitlesApi,
+        cfg: Config,
     ) -> None:
         """Initialize self.
 
         :param threading_api: threading API
         :param log_api: logging API
         :param subs_api: subtitles API
+        :param cfg: program configuration
         """
         super().__init__()
         self._threading_api = threading_api
         self._log_api = log_api
         self._subs_api = subs_api
+        self._cfg = cfg
+        self.frame_cache: LruCache[
+            tuple[uuid.UUID, int, int, int], np.ndarray
+        ] = LruCache(
+            cfg.opt["video"]["frame_cache_size"] * 1024 * 1024,
+            lambda frame: frame.nbytes,
+        )
+
+        self.stream_unloaded.connect(self._on_stream_unload)
+        cfg.opt.changed.connect(self._on_options_change)
 
     def _create_stream(self, path: Path) -> VideoStream:
         return VideoStream(
-            self._threading_api, self._log_api, self._subs_api, path
+            self._threading_api,
+            self._log_api,
+            self._subs_api,
+            self._cfg,
+            self.frame_cache,
+            path,
+        )
+
+    def _on_stream_unload(self, stream: VideoStream) -> None:
+        self.frame_cache.discard(lambda key: key[0] == stream.uid)
+
+    def _on_options_change(self) -> None:
+        self.frame_cache.max_size = (
+            self._cfg.opt["video"]["frame_cache_size"] * 1024 * 1024
         )
@@ -0,0 +1,150 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Background decoding of video frames likely to be requested soon."""
+
+from typing import Any
+
+import numpy as np
+from PyQt5.QtCore import QObject
+
+from bubblesub.api.decode_executor import DecodePriority
+from bubblesub.api.log import LogApi
+from bubblesub.api.playback import PlaybackApi
+from bubblesub.api.subs import SubtitlesApi
+from bubblesub.api.threading import QueueWorker, ThreadingApi
+from bubblesub.api.video import VideoApi
+from bubblesub.api.video_stream import VideoStream
+from bubblesub.cfg import Config
+from bubblesub.errors import ResourceUnavailable
+
+
+class _FramePrefetchWorker(QueueWorker):
+    def __init__(self, log_api: LogApi, video_api: VideoApi) -> None:
+        """Initialize self.
+
+        :param log_api: logging API
+        :param video_api: video API
+        """
+        super().__init__(log_api)
+        self._video_api = video_api
+
+    def _process_task(self, task: Any) -> None:
+        stream, frame_idx, width, height = task
+        if stream not in self._video_api.streams:
+            return
+        stream.get_frame(
+            frame_idx, width, height, priority=DecodePriority.BACKGROUND
+        )
+
+
+class FramePrefetcher(QObject):
+    """Decodes frames around the playback position and the selected
+    subtitle boundaries into the frame cache while the video is paused.
+
+    Disabled unless the number of frames to prefetch is configured.
+    """
+
+    def __init__(
+        self,
+        threading_api: ThreadingApi,
+        log_api: LogApi,
+        subs_api: SubtitlesApi,
+        video_api: VideoApi,
+        playback_api: PlaybackApi,
+        cfg: Config,
+    ) -> None:
+        """Initialize self.
+
+        :param threading_api: threading API
+        :param log_api: logging API
+        :param subs_api: subtitles API
+        :param video_api: video API
+        :param playback_api: playback API
+        :param cfg: program configuration
+        """
+        super().__init__()
+        self._subs_api = subs_api
+        self._video_api = video_api
+        self._playback_api = playback_api
+        self._cfg = cfg
+
+        self._worker = _FramePrefetchWorker(log_api, video_api)
+        threading_api.schedule_runnable(self._worker)
+
+        playback_api.current_pts_changed.connect(self.update)
+        playback_api.pause_changed.connect(self.update)
+        subs_api.selection_changed.connect(self.update)
+        video_api.stream_unloaded.connect(self.update)
+
+    @property
+    def is_enabled(self) -> bool:
+        """Return whether the prefetcher is enabled.
+
+        :return: whether the prefetcher is enabled
+        """
+        return self._radius > 0
+
+    def update(self) -> None:
+        """Replace the pending frames with the ones around the current
+        playback position and the selected subtitle boundaries.
+        """
+        self._worker.clear_tasks()
+        if not self.is_enabled or not self._playback_api.is_paused:
+            return
+
+        try:
+            stream = self._video_api.current_stream
+        except ResourceUnavailable:
+            return
+        if not stream.is_ready:
+            return
+
+        for frame_idx in self._get_frame_indexes(stream):
+            key = (stream.uid, frame_idx, stream.width, stream.height)
+            if key not in self._video_api.frame_cache:
+                self._worker.schedule_task(
+                    (stream, frame_idx, stream.width, stream.height)
+                )
+
+    def stop(self) -> None:
+        """Stop prefetching frames."""
+        self._worker.stop()
+
+    @property
+    def _radius(self) -> int:
+        # read on demand, since the configuration loads after the API
+        return max(0, self._cfg.opt["video"]["prefetch_frames"])
+
+    def _get_frame_indexes(self, stream: VideoStream) -> list[int]:
+        anchors = [self._playback_api.current_pts]
+        selected_events = self._subs_api.selected_events
+        if selected_events:
+            anchors += [selected_events[0].start, selected_events[0].end]
+
+        frame_count = len(stream.timecodes)
+        ret: list[int] = []
+        offsets = np.arange(-self._radius, self._radius + 1)
+        # frames closest to the anchors are decoded first
+        offsets = offsets[np.argsort(np.abs(offsets), kind="stable")]
+        anchor_indexes = np.asarray(
+            stream.frame_idx_from_pts(np.array(anchors))
+        )
+        for anchor_idx in anchor_indexes:
+            for frame_idx in anchor_idx + offsets:
+                if 0 <= frame_idx < frame_count and frame_idx not in ret:
+                    ret.append(int(frame_idx))
+        return ret
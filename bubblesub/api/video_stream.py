@@ -17,12 +17,13 @@
 """Video API."""
 
 import asyncio
-import bisect
-import threading
 import uuid
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from dataclasses import dataclass
 from fractions import Fraction
 from pathlib import Path
-from typing import Any, ClassVar, Optional, Union, cast
+from typing import Any, ClassVar, Optional, TypeVar, Union, cast
 
 import ffms2
 import numpy as np
@@ -31,14 +32,31 @@ from ass_renderer import AssRenderer
 from PyQt5.QtCore import QObject, pyqtBoundSignal, pyqtSignal
 
 from bubblesub.api.base_stream import BaseStream, StreamUnavailable
+from bubblesub.api.decode_executor import DecodeExecutor, DecodePriority
+from bubblesub.api.ffms_index import IndexingCanceled, get_index
 from bubblesub.api.log import LogApi
+from bubblesub.api.sampler_pool import SamplerPool
 from bubblesub.api.subs import SubtitlesApi
 from bubblesub.api.threading import ThreadingApi
+from bubblesub.cache import (
+    LruCache,
+    get_source_cache_name,
+    load_arrays_cache,
+    prune_source_cache,
+    save_arrays_cache,
+)
+from bubblesub.cfg import Config
 
-_LOADING = object()
-_SAMPLER_LOCK = threading.Lock()
 _PIX_FMT = [ffms2.get_pix_fmt("rgb24")]
 
+PtsT = TypeVar("PtsT", int, np.ndarray)
+
+
+def _unwrap_pts(pts: PtsT, ret: np.ndarray) -> PtsT:
+    if isinstance(pts, np.ndarray):
+        return ret
+    return int(ret)
+
 
 class VideoStreamUnavailable(StreamUnavailable):
     """Exception raised when trying to access video stream properties when it
@@ -53,16 +71,87 @@ class VideoStreamUnavailable(StreamUnavailable):
         super().__init__(text or "video stream is not available right now")
 
 
+@dataclass
+class _VideoSampler:
+    source: ffms2.VideoSource
+    output_fmt: Any = None
+
+
+@dataclass
+class _VideoSourceInfo:
+    samplers: SamplerPool[_VideoSampler]
+    properties: Any
+    timecodes: np.ndarray
+    keyframes: np.ndarray
+    encoded_width: int
+    encoded_height: int
+
+
+def _get_timecodes_and_keyframes(
+    log_api: LogApi, path: Path, source: ffms2.VideoSource
+) -> tuple[np.ndarray, np.ndarray]:
+    """Retrieve video frames' PTS and keyframe indexes.
+
+    Reuses the values from the disk cache if the source file hasn't changed
+    since they were last computed.
+
+    :param log_api: logging API
+    :param path: path to the video file
+    :param source: FFMS video source
+    :return: sorted frames' PTS and sorted keyframe indexes
+    """
+    cache_name = get_source_cache_name(path, "video-timecodes")
+    arrays = load_arrays_cache(cache_name)
+    if (
+        arrays is not None
+        and "timecodes" in arrays
+        and "keyframes" in arrays
+        and len(arrays["timecodes"]) == source.properties.NumFrames
+    ):
+        return (
+            arrays["timecodes"].astype(np.int64, copy=False),
+            arrays["keyframes"].astype(np.int64, copy=False),
+        )
+
+    timecodes = np.sort(
+        np.round(np.asarray(source.track.timecodes, dtype=np.float64))
+    ).astype(np.int64)
+    keyframes = np.sort(np.asarray(source.track.keyframes, dtype=np.int64))
+
+    try:
+        cache_path = save_arrays_cache(
+            cache_name, {"timecodes": timecodes, "keyframes": keyframes}
+        )
+    except OSError as ex:
+        log_api.warn(f"error caching timecodes for {path} ({ex})")
+    else:
+        prune_source_cache(path, "video-timecodes", keep=cache_path)
+    return timecodes, keyframes
+
+
 def _load_video_source(
-    log_api: LogApi, uid: uuid.UUID, path: Path
-) -> Optional[ffms2.VideoSource]:
-    """Create video source.
+    log_api: LogApi,
+    uid: uuid.UUID,
+    path: Path,
+    pool_size: int,
+    progress_callback: Callable[[int, int], bool],
+    is_canceled: Callable[[], bool],
+) -> Optional[_VideoSourceInfo]:
+    """Create a pool of video sources.
 
     :param log_api: logging API
     :param uid: uid of the stream (for logging)
     :param path: path to the video file
-    :return: input path and resulting video source
+    :param pool_size: maximum number of sources decoding at the same time
+    :param progress_callback: function receiving indexing progress
+    :param is_canceled: function returning whether to stop loading
+    :return: resulting video source along with its frame information or
+        None if failed to create
     """
+    if is_canceled():
+        log_api.info(f"video {uid} loading canceled")
+        return None
+
     log_api.info(f"video {uid} started loading ({path})")
 
     if not path.exists():
@@ -70,12 +159,37 @@ def _load_video_source(
         return None
 
     try:
-        source = ffms2.VideoSource(str(path))
+        index = get_index(
+            log_api,
+            path,
+            "video",
+            ffms2.FFMS_TYPE_VIDEO,
+            progress_callback,
+        )
+        source = ffms2.VideoSource(str(path), index=index)
+        timecodes, keyframes = _get_timecodes_and_keyframes(
+            log_api, path, source
+        )
+        frame = source.get_frame(0)
+    except IndexingCanceled:
+        log_api.info(f"video {uid} loading canceled")
+        return None
     except ffms2.Error as ex:
         log_api.error(f"error loading video {uid} ({ex})")
         return None
     log_api.info(f"video {uid} finished loading")
-    return source
+    return _VideoSourceInfo(
+        samplers=SamplerPool(
+            lambda: _VideoSampler(ffms2.VideoSource(str(path), index=index)),
+            pool_size,
+            first=_VideoSampler(source),
+        ),
+        properties=source.properties,
+        timecodes=timecodes,
+        keyframes=keyframes,
+        encoded_width=frame.EncodedWidth,
+        encoded_height=frame.EncodedHeight,
+    )
 
 
 class VideoStream(BaseStream, QObject):
@@ -84,12 +198,15 @@ class VideoStream(BaseStream, QObject):
     errored = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
     changed = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
     loaded = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
+    progressed = cast(ClassVar[pyqtBoundSignal], pyqtSignal())
 
     def __init__(
         self,
         threading_api: ThreadingApi,
         log_api: LogApi,
         subs_api: SubtitlesApi,
+        cfg: Config,
+        frame_cache: LruCache[tuple[uuid.UUID, int, int, int], np.ndarray],
         path: Path,
     ) -> None:
         """Initialize self.
@@ -97,31 +214,44 @@ class VideoStream(BaseStream, QObject):
         :param threading_api: threading API
         :param log_api: logging API
         :param subs_api: subtitles API
+        :param cfg: program configuration
+        :param frame_cache: cache of decoded frames shared by all streams
         :param path: path to the video file to load
         """
         super().__init__()
         self._threading_api = threading_api
         self._log_api = log_api
         self._subs_api = subs_api
+        self._cfg = cfg
+        self._frame_cache = frame_cache
 
         self.uid = uuid.uuid4()
 
         self._path = path
-        self._timecodes: Optional[list[int]] = None
-        self._keyframes: Optional[list[int]] = None
+        self._timecodes: Optional[np.ndarray] = None
+        self._keyframes: Optional[np.ndarray] = None
+        self._keyframe_timecodes: Optional[np.ndarray] = None
         self._frame_rate: Optional[Fraction] = None
         self._aspect_ratio: Optional[Fraction] = None
         self._width: Optional[int] = None
         self._height: Optional[int] = None
 
         self._ass_renderer = AssRenderer()
-        self._source: Union[None, ffms2.VideoSource] = None
-
-        self._last_output_fmt: Any = None
+        self._samplers: Optional[SamplerPool[_VideoSampler]] = None
+        self._decoder: Optional[
+            DecodeExecutor[tuple[int, int, int, bool], np.ndarray]
+        ] = None
 
         self._log_api.info(f"video: loading {path}")
         self._threading_api.schedule_task(
-            lambda: _load_video_source(self._log_api, self.uid, self._path),
+            lambda: _load_video_source(
+                self._log_api,
+                self.uid,
+                self._path,
+                self._cfg.opt["video"]["sampler_pool_size"],
+                self._on_index_progress,
+                lambda: self.is_canceled,
+            ),
             self._got_source,
         )
 
@@ -139,7 +269,16 @@ class VideoStream(BaseStream, QObject):
 
         :return: whether the video is loaded
         """
-        return self._source is not None
+        return self._samplers is not None
+
+    def cancel(self) -> None:
+        """Stop loading the stream source as soon as possible.
+
+        Aborts indexing and drops all pending frame requests.
+        """
+        super().cancel()
+        if self._decoder is not None:
+            self._decoder.shutdown()
 
     def screenshot(
         self,
@@ -174,10 +313,8 @@ class VideoStream(BaseStream, QObject):
             raise ValueError("cannot take a screenshot at negative resolution")
 
         pts = self.align_pts_to_prev_frame(pts)
-        idx = self.timecodes.index(pts)
+        idx = int(self.frame_idx_from_pts(pts))
         frame = self.get_frame(idx, grab_width, grab_height)
-        if not frame.flags.c_contiguous:
-            frame = frame.copy(order="C")
         image = PIL.Image.frombytes("RGB", (grab_width, grab_height), frame)
 
         if include_subtitles:
@@ -192,66 +329,81 @@ class VideoStream(BaseStream, QObject):
 
         image.save(str(path))
 
-    def align_pts_to_near_frame(self, pts: int) -> int:
+    def align_pts_to_near_frame(self, pts: PtsT) -> PtsT:
         """Align PTS to a frame closest to given PTS.
 
-        :param pts: PTS to align
+        :param pts: PTS to align, or an array of PTS to align all at once
         :return: aligned PTS
         """
-        if self.timecodes:
-            max_idx = len(self.timecodes) - 1
-            idx1 = max(
-                0, min(max_idx, bisect.bisect_right(self.timecodes, pts) - 1)
-            )
-            idx2 = max(
-                0, min(max_idx, bisect.bisect_left(self.timecodes, pts))
-            )
-            return min(
-                [self.timecodes[idx1], self.timecodes[idx2]],
-                key=lambda val: abs(val - pts),
-            )
-        return pts
+        timecodes = self.timecodes
+        if not timecodes.size:
+            return pts
+        values = np.asarray(pts, dtype=np.int64)
+        max_idx = len(timecodes) - 1
+        prev_pts = np.take(
+            timecodes,
+            np.clip(
+                np.searchsorted(timecodes, values, "right") - 1, 0, max_idx
+            ),
+        )
+        next_pts = np.take(
+            timecodes,
+            np.clip(np.searchsorted(timecodes, values, "left"), 0, max_idx),
+        )
+        ret = np.where(
+            np.abs(prev_pts - values) <= np.abs(next_pts - values),
+            prev_pts,
+            next_pts,
+        )
+        return _unwrap_pts(pts, ret)
 
-    def align_pts_to_prev_frame(self, pts: int) -> int:
+    def align_pts_to_prev_frame(self, pts: PtsT) -> PtsT:
         """Align PTS to a frame immediately before given PTS.
 
-        :param pts: PTS to align
+        :param pts: PTS to align, or an array of PTS to align all at once
         :return: aligned PTS
         """
-        if self.timecodes:
-            idx = bisect.bisect_right(self.timecodes, pts) - 1
-            if idx >= len(self.timecodes):
-                return self.timecodes[-1]
-            if pts < self.timecodes[idx]:
-                return pts
-            return self.timecodes[idx]
-        return pts
-
-    def align_pts_to_next_frame(self, pts: int) -> int:
+        timecodes = self.timecodes
+        if not timecodes.size:
+            return pts
+        values = np.asarray(pts, dtype=np.int64)
+        idx = np.searchsorted(timecodes, values, "right") - 1
+        ret = np.where(idx < 0, values, np.take(timecodes, np.maximum(idx, 0)))
+        return _unwrap_pts(pts, ret)
+
+    def align_pts_to_next_frame(self, pts: PtsT) -> PtsT:
         """Align PTS to a frame immediately after given PTS.
 
-        :param pts: PTS to align
+        :param pts: PTS to align, or an array of PTS to align all at once
         :return: aligned PTS
         """
-        if self.timecodes:
-            idx = bisect.bisect_left(self.timecodes, pts)
-            if idx >= len(self.timecodes):
-                return pts
-            if pts < 0:
-                return self.timecodes[0]
-            return self.timecodes[idx]
-        return pts
+        timecodes = self.timecodes
+        if not timecodes.size:
+            return pts
+        values = np.asarray(pts, dtype=np.int64)
+        idx = np.searchsorted(timecodes, values, "left")
+        ret = np.where(
+            idx >= len(timecodes),
+            values,
+            np.where(
+                values < 0,
+                timecodes[0],
+                np.take(timecodes, np.minimum(idx, len(timecodes) - 1)),
+            ),
+        )
+        return _unwrap_pts(pts, ret)
 
     def frame_idx_from_pts(
         self, pts: Union[float, int, np.ndarray]
     ) -> Union[int, np.ndarray]:
         """Get index of a frame that contains given PTS.
 
-        :param pts: PTS to search for
+        :param pts: PTS to search for, or an array of PTS to search for
         :return: frame index, -1 if not found
         """
-        ret = np.searchsorted(self.timecodes, pts, "right").astype(np.int32)
-        ret = np.clip(ret - 1, a_min=0 if self.timecodes else -1, a_max=None)
+        timecodes = self.timecodes
+        ret = np.searchsorted(timecodes, pts, "right").astype(np.int32)
+        ret = np.clip(ret - 1, a_min=0 if timecodes.size else -1, a_max=None)
         return ret
 
     @property
@@ -303,29 +455,41 @@ class VideoStream(BaseStream, QObject):
         return self._aspect_ratio
 
     @property
-    def timecodes(self) -> list[int]:
+    def timecodes(self) -> np.ndarray:
         """Return video frames' PTS.
 
         Raises an exception if the stream is not fully loaded yet.
 
-        :return: video frames' PTS
+        :return: sorted int64 array of video frames' PTS
         """
         if self._timecodes is None:
             raise VideoStreamUnavailable
         return self._timecodes
 
     @property
-    def keyframes(self) -> list[int]:
+    def keyframes(self) -> np.ndarray:
         """Return video keyframes' indexes.
 
         Raises an exception if the stream is not fully loaded yet.
 
-        :return: video keyframes' indexes
+        :return: sorted int64 array of video keyframes' indexes
         """
         if self._keyframes is None:
             raise VideoStreamUnavailable
         return self._keyframes
 
+    @property
+    def keyframe_timecodes(self) -> np.ndarray:
+        """Return video keyframes' PTS.
+
+        Raises an exception if the stream is not fully loaded yet.
+
+        :return: sorted int64 array of video keyframes' PTS
+        """
+        if self._keyframe_timecodes is None:
+            raise VideoStreamUnavailable
+        return self._keyframe_timecodes
+
     @property
     def min_pts(self) -> int:
         """Return minimum video time in milliseconds.
@@ -334,9 +498,9 @@ class VideoStream(BaseStream, QObject):
 
         :return: minimum PTS
         """
-        if not self.timecodes:
+        if not self.timecodes.size:
             return 0
-        return self.timecodes[0]
+        return int(self.timecodes[0])
 
     @property
     def max_pts(self) -> int:
@@ -346,37 +510,83 @@ class VideoStream(BaseStream, QObject):
 
         :return: maximum PTS
         """
-        if not self.timecodes:
+        if not self.timecodes.size:
             return 0
-        return self.timecodes[-1]
+        return int(self.timecodes[-1])
 
-    def get_frame(self, frame_idx: int, width: int, height: int) -> np.ndarray:
-        """Get raw video data from the currently loaded video source.
+    def request_frame(
+        self,
+        frame_idx: int,
+        width: int,
+        height: int,
+        priority: DecodePriority = DecodePriority.INTERACTIVE,
+        consumer: Optional[Hashable] = None,
+        use_cache: bool = True,
+    ) -> "Future[np.ndarray]":
+        """Schedule decoding a frame on the stream decode executor.
+
+        Requests for the same frame are decoded only once.
 
         :param frame_idx: frame number
         :param width: output image width
         :param height: output image height
-        :return: numpy image
+        :param priority: how urgently the frame is needed
+        :param consumer:
+            who requests the frame; cancels the previous pending request of
+            the same consumer
+        :param use_cache:
+            whether to look up the frame in and put it into the frame cache
+        :return: future holding numpy image
         """
-        with _SAMPLER_LOCK:
-            if frame_idx < 0 or frame_idx >= len(self.timecodes):
-                raise ValueError("bad frame")
-            assert self._source
-
-            new_output_fmt = (_PIX_FMT, width, height, ffms2.FFMS_RESIZER_AREA)
-            if self._last_output_fmt != new_output_fmt:
-                self._source.set_output_format(*new_output_fmt)
-                self._last_output_fmt = new_output_fmt
-
-            frame = self._source.get_frame(frame_idx)
-            return (
-                frame.planes[0]
-                .reshape((height, frame.Linesize[0]))[:, 0 : width * 3]
-                .reshape(height, width, 3)
+        if frame_idx < 0 or frame_idx >= len(self.timecodes):
+            raise ValueError("bad frame")
+        assert self._decoder
+
+        if use_cache:
+            cached_frame = self._frame_cache.get(
+                (self.uid, frame_idx, width, height)
             )
+            if cached_frame is not None:
+                future: "Future[np.ndarray]" = Future()
+                future.set_result(cached_frame)
+                if consumer is not None:
+                    self._decoder.cancel(consumer)
+                return future
+
+        return self._decoder.submit(
+            (frame_idx, width, height, use_cache), priority, consumer
+        )
+
+    def get_frame(
+        self,
+        frame_idx: int,
+        width: int,
+        height: int,
+        priority: DecodePriority = DecodePriority.INTERACTIVE,
+        use_cache: bool = True,
+    ) -> np.ndarray:
+        """Get raw video data from the currently loaded video source.
+
+        Blocks until the frame is decoded.
+
+        :param frame_idx: frame number
+        :param width: output image width
+        :param height: output image height
+        :param priority: how urgently the frame is needed
+        :param use_cache:
+            whether to look up the frame in and put it into the frame cache
+        :return: numpy image (read-only if it comes from the cache)
+        """
+        return self.request_frame(
+            frame_idx, width, height, priority=priority, use_cache=use_cache
+        ).result()
 
     async def async_get_frame(
-        self, frame_idx: int, width: int, height: int
+        self,
+        frame_idx: int,
+        width: int,
+        height: int,
+        consumer: Optional[Hashable] = None,
     ) -> np.ndarray:
         """Get raw video data from the currently loaded video source
         asynchronously.
@@ -384,49 +594,67 @@ class VideoStream(BaseStream, QObject):
         :param frame_idx: frame number
         :param width: output image width
         :param height: output image height
+        :param consumer:
+            who requests the frame; cancels the previous pending request of
+            the same consumer
         :return: numpy image
         """
-        loop = asyncio.get_event_loop()
-        future = loop.create_future()
-
-        def _worker() -> None:
-            result = self.get_frame(frame_idx, width, height)
-            loop.call_soon_threadsafe(future.set_result, result)
+        return await asyncio.wrap_future(
+            self.request_frame(frame_idx, width, height, consumer=consumer)
+        )
 
-        asyncio.get_event_loop().run_in_executor(None, _worker)
-        return await future
+    def _decode_frame(
+        self, frame_idx: int, width: int, height: int, use_cache: bool
+    ) -> np.ndarray:
+        assert self._samplers
+        new_output_fmt = (_PIX_FMT, width, height, ffms2.FFMS_RESIZER_AREA)
+        with self._samplers.acquire() as sampler:
+            if sampler.output_fmt != new_output_fmt:
+                sampler.source.set_output_format(*new_output_fmt)
+                sampler.output_fmt = new_output_fmt
+
+            frame = sampler.source.get_frame(frame_idx)
+            # the frame data is owned by the source, so it needs to be copied
+            # before another thread gets to reuse the source
+            ret = np.array(
+                frame.planes[0]
+                .reshape((height, frame.Linesize[0]))[:, 0 : width * 3]
+                .reshape(height, width, 3),
+                order="C",
+            )
 
-    def _got_source(self, source: ffms2.VideoSource) -> None:
-        with _SAMPLER_LOCK:
-            self._source = source
+        if use_cache:
+            ret.flags.writeable = False
+            self._frame_cache.put((self.uid, frame_idx, width, height), ret)
+        return ret
 
-            if source is None:
+    def _got_source(self, info: Optional[_VideoSourceInfo]) -> None:
+        # the stream might have been unloaded while its source was loading
+        if info is None or self.is_canceled:
+            self._set_load_failed()
+            if not self.is_canceled:
                 self.errored.emit()
-                return
+            return
 
-            self._timecodes = sorted(
-                [int(round(pts)) for pts in source.track.timecodes]
-            )
-            self._keyframes = sorted(source.track.keyframes[:])
+        self._timecodes = info.timecodes
+        self._keyframes = info.keyframes
+        self._keyframe_timecodes = info.timecodes[info.keyframes]
 
-            self._frame_rate = Fraction(
-                self._source.properties.FPSNumerator,
-                self._source.properties.FPSDenominator,
-            )
+        self._frame_rate = Fraction(
+            info.properties.FPSNumerator, info.properties.FPSDenominator
+        )
 
-            self._aspect_ratio = (
-                Fraction(
-                    self._source.properties.SARNum,
-                    self._source.properties.SARDen,
-                )
-                if (
-                    self._source.properties.SARNum
-                    and self._source.properties.SARDen
-                )
-                else Fraction(1, 1)
-            )
+        self._aspect_ratio = (
+            Fraction(info.properties.SARNum, info.properties.SARDen)
+            if info.properties.SARNum and info.properties.SARDen
+            else Fraction(1, 1)
+        )
 
-            frame = source.get_frame(0)
-            self._width = frame.EncodedWidth
-            self._height = int(frame.EncodedHeight / self.aspect_ratio)
-            self.loaded.emit()
+        self._width = info.encoded_width
+        self._height = int(info.encoded_height / self.aspect_ratio)
+        self._samplers = info.samplers
+        self._decoder = DecodeExecutor(
+            lambda key: self._decode_frame(*key), info.samplers.size
+        )
+        self._set_loaded()
+        self.loaded.emit()
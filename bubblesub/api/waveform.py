@@ -0,0 +1,216 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Peak and RMS summary of decoded audio samples."""
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import ffms2
+import numpy as np
+
+from bubblesub.api.log import LogApi
+from bubblesub.cache import (
+    get_source_cache_name,
+    load_arrays_cache,
+    prune_source_cache,
+    save_arrays_cache,
+)
+
+# a bucket of level 0 summarizes 2**BUCKET_SHIFT samples, and each next
+# level merges pairs of buckets of the previous one
+BUCKET_SHIFT = 8
+LEVEL_COUNT = 12
+CHUNK_SIZE = 1 << 18
+
+MIN = 0
+MAX = 1
+RMS = 2
+
+
+@dataclass
+class WaveformSummary:
+    """Multi-level summary of the mono samples of an audio stream.
+
+    Each level is a float32 array with one row per bucket, holding the
+    minimum, the maximum and the RMS of the samples within the bucket.
+    """
+
+    levels: list[np.ndarray]
+
+
+def summarize_samples(samples: np.ndarray) -> np.ndarray:
+    """Compute level 0 buckets of given samples.
+
+    The last bucket is padded with silence if the samples don't fill it.
+
+    :param samples: float32 mono samples
+    :return: array with one row of minimum, maximum and RMS per bucket
+    """
+    bucket_size = 1 << BUCKET_SHIFT
+    padded = np.zeros(-(-len(samples) // bucket_size) * bucket_size)
+    padded[: len(samples)] = samples
+    buckets = padded.reshape(-1, bucket_size)
+    out = np.empty((len(buckets), 3), dtype=np.float32)
+    out[:, MIN] = buckets.min(axis=1)
+    out[:, MAX] = buckets.max(axis=1)
+    out[:, RMS] = np.sqrt(np.square(buckets).mean(axis=1))
+    return out
+
+
+def merge_buckets(level: np.ndarray) -> np.ndarray:
+    """Compute the next, coarser level of a summary.
+
+    :param level: array with one row of minimum, maximum and RMS per bucket
+    :return: array with half as many buckets, rounded up
+    """
+    if len(level) % 2:
+        level = np.concatenate([level, level[-1:]])
+    pairs = level.reshape(-1, 2, 3)
+    out = np.empty((len(pairs), 3), dtype=np.float32)
+    out[:, MIN] = pairs[:, :, MIN].min(axis=1)
+    out[:, MAX] = pairs[:, :, MAX].max(axis=1)
+    out[:, RMS] = np.sqrt(np.square(pairs[:, :, RMS]).mean(axis=1))
+    return out
+
+
+def build_levels(level_0: np.ndarray) -> list[np.ndarray]:
+    """Build all summary levels out of the finest one.
+
+    :param level_0:
+        array with one row of minimum, maximum and RMS per bucket of
+        2**BUCKET_SHIFT samples
+    :return: list of levels, finest first
+    """
+    levels = [level_0]
+    while len(levels) < LEVEL_COUNT:
+        levels.append(merge_buckets(levels[-1]))
+    return levels
+
+
+def get_level(samples_per_pixel: float) -> int:
+    """Pick the coarsest summary level that still has a bucket per pixel.
+
+    :param samples_per_pixel: how many samples fall on one pixel
+    :return: summary level
+    """
+    buckets_per_pixel = samples_per_pixel / (1 << BUCKET_SHIFT)
+    if buckets_per_pixel <= 1:
+        return 0
+    return min(int(np.log2(buckets_per_pixel)), LEVEL_COUNT - 1)
+
+
+def get_pixel_summary(
+    summary: WaveformSummary, first_samples: np.ndarray, level: int
+) -> tuple[np.ndarray, np.ndarray]:
+    """Summarize the samples falling on each pixel column.
+
+    :param summary: waveform summary
+    :param first_samples:
+        sorted indexes of the first sample of each pixel column, followed by
+        the index of the sample past the last column
+    :param level: summary level to read
+    :return:
+        array with one row of minimum, maximum and RMS per pixel column,
+        and a boolean array telling which columns fall within the audio
+    """
+    data = summary.levels[level]
+    # reduceat reduces each column up to the start of the next one, so the
+    # end of the last column needs a valid index too
+    padded = np.concatenate([data, np.zeros((1, 3), dtype=data.dtype)])
+    starts = first_samples >> (BUCKET_SHIFT + level)
+    indexes = np.clip(starts, 0, len(data))
+
+    out = np.empty((len(indexes) - 1, 3), dtype=np.float32)
+    out[:, MIN] = np.minimum.reduceat(padded[:, MIN], indexes)[:-1]
+    out[:, MAX] = np.maximum.reduceat(padded[:, MAX], indexes)[:-1]
+    squares = np.add.reduceat(np.square(padded[:, RMS]), indexes)[:-1]
+    out[:, RMS] = np.sqrt(squares / np.maximum(np.diff(indexes), 1))
+
+    within = (starts[:-1] >= 0) & (starts[:-1] < len(data))
+    out[~within] = 0
+    return out, within
+
+
+def get_waveform_cache_name(path: Path) -> str:
+    """Return name of the cache file holding the summary of given audio.
+
+    :param path: path to the audio file
+    :return: name of cache file
+    """
+    return get_source_cache_name(path, f"audio-waveform-{BUCKET_SHIFT}")
+
+
+def build_waveform_summary(
+    log_api: LogApi,
+    path: Path,
+    read_mono_samples: Callable[[int, int], np.ndarray],
+    sample_count: int,
+    is_canceled: Callable[[], bool],
+) -> Optional[WaveformSummary]:
+    """Summarize the whole audio file in one pass and cache the result.
+
+    Reuses the cache if the audio file hasn't changed since it was last
+    summarized.
+
+    :param log_api: logging API
+    :param path: path to the audio file
+    :param read_mono_samples:
+        function returning float32 mono samples given the first sample and
+        the sample count
+    :param sample_count: number of samples per channel
+    :param is_canceled: function returning whether to stop reading
+    :return: waveform summary or None if reading failed or was canceled
+    """
+    if not sample_count:
+        return None
+
+    try:
+        cache_name = get_waveform_cache_name(path)
+    except OSError as ex:
+        log_api.warn(f"error caching waveform for {path} ({ex})")
+        return None
+
+    bucket_count = -(-sample_count // (1 << BUCKET_SHIFT))
+    arrays = load_arrays_cache(cache_name)
+    if (
+        arrays is not None
+        and "level-0" in arrays
+        and len(arrays["level-0"]) == bucket_count
+    ):
+        return WaveformSummary(levels=build_levels(arrays["level-0"]))
+
+    chunks: list[np.ndarray] = []
+    try:
+        for start in range(0, sample_count, CHUNK_SIZE):
+            if is_canceled():
+                return None
+            count = min(CHUNK_SIZE, sample_count - start)
+            chunks.append(summarize_samples(read_mono_samples(start, count)))
+    except (OSError, ValueError, ffms2.Error) as ex:
+        log_api.warn(f"error reading samples of {path} ({ex})")
+        return None
+
+    level_0 = np.concatenate(chunks)
+    try:
+        cache_path = save_arrays_cache(cache_name, {"level-0": level_0})
+    except OSError as ex:
+        log_api.warn(f"error caching waveform for {path} ({ex})")
+    else:
+        prune_source_cache(path, "audio-waveform", keep=cache_path)
+    return WaveformSummary(levels=build_levels(level_0))
@@ -17,12 +17,27 @@
 """Caching utilities."""
 
 import pickle
+import re
+import threading
+import zipfile
+from collections import OrderedDict
+from collections.abc import Callable, Hashable
 from pathlib import Path
-from typing import Any
+from typing import Any, Generic, Optional, TypeVar, cast
+
+import numpy as np
 
 from bubblesub.data import USER_CACHE_DIR
+from bubblesub.util import sanitize_file_name
 
 CACHE_SUFFIX = ".dat"
+INDEX_SUFFIX = ".ffindex"
+ARRAYS_SUFFIX = ".npz"
+PCM_SUFFIX = ".pcm"
+TILE_SUFFIX = ".tile"
+
+KeyT = TypeVar("KeyT", bound=Hashable)
+ValueT = TypeVar("ValueT")
 
 
 def get_cache_dir() -> Path:
@@ -33,13 +48,52 @@ def get_cache_dir() -> Path:
     return USER_CACHE_DIR / "bubblesub"
 
 
-def get_cache_file_path(cache_name: str) -> Path:
+def get_cache_file_path(cache_name: str, suffix: str = CACHE_SUFFIX) -> Path:
     """Translate cache file name into full path.
 
     :param cache_name: name of cache file
+    :param suffix: cache file extension
     :return: full cache file path
     """
-    return get_cache_dir() / (cache_name + CACHE_SUFFIX)
+    return get_cache_dir() / (cache_name + suffix)
+
+
+def get_source_cache_name(path: Path, kind: str) -> str:
+    """Build cache file name bound to the identity of given source file.
+
+    The name includes the source file size and modification time, so any
+    change to the source file results in a different cache name.
+
+    :param path: path to the source file
+    :param kind: what kind of data is going to be cached
+    :return: name of cache file
+    """
+    stat = path.stat()
+    return (
+        f"{sanitize_file_name(path)}-{stat.st_size}-{stat.st_mtime_ns}-{kind}"
+    )
+
+
+def prune_source_cache(path: Path, kind: str, keep: Path) -> None:
+    """Delete cache files of given kind made for older versions of given
+    source file.
+
+    :param path: path to the source file
+    :param kind: prefix of the cache kind to prune
+    :param keep: path to the up to date cache file
+    """
+    pattern = re.compile(
+        re.escape(sanitize_file_name(path))
+        + r"-\d+-\d+-"
+        + re.escape(kind)
+        + r"\b"
+    )
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return
+    for cache_path in cache_dir.iterdir():
+        if cache_path != keep and pattern.match(cache_path.name):
+            cache_path.unlink(missing_ok=True)
 
 
 def load_cache(cache_name: str) -> Any:
@@ -70,8 +124,181 @@ def save_cache(cache_name: str, data: Any) -> None:
         pickle.dump(data, handle)
 
 
+def load_arrays_cache(cache_name: str) -> Optional[dict[str, np.ndarray]]:
+    """Load cached numpy arrays from disk.
+
+    :param cache_name: name of cache file
+    :return: persisted arrays or None if not cached
+    """
+    cache_path = get_cache_file_path(cache_name, ARRAYS_SUFFIX)
+    if cache_path.exists():
+        try:
+            with np.load(cache_path, allow_pickle=False) as handle:
+                return {key: handle[key] for key in handle.files}
+        except (OSError, ValueError, EOFError, zipfile.BadZipFile):
+            return None
+    return None
+
+
+def save_arrays_cache(cache_name: str, arrays: dict[str, np.ndarray]) -> Path:
+    """Save numpy arrays to disk cache.
+
+    :param cache_name: name of cache file
+    :param arrays: arrays to persist
+    :return: path to the cache file
+    """
+    cache_path = get_cache_file_path(cache_name, ARRAYS_SUFFIX)
+    cache_path.parent.mkdir(parents=True, exist_ok=True)
+    with cache_path.open(mode="wb") as handle:
+        np.savez(handle, **cast(dict[str, Any], arrays))
+    return cache_path
+
+
 def wipe_cache() -> None:
     """Delete disk cache."""
     for path in get_cache_dir().iterdir():
-        if path.suffix == CACHE_SUFFIX:
+        if path.suffix in {
+            CACHE_SUFFIX,
+            INDEX_SUFFIX,
+            ARRAYS_SUFFIX,
+            PCM_SUFFIX,
+            TILE_SUFFIX,
+        }:
             path.unlink()
+
+
+class LruCache(Generic[KeyT, ValueT]):
+    """Thread safe in-memory cache bounded by the total size of its items.
+
+    Once the size limit is exceeded, the least recently used items are
+    evicted first.
+    """
+
+    def __init__(
+        self, max_size: int, get_size: Callable[[ValueT], int]
+    ) -> None:
+        """Initialize self.
+
+        :param max_size: maximum total size of the items in bytes
+        :param get_size: function returning the size of an item in bytes
+        """
+        self._max_size = max_size
+        self._get_size = get_size
+        self._items: OrderedDict[KeyT, tuple[ValueT, int]] = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        """Return number of cached items.
+
+        :return: number of cached items
+        """
+        return len(self._items)
+
+    @property
+    def size(self) -> int:
+        """Return total size of the cached items.
+
+        :return: size in bytes
+        """
+        return self._size
+
+    @property
+    def max_size(self) -> int:
+        """Return maximum total size of the cached items.
+
+        :return: size in bytes
+        """
+        return self._max_size
+
+    @max_size.setter
+    def max_size(self, value: int) -> None:
+        """Set new maximum total size of the cached items.
+
+        :param value: new size in bytes
+        """
+        with self._lock:
+            self._max_size = value
+            self._evict()
+
+    def get(self, key: KeyT) -> Optional[ValueT]:
+        """Return cached item and mark it as recently used.
+
+        :param key: item key
+        :return: cached item or None if not cached
+        """
+        with self._lock:
+            try:
+                value, _size = self._items[key]
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __contains__(self, key: KeyT) -> bool:
+        """Return whether given item is cached.
+
+        Doesn't count as use of the item.
+
+        :param key: item key
+        :return: whether the item is cached
+        """
+        return key in self._items
+
+    def put(self, key: KeyT, value: ValueT) -> None:
+        """Cache given item.
+
+        Items larger than the whole cache are not cached.
+
+        :param key: item key
+        :param value: item to cache
+        """
+        size = self._get_size(value)
+        with self._lock:
+            old_item = self._items.pop(key, None)
+            if old_item is not None:
+                self._size -= old_item[1]
+            if size > self._max_size:
+                return
+            self._items[key] = (value, size)
+            self._size += size
+            self._evict()
+
+    def get_usage(self, predicate: Callable[[KeyT], bool]) -> int:
+        """Return total size of the items whose keys match given predicate.
+
+        :param predicate: function returning True for keys to count
+        :return: size in bytes
+        """
+        with self._lock:
+            return sum(
+                size
+                for key, (_value, size) in self._items.items()
+                if predicate(key)
+            )
+
+    def discard(self, predicate: Callable[[KeyT], bool]) -> None:
+        """Remove all items whose keys match given predicate.
+
+        :param predicate: function returning True for keys to remove
+        """
+        with self._lock:
+            for key in [key for key in self._items if predicate(key)]:
+                self._size -= self._items.pop(key)[1]
+
+    def clear(self) -> None:
+        """Remove all items and reset the statistics."""
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+            self.hits = 0
+            self.misses = 0
+
+    def _evict(self) -> None:
+        while self._size > self._max_size and self._items:
+            _key, (_value, size) = self._items.popitem(last=False)
+            self._size -= size
@@ -0,0 +1,58 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+from bubblesub.api.cmd import BaseCommand
+
+
+class CacheStatsCommand(BaseCommand):
+    names = ["cache-stats"]
+    help_text = (
+        "Logs how much of the frame and view caches is used "
+        "and how effective they are."
+    )
+
+    @property
+    def is_enabled(self) -> bool:
+        return True
+
+    async def run(self) -> None:
+        frame_cache = self.api.video.frame_cache
+        lookups = frame_cache.hits + frame_cache.misses
+        hit_rate = frame_cache.hits / lookups if lookups else 0.0
+        self.api.log.info(
+            f"frame cache: {len(frame_cache)} frames, "
+            f"{frame_cache.size / 1024 / 1024:.1f} MiB "
+            f"of {frame_cache.max_size / 1024 / 1024:.1f} MiB, "
+            f"{frame_cache.hits} hits, {frame_cache.misses} misses "
+            f"({hit_rate:.0%} hit rate)"
+        )
+
+        view_cache = self.api.audio.view_cache
+        spectrogram_size = view_cache.get_usage(
+            lambda key: key[0] == "spectrogram"
+        )
+        video_band_size = view_cache.get_usage(
+            lambda key: key[0] == "video-band"
+        )
+        self.api.log.info(
+            f"view cache: {view_cache.size / 1024 / 1024:.1f} MiB "
+            f"of {view_cache.max_size / 1024 / 1024:.1f} MiB "
+            f"(spectrogram: {spectrogram_size / 1024 / 1024:.1f} MiB, "
+            f"video band: {video_band_size / 1024 / 1024:.1f} MiB)"
+        )
+
+
+COMMANDS = [CacheStatsCommand]
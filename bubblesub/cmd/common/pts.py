@@ -16,12 +16,12 @@
 
 """Presentation timestamp, usable as an argument to commands."""
 
-import bisect
 import enum
 from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any, Optional
 
+import numpy as np
 import parsimonious
 from ass_parser import AssEvent
 
@@ -219,15 +219,15 @@ class _Time:
         """
         current_stream = api.video.current_stream
         if self.unit == _TimeUnit.FRAME:
-            if not current_stream or not current_stream.timecodes:
+            if not current_stream or not current_stream.timecodes.size:
                 raise CommandError("timecode information is not available")
             idx = max(1, min(self.value, len(current_stream.timecodes))) - 1
-            return current_stream.timecodes[idx]
+            return int(current_stream.timecodes[idx])
         if self.unit == _TimeUnit.KEYFRAME:
-            if not current_stream or not current_stream.timecodes:
+            if not current_stream or not current_stream.timecodes.size:
                 raise CommandError("keyframe information is not available")
             idx = max(1, min(self.value, len(current_stream.keyframes))) - 1
-            return current_stream.timecodes[current_stream.keyframes[idx]]
+            return int(current_stream.timecodes[current_stream.keyframes[idx]])
         if self.unit == _TimeUnit.MS:
             return self.value
         raise NotImplementedError(f"unknown unit: {self.unit}")
@@ -244,34 +244,32 @@ def _flatten(items: Any) -> list[Any]:
     return [items]
 
 
-def _bisect(source: list[int], origin: int, delta: int) -> int:
+def _bisect(source: np.ndarray, origin: int, delta: int) -> int:
     if delta >= 0:
         # find leftmost value greater than origin
-        idx = bisect.bisect_right(source, origin)
+        idx = int(np.searchsorted(source, origin, "right"))
         idx += delta - 1
     elif delta < 0:
         # find rightmost value less than origin
-        idx = bisect.bisect_left(source, origin)
+        idx = int(np.searchsorted(source, origin, "left"))
         idx += delta
 
     idx = max(0, min(idx, len(source) - 1))
-    return source[idx]
+    return int(source[idx])
 
 
 def _apply_frame(api: Api, origin: int, delta: int) -> int:
-    if not api.video.current_stream or not api.video.current_stream.timecodes:
+    current_stream = api.video.current_stream
+    if not current_stream or not current_stream.timecodes.size:
         raise CommandError("timecode information is not available")
-    return _bisect(api.video.current_stream.timecodes, origin, delta)
+    return _bisect(current_stream.timecodes, origin, delta)
 
 
 def _apply_keyframe(api: Api, origin: int, delta: int) -> int:
-    if not api.video.current_stream or not api.video.current_stream.keyframes:
+    current_stream = api.video.current_stream
+    if not current_stream or not current_stream.keyframes.size:
         raise CommandError("keyframe information is not available")
-    possible_pts = [
-        api.video.current_stream.timecodes[i]
-        for i in api.video.current_stream.keyframes
-    ]
-    return _bisect(possible_pts, origin, delta)
+    return _bisect(current_stream.keyframe_timecodes, origin, delta)
 
 
 class _PtsNodeVisitor(_AsyncNodeVisitor):
@@ -401,7 +399,7 @@ class _PtsNodeVisitor(_AsyncNodeVisitor):
             return _Time(1, _TimeUnit.FRAME)
         if direction == _Token.LAST:
             current_stream = self._api.video.current_stream
-            if not current_stream or not current_stream.timecodes:
+            if not current_stream or not current_stream.timecodes.size:
                 raise CommandError("timecode information is not available")
             return _Time(len(current_stream.timecodes), _TimeUnit.FRAME)
         if direction == _Token.CURRENT:
@@ -416,7 +414,7 @@ class _PtsNodeVisitor(_AsyncNodeVisitor):
             return _Time(1, _TimeUnit.KEYFRAME)
         if direction == _Token.LAST:
             current_stream = self._api.video.current_stream
-            if not current_stream or not current_stream.keyframes:
+            if not current_stream or not current_stream.keyframes.size:
                 raise CommandError("timecode information is not available")
             return _Time(
                 len(current_stream.keyframes),
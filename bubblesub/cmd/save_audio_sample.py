@@ -32,12 +32,12 @@ class SaveAudioSampleCommand(BaseCommand):
 
     @property
     def is_enabled(self) -> bool:
-        return (
-            self.api.audio.has_current_stream
-            and self.api.audio.current_stream.is_ready
-        )
+        return self.api.audio.has_current_stream
 
     async def run(self) -> None:
+        stream = self.api.audio.current_stream
+        await stream.wait_ready(self.args.timeout)
+
         start = await self.args.start.get(align_to_near_frame=False)
         end = await self.args.end.get(align_to_near_frame=False)
 
@@ -45,12 +45,12 @@ class SaveAudioSampleCommand(BaseCommand):
             file_filter="Waveform Audio File (*.wav)",
             default_file_name=(
                 "audio-"
-                f"{self.api.audio.current_stream.path.name}-"
+                f"{stream.path.name}-"
                 f"{ms_to_str(start)}..{ms_to_str(end)}.wav"
             ),
         )
 
-        self.api.audio.current_stream.save_wav(path, start, end)
+        stream.save_wav(path, start, end)
         self.api.log.info(f"saved audio sample to {path}")
 
     @staticmethod
@@ -76,6 +76,12 @@ class SaveAudioSampleCommand(BaseCommand):
             type=lambda value: FancyPath(api, value),
             default="",
         )
+        parser.add_argument(
+            "--timeout",
+            help="how many seconds to wait for the audio to load",
+            type=float,
+            default=60,
+        )
 
 
 COMMANDS = [SaveAudioSampleCommand]
@@ -32,22 +32,19 @@ class SaveScreenshotCommand(BaseCommand):
 
     @property
     def is_enabled(self) -> bool:
-        return (
-            self.api.video.has_current_stream
-            and self.api.video.current_stream.is_ready
-        )
+        return self.api.video.has_current_stream
 
     async def run(self) -> None:
+        stream = self.api.video.current_stream
+        await stream.wait_ready(self.args.timeout)
+
         pts = await self.args.pts.get()
         path = await self.args.path.get_save_path(
             file_filter="Portable Network Graphics (*.png)",
-            default_file_name=(
-                f"shot-{self.api.video.current_stream.path.name}-"
-                f"{ms_to_str(pts)}.png"
-            ),
+            default_file_name=f"shot-{stream.path.name}-{ms_to_str(pts)}.png",
         )
 
-        self.api.video.current_stream.screenshot(
+        stream.screenshot(
             pts,
             path,
             self.args.include_subs,
@@ -71,6 +68,12 @@ class SaveScreenshotCommand(BaseCommand):
             type=lambda value: FancyPath(api, value),
             default="",
         )
+        parser.add_argument(
+            "--timeout",
+            help="how many seconds to wait for the video to load",
+            type=float,
+            default=60,
+        )
         parser.add_argument(
             "-i",
             "--include-subs",
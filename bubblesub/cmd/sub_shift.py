@@ -16,12 +16,13 @@
 
 import argparse
 
+import numpy as np
 from ass_parser import AssEvent
 from PyQt5.QtWidgets import QMainWindow
 
 from bubblesub.api import Api
 from bubblesub.api.cmd import BaseCommand, CommandCanceled, CommandUnavailable
-from bubblesub.cmd.common import Pts, SubtitlesSelection
+from bubblesub.cmd.common import SubtitlesSelection
 from bubblesub.ui.util import time_jump_dialog
 
 
@@ -44,21 +45,24 @@ class SubtitlesShiftCommand(BaseCommand):
 
         delta = await self._get_delta(subs, main_window)
 
+        starts = np.array([sub.start for sub in subs]) + delta
+        ends = np.array([sub.end for sub in subs]) + delta
+        if not self.args.no_align and self.api.video.has_current_stream:
+            starts = self.api.video.current_stream.align_pts_to_near_frame(
+                starts
+            )
+            ends = self.api.video.current_stream.align_pts_to_near_frame(ends)
+
         with self.api.undo.capture():
-            for sub in subs:
+            for sub, start, end in zip(subs, starts, ends):
                 sub.begin_update()
-                sub.start = await delta.get(
-                    origin=sub.start,
-                    align_to_near_frame=not self.args.no_align,
-                )
-                sub.end = await delta.get(
-                    origin=sub.end, align_to_near_frame=not self.args.no_align
-                )
+                sub.start = int(start)
+                sub.end = int(end)
                 sub.end_update()
 
     async def _get_delta(
         self, subs: list[AssEvent], main_window: QMainWindow
-    ) -> Pts:
+    ) -> int:
         ret = await time_jump_dialog(
             main_window,
             absolute_label="Time to move to:",
@@ -72,7 +76,7 @@ class SubtitlesShiftCommand(BaseCommand):
         if not is_relative and subs:
             delta -= subs[0].start
 
-        return Pts(self.api, f"{delta:+d}ms")
+        return delta
 
     @staticmethod
     def decorate_parser(api: Api, parser: argparse.ArgumentParser) -> None:
@@ -0,0 +1,216 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Spectrogram computation.
+
+This module is imported by spectrogram worker processes, so it must stay
+free of Qt and of the rest of the program.
+"""
+
+import functools
+from collections.abc import Callable
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+DERIVATION_SIZE = 10
+DERIVATION_DISTANCE = 6
+WINDOW_SIZE = 2 << DERIVATION_SIZE
+COLUMN_SIZE = (1 << DERIVATION_SIZE) + 1
+
+# each pyramid level halves the number of columns of the previous one;
+# a column of level N covers 2**N blocks of DERIVATION_DISTANCE samples
+LEVEL_COUNT = 16
+# maximum number of FFT windows pooled into a single coarse column
+POOL_SIZE = 4
+
+# columns hold log magnitudes multiplied by this factor, regardless of the
+# playback volume, which is applied only when the columns are displayed
+LOG_MAGNITUDE_SCALE = 100
+
+
+def split_overlapping_windows(first_samples: np.ndarray) -> list[np.ndarray]:
+    """Group sorted FFT windows into runs of windows that overlap.
+
+    Each run can be then read as a single span of samples.
+
+    :param first_samples: sorted indexes of the first sample of each window
+    :return: list of arrays of window indexes
+    """
+    if not first_samples.size:
+        return []
+    gaps = np.flatnonzero(np.diff(first_samples) >= WINDOW_SIZE) + 1
+    return np.split(np.arange(len(first_samples)), gaps)
+
+
+def get_windows(
+    read_samples: Callable[[int, int], np.ndarray], first_samples: np.ndarray
+) -> np.ndarray:
+    """Read the samples of given FFT windows.
+
+    Windows reaching past the end of the audio are padded with silence.
+
+    :param read_samples:
+        function returning float32 mono samples given the first sample and
+        the sample count
+    :param first_samples: sorted indexes of the first sample of each window
+    :return: 2-D array with one window per row
+    """
+    windows = np.empty((len(first_samples), WINDOW_SIZE), dtype=np.float32)
+    for run in split_overlapping_windows(first_samples):
+        span_start = first_samples[run[0]]
+        span = np.zeros(
+            first_samples[run[-1]] - span_start + WINDOW_SIZE,
+            dtype=np.float32,
+        )
+        samples = read_samples(int(span_start), len(span))
+        span[0 : len(samples)] = samples
+        windows[run] = np.lib.stride_tricks.sliding_window_view(
+            span, WINDOW_SIZE
+        )[first_samples[run] - span_start]
+    return windows
+
+
+def spectrum_to_columns(spectrum: np.ndarray) -> np.ndarray:
+    """Convert FFT results to spectrogram columns.
+
+    :param spectrum: 2-D array with one FFT result per row
+    :return: 2-D uint8 array with one column per row, high frequencies first
+    """
+    scale_factor = 9 / np.sqrt(2 * WINDOW_SIZE)
+    out = np.log10(np.abs(spectrum) * scale_factor + 1)
+    out *= LOG_MAGNITUDE_SCALE
+    out = np.clip(out, 0, 255)
+    out = np.flip(out, axis=1)
+    return out.astype(dtype=np.uint8)
+
+
+def get_level(blocks_per_pixel: float) -> int:
+    """Pick the coarsest pyramid level that still has a column per pixel.
+
+    :param blocks_per_pixel:
+        how many blocks of DERIVATION_DISTANCE samples fall on one pixel
+    :return: pyramid level
+    """
+    if blocks_per_pixel <= 1:
+        return 0
+    return min(int(np.log2(blocks_per_pixel)), LEVEL_COUNT - 1)
+
+
+def get_pool_size(level: int) -> int:
+    """Return how many FFT windows make up a single column of given level.
+
+    :param level: pyramid level
+    :return: number of windows per column
+    """
+    return min(1 << level, POOL_SIZE)
+
+
+def get_level_first_samples(
+    column_indexes: np.ndarray, level: int
+) -> np.ndarray:
+    """Spread the FFT windows of given columns evenly over their spans.
+
+    :param column_indexes: sorted indexes of columns within the level
+    :param level: pyramid level
+    :return:
+        2-D array with indexes of the first sample of each window, one row
+        per column
+    """
+    span = 1 << (DERIVATION_DISTANCE + level)
+    pool_size = get_pool_size(level)
+    offsets = np.arange(pool_size) * (span // pool_size)
+    return (column_indexes[:, np.newaxis] << (DERIVATION_DISTANCE + level)) + (
+        offsets[np.newaxis, :]
+    )
+
+
+def pool_columns(columns: np.ndarray, pool_size: int) -> np.ndarray:
+    """Merge groups of consecutive columns into single columns.
+
+    Max pooling keeps short events visible in zoomed out views.
+
+    :param columns: 2-D array with one column per row
+    :param pool_size: number of columns to merge into one
+    :return: 2-D array with one merged column per row
+    """
+    return columns.reshape(-1, pool_size, columns.shape[1]).max(axis=1)
+
+
+def get_intensity_table(volume: float) -> np.ndarray:
+    """Map spectrogram column values to displayed intensities.
+
+    :param volume: playback volume in percent
+    :return: uint8 array of 256 intensities, one per column value
+    """
+    gain = int(255 * volume / 100) / LOG_MAGNITUDE_SCALE
+    out = np.clip(np.arange(256) * gain, 0, 255)
+    return out.astype(dtype=np.uint8)
+
+
+@functools.lru_cache(maxsize=1)
+def _map_samples(path: str, offset: int, sample_count: int) -> np.ndarray:
+    return np.memmap(
+        path, dtype=np.float32, mode="r", offset=offset, shape=(sample_count,)
+    )
+
+
+@functools.lru_cache(maxsize=1)
+def _attach_shared_memory(name: str) -> SharedMemory:
+    return SharedMemory(name=name)
+
+
+def compute_shared_columns(
+    samples_path: str,
+    samples_offset: int,
+    sample_count: int,
+    first_samples: np.ndarray,
+    result_name: str,
+    result_offset: int,
+) -> int:
+    """Compute spectrogram columns into a shared memory buffer.
+
+    Meant to be run in a worker process.
+
+    :param samples_path: path to the file holding float32 mono samples
+    :param samples_offset: byte offset of the samples within the file
+    :param sample_count: number of samples in the file
+    :param first_samples:
+        2-D array with sorted indexes of the first sample of each window,
+        one row per column; windows of each row are pooled together
+    :param result_name: name of the shared memory block for the columns
+    :param result_offset: byte offset of the columns within the block
+    :return: number of computed columns
+    """
+    samples = _map_samples(samples_path, samples_offset, sample_count)
+    windows = get_windows(
+        lambda start, count: samples[start : start + count],
+        first_samples.ravel(),
+    )
+    columns = pool_columns(
+        spectrum_to_columns(np.fft.rfft(windows, axis=1)),
+        first_samples.shape[1],
+    )
+
+    result = np.ndarray(
+        columns.shape,
+        dtype=np.uint8,
+        buffer=_attach_shared_memory(result_name).buf,
+        offset=result_offset,
+    )
+    result[:] = columns
+    del result
+    return len(columns)
@@ -0,0 +1,88 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.base_stream module."""
+
+import asyncio
+from pathlib import Path
+
+import pytest
+
+from bubblesub.api.base_stream import BaseStream, StreamUnavailable
+
+
+class _DummyStream(BaseStream):
+    @property
+    def path(self) -> Path:
+        """Return stream source path.
+
+        :return: path
+        """
+        return Path("dummy.mkv")
+
+    @property
+    def is_ready(self) -> bool:
+        """Return whether the stream source is loaded.
+
+        :return: whether the stream source is loaded
+        """
+        return self.ready_event.is_set() and not self.is_canceled
+
+    def mark_loaded(self) -> None:
+        """Pretend the stream source finished loading."""
+        self._set_loaded()
+
+
+def test_wait_ready() -> None:
+    """Test waiting for a stream that finishes loading in the meantime."""
+    stream = _DummyStream()
+
+    async def _wait() -> None:
+        asyncio.get_running_loop().call_later(0.01, stream.mark_loaded)
+        await stream.wait_ready(timeout=5)
+
+    asyncio.get_event_loop().run_until_complete(_wait())
+    assert stream.ready_event.is_set()
+
+
+def test_wait_ready_loaded() -> None:
+    """Test waiting for an already loaded stream."""
+    stream = _DummyStream()
+    stream.mark_loaded()
+    asyncio.get_event_loop().run_until_complete(stream.wait_ready(timeout=0))
+
+
+def test_wait_ready_timeout() -> None:
+    """Test that waiting for a stream gives up after the timeout."""
+    stream = _DummyStream()
+    with pytest.raises(StreamUnavailable, match="timed out"):
+        asyncio.get_event_loop().run_until_complete(
+            stream.wait_ready(timeout=0.01)
+        )
+
+    stream.mark_loaded()
+    asyncio.get_event_loop().run_until_complete(stream.wait_ready(timeout=0))
+
+
+def test_wait_ready_canceled() -> None:
+    """Test that waiting for a canceled stream fails right away."""
+    stream = _DummyStream()
+    stream.cancel()
+    with pytest.raises(StreamUnavailable, match="failed to load"):
+        asyncio.get_event_loop().run_until_complete(
+            stream.wait_ready(timeout=5)
+        )
+    assert stream.ready_event.is_set()
@@ -0,0 +1,190 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.decode_executor module."""
+
+import threading
+from collections.abc import Iterator
+
+import pytest
+
+from bubblesub.api.decode_executor import DecodeExecutor, DecodePriority
+
+TIMEOUT = 5
+
+
+class _BlockingDecoder:
+    def __init__(self) -> None:
+        """Initialize self."""
+        self.decoded: list[str] = []
+        self.started = threading.Event()
+        self.unblocked = threading.Event()
+
+    def __call__(self, key: str) -> str:
+        """Decode given key, waiting for the decoder to be unblocked.
+
+        :param key: what to decode
+        :return: decoded data
+        """
+        self.started.set()
+        assert self.unblocked.wait(timeout=TIMEOUT)
+        self.decoded.append(key)
+        return key.upper()
+
+
+@pytest.fixture(name="decoder")
+def fixture_decoder() -> Iterator[_BlockingDecoder]:
+    """Create a decoder that blocks until unblocked by the test.
+
+    :return: decoder
+    """
+    decoder = _BlockingDecoder()
+    yield decoder
+    decoder.unblocked.set()
+
+
+@pytest.fixture(name="executor")
+def fixture_executor(
+    decoder: _BlockingDecoder,
+) -> Iterator[DecodeExecutor[str, str]]:
+    """Create a single threaded executor whose only thread is busy.
+
+    :param decoder: blocking decoder
+    :return: executor
+    """
+    executor: DecodeExecutor[str, str] = DecodeExecutor(decoder, 1)
+    busy = executor.submit("busy")
+    assert decoder.started.wait(timeout=TIMEOUT)
+    yield executor
+    executor.shutdown()
+    decoder.unblocked.set()
+    busy.result(timeout=TIMEOUT)
+
+
+def test_decode(
+    executor: DecodeExecutor[str, str], decoder: _BlockingDecoder
+) -> None:
+    """Test that submitted requests get decoded.
+
+    :param executor: executor to test
+    :param decoder: blocking decoder
+    """
+    future = executor.submit("a")
+    decoder.unblocked.set()
+    assert future.result(timeout=TIMEOUT) == "A"
+
+
+def test_coalescing(
+    executor: DecodeExecutor[str, str], decoder: _BlockingDecoder
+) -> None:
+    """Test that duplicate pending requests are decoded only once.
+
+    :param executor: executor to test
+    :param decoder: blocking decoder
+    """
+    future1 = executor.submit("a")
+    future2 = executor.submit("a", consumer="widget")
+    assert future1 is future2
+    assert executor.pending_count == 1
+    decoder.unblocked.set()
+    assert future1.result(timeout=TIMEOUT) == "A"
+    assert decoder.decoded == ["busy", "a"]
+
+
+def test_priority(
+    executor: DecodeExecutor[str, str], decoder: _BlockingDecoder
+) -> None:
+    """Test that interactive requests are decoded before background ones.
+
+    :param executor: executor to test
+    :param decoder: blocking decoder
+    """
+    background = executor.submit("b", DecodePriority.BACKGROUND)
+    interactive = executor.submit("i", DecodePriority.INTERACTIVE)
+    decoder.unblocked.set()
+    background.result(timeout=TIMEOUT)
+    interactive.result(timeout=TIMEOUT)
+    assert decoder.decoded == ["busy", "i", "b"]
+
+
+def test_priority_raise(
+    executor: DecodeExecutor[str, str], decoder: _BlockingDecoder
+) -> None:
+    """Test that requesting pending data again can make it more urgent.
+
+    :param executor: executor to test
+    :param decoder: blocking decoder
+    """
+    first = executor.submit("b1", DecodePriority.BACKGROUND)
+    second = executor.submit("b2", DecodePriority.BACKGROUND)
+    executor.submit("b2", DecodePriority.INTERACTIVE)
+    decoder.unblocked.set()
+    first.result(timeout=TIMEOUT)
+    second.result(timeout=TIMEOUT)
+    assert decoder.decoded == ["busy", "b2", "b1"]
+
+
+def test_superseding(
+    executor: DecodeExecutor[str, str], decoder: _BlockingDecoder
+) -> None:
+    """Test that a newer request of a consumer cancels its older one.
+
+    :param executor: executor to test
+    :param decoder: blocking decoder
+    """
+    old = executor.submit("a", consumer="widget")
+    new = executor.submit("b", consumer="widget")
+    assert old.cancelled()
+    decoder.unblocked.set()
+    assert new.result(timeout=TIMEOUT) == "B"
+    assert decoder.decoded == ["busy", "b"]
+
+
+def test_superseding_shared_request(
+    executor: DecodeExecutor[str, str], decoder: _BlockingDecoder
+) -> None:
+    """Test that superseding keeps requests someone else still waits for.
+
+    :param executor: executor to test
+    :param decoder: blocking decoder
+    """
+    old = executor.submit("a", consumer="widget1")
+    executor.submit("a", consumer="widget2")
+    executor.submit("b", consumer="widget1")
+    assert not old.cancelled()
+    decoder.unblocked.set()
+    assert old.result(timeout=TIMEOUT) == "A"
+
+
+def test_cancel(executor: DecodeExecutor[str, str]) -> None:
+    """Test dropping the pending request of a consumer.
+
+    :param executor: executor to test
+    """
+    future = executor.submit("a", consumer="widget")
+    executor.cancel("widget")
+    assert future.cancelled()
+    assert executor.pending_count == 0
+
+
+def test_shutdown(executor: DecodeExecutor[str, str]) -> None:
+    """Test that shutting down drops all pending requests.
+
+    :param executor: executor to test
+    """
+    futures = [executor.submit("a"), executor.submit("b", consumer="widget")]
+    executor.shutdown()
+    assert all(future.cancelled() for future in futures)
@@ -0,0 +1,101 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.event_index module."""
+
+import random
+
+import pytest
+from ass_parser import AssEvent
+
+from bubblesub.api.event_index import EventIndex
+
+
+def _brute_force(
+    events: list[AssEvent], start: int, end: int
+) -> list[AssEvent]:
+    return [
+        event
+        for event in events
+        if min(event.start, event.end) <= end
+        and max(event.start, event.end) >= start
+    ]
+
+
+@pytest.mark.parametrize(
+    "start,end,expected",
+    [
+        (0, 0, [0]),
+        (100, 100, [0, 1]),
+        (150, 160, [1]),
+        (250, 300, [3]),
+        (201, 249, [2, 3]),
+        (500, 600, []),
+        (-100, -1, []),
+        (0, 1000, [0, 1, 2, 3]),
+    ],
+)
+def test_query(start: int, end: int, expected: list[int]) -> None:
+    """Test looking up events overlapping given range.
+
+    :param start: start of the range
+    :param end: end of the range
+    :param expected: indexes of expected events
+    """
+    events = [
+        AssEvent(start=0, end=100),
+        AssEvent(start=100, end=200),
+        AssEvent(start=220, end=220),
+        AssEvent(start=400, end=200),
+    ]
+    index = EventIndex()
+    index.reset(events)
+
+    actual = index.query(start, end)
+
+    assert sorted(map(events.index, actual)) == expected
+
+
+def test_incremental_updates() -> None:
+    """Test that adding, removing and moving events matches a full scan."""
+    rng = random.Random(0)
+    events: list[AssEvent] = []
+    index = EventIndex(block_size=4)
+
+    for _ in range(500):
+        roll = rng.random()
+        if roll < 0.4 or not events:
+            new_events = [
+                AssEvent(start=rng.randint(0, 1000), end=rng.randint(0, 1000))
+                for _ in range(rng.randint(1, 3))
+            ]
+            events.extend(new_events)
+            index.add(new_events)
+        elif roll < 0.6:
+            event = events.pop(rng.randrange(len(events)))
+            index.remove([event])
+        else:
+            event = rng.choice(events)
+            event.start = rng.randint(0, 1000)
+            event.end = rng.randint(0, 1000)
+            index.update(event)
+
+        start = rng.randint(-10, 1010)
+        end = start + rng.randint(0, 200)
+        assert len(index) == len(events)
+        assert sorted(map(id, index.query(start, end))) == sorted(
+            map(id, _brute_force(events, start, end))
+        )
@@ -0,0 +1,45 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.pcm_cache module."""
+
+import numpy as np
+import pytest
+
+from bubblesub.api.pcm_cache import samples_to_float
+
+
+@pytest.mark.parametrize(
+    "samples,expected",
+    [
+        (np.array([[0, 128, 255]], dtype=np.uint8), [[-1, 0, 127 / 128]]),
+        (np.array([[-32768, 0, 16384]], dtype=np.int16), [[-1, 0, 0.5]]),
+        (np.array([[-(1 << 31), 0, 1 << 30]], dtype=np.int32), [[-1, 0, 0.5]]),
+        (np.array([[-1, 0, 0.5]], dtype=np.float32), [[-1, 0, 0.5]]),
+        (np.array([[-1, 0, 0.5]], dtype=np.float64), [[-1, 0, 0.5]]),
+    ],
+)
+def test_samples_to_float(
+    samples: np.ndarray, expected: list[list[float]]
+) -> None:
+    """Test converting raw samples to float32 samples.
+
+    :param samples: raw samples
+    :param expected: expected float32 samples
+    """
+    actual = samples_to_float(samples)
+    assert actual.dtype == np.float32
+    np.testing.assert_allclose(actual, expected)
@@ -0,0 +1,90 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.sampler_pool module."""
+
+import threading
+from unittest.mock import Mock
+
+import pytest
+
+from bubblesub.api.sampler_pool import SamplerPool
+
+
+def test_sampler_reuse() -> None:
+    """Test that released samplers are lent again instead of recreated."""
+    factory = Mock(side_effect=object)
+    pool = SamplerPool(factory, size=2)
+    with pool.acquire() as sampler1:
+        pass
+    with pool.acquire() as sampler2:
+        pass
+    assert sampler1 is sampler2
+    assert factory.call_count == 1
+
+
+def test_sampler_first() -> None:
+    """Test that the initial sampler is lent before creating new ones."""
+    first = object()
+    pool = SamplerPool(object, size=2, first=first)
+    with pool.acquire() as sampler1:
+        with pool.acquire() as sampler2:
+            pass
+    assert sampler1 is first
+    assert sampler2 is not first
+
+
+@pytest.mark.parametrize("size", [1, 2, 3])
+def test_sampler_concurrency(size: int) -> None:
+    """Test that no more than given number of samplers are lent at once.
+
+    :param size: pool size
+    """
+    pool = SamplerPool(object, size=size)
+    lock = threading.Lock()
+    barrier = threading.Barrier(size)
+    in_use: set[int] = set()
+    max_in_use = 0
+
+    def _worker() -> None:
+        nonlocal max_in_use
+        with pool.acquire() as sampler:
+            with lock:
+                assert id(sampler) not in in_use
+                in_use.add(id(sampler))
+                max_in_use = max(max_in_use, len(in_use))
+            barrier.wait(timeout=5)
+            with lock:
+                in_use.remove(id(sampler))
+
+    threads = [threading.Thread(target=_worker) for _ in range(size * 3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max_in_use == size
+
+
+def test_sampler_factory_error() -> None:
+    """Test that failing to create a sampler doesn't shrink the pool."""
+    factory = Mock(side_effect=[RuntimeError("failed"), object()])
+    pool = SamplerPool(factory, size=1)
+    with pytest.raises(RuntimeError):
+        with pool.acquire():
+            pass
+    with pool.acquire() as sampler:
+        assert sampler is not None
@@ -0,0 +1,161 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.subs module."""
+
+from unittest.mock import Mock
+
+import pytest
+from ass_parser import AssEvent, AssStyle
+
+from bubblesub.api.subs import SubtitlesApi
+from bubblesub.api.undo import UndoApi
+
+
+@pytest.fixture(name="cfg")
+def fixture_cfg() -> Mock:
+    """Create program configuration for testing purposes.
+
+    :return: program configuration
+    """
+    cfg = Mock()
+    cfg.opt = {"gui": {"spell_check": "en_US"}, "basic": {"max_undo": 0}}
+    return cfg
+
+
+@pytest.fixture(name="subs_api")
+def fixture_subs_api(cfg: Mock) -> SubtitlesApi:
+    """Create subtitles API holding two events.
+
+    :param cfg: program configuration
+    :return: subtitles API
+    """
+    subs_api = SubtitlesApi(cfg)
+    subs_api.unload()
+    subs_api.events.extend(
+        [AssEvent(start=0, end=100), AssEvent(start=100, end=200)]
+    )
+    return subs_api
+
+
+def test_event_change_bumps_revision(subs_api: SubtitlesApi) -> None:
+    """Test that changing an event bumps the events revision only.
+
+    :param subs_api: subtitles API
+    """
+    revision = subs_api.revision
+    events_revision = subs_api.events_revision
+    styles_revision = subs_api.styles_revision
+
+    subs_api.events[0].start = 50
+
+    assert subs_api.events_revision > events_revision
+    assert subs_api.revision > revision
+    assert subs_api.styles_revision == styles_revision
+
+
+def test_style_change_bumps_revision(subs_api: SubtitlesApi) -> None:
+    """Test that adding a style bumps the styles revision only.
+
+    :param subs_api: subtitles API
+    """
+    revision = subs_api.revision
+    events_revision = subs_api.events_revision
+
+    subs_api.styles.append(AssStyle(name="Other"))
+
+    assert subs_api.revision > revision
+    assert subs_api.events_revision == events_revision
+
+
+def test_script_info_change_bumps_revision(subs_api: SubtitlesApi) -> None:
+    """Test that changing the script info bumps its revision.
+
+    :param subs_api: subtitles API
+    """
+    script_info_revision = subs_api.script_info_revision
+    subs_api.script_info["Title"] = "test"
+    assert subs_api.script_info_revision > script_info_revision
+
+
+def test_selection_change_bumps_revision(subs_api: SubtitlesApi) -> None:
+    """Test that only actual selection changes bump the selection revision.
+
+    :param subs_api: subtitles API
+    """
+    revision = subs_api.revision
+    selection_revision = subs_api.selection_revision
+
+    subs_api.selected_indexes = [1]
+    assert subs_api.selection_revision > selection_revision
+    assert subs_api.revision == revision
+
+    selection_revision = subs_api.selection_revision
+    subs_api.selected_indexes = [1]
+    assert subs_api.selection_revision == selection_revision
+
+
+def test_load_bumps_revision(subs_api: SubtitlesApi) -> None:
+    """Test that reloading the file never restores an older revision.
+
+    :param subs_api: subtitles API
+    """
+    revision = subs_api.revision
+    subs_api.unload()
+    assert subs_api.revision > revision
+
+
+def test_undo_tracks_revisions(cfg: Mock) -> None:
+    """Test that the undo stack tells changes apart by revisions.
+
+    :param cfg: program configuration
+    """
+    subs_api = SubtitlesApi(cfg)
+    undo_api = UndoApi(cfg, subs_api)
+    subs_api.unload()
+
+    assert not undo_api.push()
+    assert not undo_api.needs_save
+
+    subs_api.events.append(AssEvent(start=0, end=100))
+    assert undo_api.needs_save
+    assert undo_api.push()
+    assert not undo_api.push()
+
+    undo_api.undo()
+    assert not undo_api.needs_save
+    assert not undo_api.push()
+
+
+def test_events_in_range(subs_api: SubtitlesApi) -> None:
+    """Test that time range lookups follow changes to the events.
+
+    :param subs_api: subtitles API
+    """
+    assert subs_api.events_at(100) == list(subs_api.events)
+    assert subs_api.events_in_range(150, 300) == [subs_api.events[1]]
+
+    subs_api.events[1].start = 150
+    assert subs_api.events_at(100) == [subs_api.events[0]]
+
+    subs_api.events.insert(0, AssEvent(start=120, end=130))
+    assert subs_api.events_in_range(110, 160) == [
+        subs_api.events[0],
+        subs_api.events[2],
+    ]
+
+    del subs_api.events[0]
+    assert subs_api.events_in_range(110, 130) == []
@@ -0,0 +1,118 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.threading module."""
+
+# pylint: disable=protected-access
+
+import threading
+from typing import Any
+from unittest.mock import MagicMock
+
+from bubblesub.api.threading import QueueWorker, ThreadingApi
+from bubblesub.cfg import Config
+
+TIMEOUT = 5
+
+
+class _RecordingWorker(QueueWorker):
+    def __init__(self) -> None:
+        """Initialize self."""
+        super().__init__(MagicMock())
+        self.processed: list[Any] = []
+        self.done = threading.Event()
+
+    def _process_task(self, task: Any) -> None:
+        if task == "done":
+            self.done.set()
+        else:
+            self.processed.append(task)
+
+
+def _run_until_done(worker: _RecordingWorker) -> None:
+    worker.schedule_task("done", priority=float("inf"))
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    try:
+        assert worker.done.wait(timeout=TIMEOUT)
+    finally:
+        worker.stop()
+        thread.join(timeout=TIMEOUT)
+    assert not thread.is_alive()
+
+
+def test_priority_order() -> None:
+    """Test that tasks run by priority, then in submission order."""
+    worker = _RecordingWorker()
+    worker.schedule_task("c", priority=2)
+    worker.schedule_task("a1", priority=0)
+    worker.schedule_task("b", priority=1)
+    worker.schedule_task("a2", priority=0)
+
+    _run_until_done(worker)
+
+    assert worker.processed == ["a1", "a2", "b", "c"]
+
+
+def test_clear_tasks_of_group() -> None:
+    """Test that clearing the tasks of a group leaves other groups alone."""
+    worker = _RecordingWorker()
+    worker.schedule_task("a1", group="a")
+    worker.schedule_task("b1", group="b")
+    worker.schedule_task("a2", priority=1, group="a")
+    worker.schedule_task("b2", priority=1, group="b")
+
+    worker.clear_tasks(lambda group: group == "a")
+
+    assert worker.pending_count == 2
+    _run_until_done(worker)
+    assert worker.processed == ["b1", "b2"]
+
+
+def test_clear_tasks() -> None:
+    """Test that clearing all tasks leaves the queue empty."""
+    worker = _RecordingWorker()
+    worker.schedule_task("a", group="a")
+    worker.schedule_task("b")
+
+    worker.clear_tasks()
+
+    assert worker.pending_count == 0
+
+
+def test_stop_before_run() -> None:
+    """Test that a worker stopped before it started exits right away."""
+    worker = _RecordingWorker()
+    worker.schedule_task("a")
+    worker.stop()
+
+    thread = threading.Thread(target=worker.run)
+    thread.start()
+    thread.join(timeout=TIMEOUT)
+
+    assert not thread.is_alive()
+    assert not worker.processed
+
+
+def test_max_task_threads_follows_config() -> None:
+    """Test that the task thread limit is applied once options change."""
+    cfg = Config()
+    threading_api = ThreadingApi(MagicMock(), cfg)
+
+    cfg.opt["basic"]["max_task_threads"] = 2
+    cfg.opt.changed.emit()
+
+    assert threading_api._task_pool.maxThreadCount() == 2
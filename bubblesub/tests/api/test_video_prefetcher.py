@@ -0,0 +1,38 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.video_prefetcher module."""
+
+from unittest.mock import MagicMock
+
+from bubblesub.api.video_prefetcher import FramePrefetcher
+from bubblesub.cfg import Config
+
+
+def test_prefetch_frames_follows_config() -> None:
+    """Test that the prefetcher reads the option after the config loads."""
+    cfg = Config()
+    cfg.opt["video"]["prefetch_frames"] = 0
+    threading_api = MagicMock()
+    prefetcher = FramePrefetcher(
+        threading_api, MagicMock(), MagicMock(), MagicMock(), MagicMock(), cfg
+    )
+    assert not prefetcher.is_enabled
+
+    cfg.opt["video"]["prefetch_frames"] = 2
+
+    assert prefetcher.is_enabled
+    threading_api.schedule_runnable.assert_called_once()
@@ -18,7 +18,7 @@
 
 from collections.abc import Callable
 from pathlib import Path
-from typing import Union
+from typing import Any, Union
 from unittest.mock import Mock, PropertyMock, patch
 
 import numpy as np
@@ -30,7 +30,7 @@ from bubblesub.api.video import VideoStream
 def _test_align_pts_to_frame(
     origin: int,
     expected: int,
-    align_func: Callable[[VideoStream], Callable[[int], int]],
+    align_func: Callable[[VideoStream], Callable[[Any], Any]],
 ) -> None:
     """Test aligning PTS to frames using a few mocked frames.
 
@@ -41,15 +41,28 @@ def _test_align_pts_to_frame(
     threading_api = Mock()
     log_api = Mock()
     subs_api = Mock()
+    cfg = Mock()
+    frame_cache = Mock()
 
     with patch(
         VideoStream.__module__ + "." + VideoStream.__name__ + ".timecodes",
         new_callable=PropertyMock,
-        return_value=[0, 10, 20],
+        return_value=np.array([0, 10, 20]),
     ):
-        stream = VideoStream(threading_api, log_api, subs_api, Path("dummy"))
+        stream = VideoStream(
+            threading_api,
+            log_api,
+            subs_api,
+            cfg,
+            frame_cache,
+            Path("dummy"),
+        )
         actual = align_func(stream)(origin)
         assert actual == expected
+        assert isinstance(actual, int)
+
+        actual_array = align_func(stream)(np.array([origin, origin]))
+        np.testing.assert_array_equal(actual_array, [expected, expected])
 
 
 @pytest.mark.parametrize(
@@ -189,13 +202,22 @@ def test_frame_idx_from_pts(
     threading_api = Mock()
     log_api = Mock()
     subs_api = Mock()
+    cfg = Mock()
+    frame_cache = Mock()
 
     with patch(
         VideoStream.__module__ + "." + VideoStream.__name__ + ".timecodes",
         new_callable=PropertyMock,
-        return_value=timecodes,
+        return_value=np.array(timecodes, dtype=np.int64),
     ):
-        stream = VideoStream(threading_api, log_api, subs_api, Path("dummy"))
+        stream = VideoStream(
+            threading_api,
+            log_api,
+            subs_api,
+            cfg,
+            frame_cache,
+            Path("dummy"),
+        )
         if isinstance(pts, np.ndarray):
             np.testing.assert_array_equal(
                 stream.frame_idx_from_pts(pts), expected
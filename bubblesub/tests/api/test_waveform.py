@@ -0,0 +1,117 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.api.waveform module."""
+
+import numpy as np
+import pytest
+
+from bubblesub.api.waveform import (
+    BUCKET_SHIFT,
+    LEVEL_COUNT,
+    MAX,
+    MIN,
+    RMS,
+    WaveformSummary,
+    build_levels,
+    get_level,
+    get_pixel_summary,
+    merge_buckets,
+    summarize_samples,
+)
+
+BUCKET_SIZE = 1 << BUCKET_SHIFT
+
+
+def test_summarize_samples() -> None:
+    """Test computing the finest buckets, including a partial one."""
+    samples = np.concatenate(
+        [
+            np.full(BUCKET_SIZE, 0.5, dtype=np.float32),
+            np.array([-1, 1], dtype=np.float32),
+        ]
+    )
+
+    actual = summarize_samples(samples)
+
+    assert actual.shape == (2, 3)
+    np.testing.assert_allclose(actual[0], [0.5, 0.5, 0.5])
+    np.testing.assert_allclose(
+        actual[1], [-1, 1, np.sqrt(2 / BUCKET_SIZE)], rtol=1e-6
+    )
+
+
+def test_merge_buckets() -> None:
+    """Test merging pairs of buckets, including an odd one at the end."""
+    level = np.array(
+        [[-0.5, 0.25, 0.3], [-0.25, 0.5, 0.4], [-1, 1, 1]], dtype=np.float32
+    )
+
+    actual = merge_buckets(level)
+
+    assert actual.shape == (2, 3)
+    np.testing.assert_allclose(actual[0], [-0.5, 0.5, np.sqrt(0.125)])
+    np.testing.assert_allclose(actual[1], [-1, 1, 1])
+
+
+def test_build_levels() -> None:
+    """Test building all summary levels."""
+    levels = build_levels(np.zeros((5000, 3), dtype=np.float32))
+    assert len(levels) == LEVEL_COUNT
+    assert [len(level) for level in levels[:4]] == [5000, 2500, 1250, 625]
+    assert len(levels[-1]) == 3
+
+
+@pytest.mark.parametrize(
+    "samples_per_pixel,expected",
+    [
+        (1, 0),
+        (BUCKET_SIZE, 0),
+        (BUCKET_SIZE * 2, 1),
+        (BUCKET_SIZE * 3, 1),
+        (BUCKET_SIZE * 4, 2),
+        (BUCKET_SIZE << 30, LEVEL_COUNT - 1),
+    ],
+)
+def test_get_level(samples_per_pixel: float, expected: int) -> None:
+    """Test picking the summary level for given zoom.
+
+    :param samples_per_pixel: how many samples fall on one pixel
+    :param expected: expected summary level
+    """
+    assert get_level(samples_per_pixel) == expected
+
+
+def test_get_pixel_summary() -> None:
+    """Test summarizing pixel columns, including ones outside the audio."""
+    level_0 = np.array(
+        [[-0.1, 0.1, 0.1], [-0.2, 0.2, 0.2], [-0.4, 0.3, 0.2], [-1, 1, 1]],
+        dtype=np.float32,
+    )
+    summary = WaveformSummary(levels=build_levels(level_0))
+    first_samples = np.array(
+        [-BUCKET_SIZE, 0, BUCKET_SIZE, BUCKET_SIZE * 3, BUCKET_SIZE * 5],
+        dtype=np.int64,
+    )
+
+    rows, within = get_pixel_summary(summary, first_samples, 0)
+
+    assert within.tolist() == [False, True, True, True]
+    np.testing.assert_allclose(rows[0], [0, 0, 0])
+    np.testing.assert_allclose(rows[1], [-0.1, 0.1, 0.1], rtol=1e-6)
+    np.testing.assert_allclose(rows[2], [-0.4, 0.3, 0.2], rtol=1e-6)
+    np.testing.assert_allclose(rows[3][[MIN, MAX]], [-1, 1])
+    np.testing.assert_allclose(rows[3][RMS], 1)
@@ -20,6 +20,7 @@ import asyncio
 from typing import Any, Optional, Union
 from unittest.mock import Mock
 
+import numpy as np
 import pytest
 
 from bubblesub.api.cmd import CommandError
@@ -278,8 +279,13 @@ def test_frames(
     :param expected_value: expected PTS
     """
     api = Mock()
-    api.video.current_stream.timecodes = frame_times
-    api.video.current_stream.keyframes = keyframe_indexes
+    api.video.current_stream.timecodes = np.array(frame_times, dtype=np.int64)
+    api.video.current_stream.keyframes = np.array(
+        keyframe_indexes, dtype=np.int64
+    )
+    api.video.current_stream.keyframe_timecodes = [
+        frame_times[idx] for idx in keyframe_indexes
+    ]
     if cur_frame_idx is Ellipsis:
         api.playback.current_pts = 0
     else:
@@ -17,7 +17,7 @@
 """Shared utility functions for tests."""
 
 import argparse
-from collections.abc import Iterable
+from collections.abc import Iterable, Iterator
 from pathlib import Path
 
 import pytest
@@ -42,11 +42,13 @@ def collect_source_files(root: Path = APP_ROOT_DIR) -> Iterable[Path]:
 
 
 @pytest.fixture
-def api() -> Api:
+def api() -> Iterator[Api]:
     """Return core API instance for testing purposes.
 
     :return: core API
     """
     args = argparse.Namespace()
     setattr(args, "no_video", True)
-    return Api(args)
+    ret = Api(args)
+    yield ret
+    ret.gui.terminated.emit()
@@ -0,0 +1,134 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.cache module."""
+
+import os
+from pathlib import Path
+
+import pytest
+
+from bubblesub import cache
+from bubblesub.util import sanitize_file_name
+
+
+@pytest.fixture(name="cache_dir")
+def fixture_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Redirect cache files to a temporary directory.
+
+    :param tmp_path: temporary directory
+    :param monkeypatch: pytest monkeypatch fixture
+    :return: path to the cache directory
+    """
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(cache, "get_cache_dir", lambda: cache_dir)
+    return cache_dir
+
+
+def test_source_cache_name_follows_file_changes(tmp_path: Path) -> None:
+    """Test that modifying the source file changes its cache name.
+
+    :param tmp_path: temporary directory
+    """
+    source = tmp_path / "source.mkv"
+    source.write_bytes(b"1")
+    name1 = cache.get_source_cache_name(source, "audio-index")
+    source.write_bytes(b"12")
+    name2 = cache.get_source_cache_name(source, "audio-index")
+    assert name1 != name2
+    assert name1.endswith("-audio-index")
+
+
+def test_prune_source_cache(tmp_path: Path, cache_dir: Path) -> None:
+    """Test that pruning removes only stale cache files of the given kind.
+
+    :param tmp_path: temporary directory
+    :param cache_dir: path to the cache directory
+    """
+    source = tmp_path / "source.mkv"
+    source.write_bytes(b"1")
+    prefix = sanitize_file_name(source)
+
+    stale = cache_dir / f"{prefix}-1-2-audio-index-ffms2.30.ffindex"
+    unrelated = cache_dir / f"{prefix}-1-2-video-index-ffms2.30.ffindex"
+    current = cache.get_cache_file_path(
+        cache.get_source_cache_name(source, "audio-index"), cache.INDEX_SUFFIX
+    )
+    for path in (stale, unrelated, current):
+        path.write_bytes(b"")
+
+    cache.prune_source_cache(source, "audio-index", keep=current)
+
+    assert sorted(os.listdir(cache_dir)) == sorted(
+        [unrelated.name, current.name]
+    )
+
+
+def test_lru_cache_evicts_least_recently_used() -> None:
+    """Test that the LRU cache evicts the oldest items once it's full."""
+    lru_cache: cache.LruCache[str, bytes] = cache.LruCache(4, len)
+    lru_cache.put("a", b"12")
+    lru_cache.put("b", b"12")
+    assert lru_cache.get("a") == b"12"
+    lru_cache.put("c", b"12")
+    assert "a" in lru_cache
+    assert "b" not in lru_cache
+    assert "c" in lru_cache
+    assert lru_cache.size == 4
+
+
+def test_lru_cache_skips_oversized_items() -> None:
+    """Test that items larger than the whole cache are not cached."""
+    lru_cache: cache.LruCache[str, bytes] = cache.LruCache(4, len)
+    lru_cache.put("a", b"12")
+    lru_cache.put("b", b"12345")
+    assert "a" in lru_cache
+    assert "b" not in lru_cache
+    assert lru_cache.size == 2
+
+
+def test_lru_cache_stats() -> None:
+    """Test that the LRU cache counts hits and misses."""
+    lru_cache: cache.LruCache[str, bytes] = cache.LruCache(4, len)
+    lru_cache.put("a", b"1")
+    lru_cache.get("a")
+    lru_cache.get("a")
+    lru_cache.get("b")
+    assert lru_cache.hits == 2
+    assert lru_cache.misses == 1
+
+
+def test_lru_cache_discard() -> None:
+    """Test removing items matching a predicate from the LRU cache."""
+    lru_cache: cache.LruCache[tuple[int, int], bytes] = cache.LruCache(10, len)
+    lru_cache.put((1, 1), b"1")
+    lru_cache.put((1, 2), b"1")
+    lru_cache.put((2, 1), b"1")
+    lru_cache.discard(lambda key: key[0] == 1)
+    assert len(lru_cache) == 1
+    assert (2, 1) in lru_cache
+    assert lru_cache.size == 1
+
+
+def test_lru_cache_get_usage() -> None:
+    """Test measuring the size of LRU cache items matching a predicate."""
+    lru_cache: cache.LruCache[tuple[str, int], bytes] = cache.LruCache(10, len)
+    lru_cache.put(("a", 1), b"12")
+    lru_cache.put(("a", 2), b"123")
+    lru_cache.put(("b", 1), b"1")
+    assert lru_cache.get_usage(lambda key: key[0] == "a") == 5
+    assert lru_cache.get_usage(lambda key: key[0] == "c") == 0
@@ -0,0 +1,190 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.spectrogram module."""
+
+import functools
+from multiprocessing.shared_memory import SharedMemory
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bubblesub.spectrogram import (
+    COLUMN_SIZE,
+    DERIVATION_DISTANCE,
+    LEVEL_COUNT,
+    POOL_SIZE,
+    WINDOW_SIZE,
+    compute_shared_columns,
+    get_intensity_table,
+    get_level,
+    get_level_first_samples,
+    get_windows,
+    pool_columns,
+    spectrum_to_columns,
+    split_overlapping_windows,
+)
+
+
+@pytest.mark.parametrize(
+    "first_samples,expected",
+    [
+        ([], []),
+        ([0], [[0]]),
+        ([0, 64, 128], [[0, 1, 2]]),
+        ([0, WINDOW_SIZE - 1, 2 * WINDOW_SIZE], [[0, 1], [2]]),
+        ([0, WINDOW_SIZE, 2 * WINDOW_SIZE], [[0], [1], [2]]),
+    ],
+)
+def test_split_overlapping_windows(
+    first_samples: list[int], expected: list[list[int]]
+) -> None:
+    """Test grouping FFT windows into runs of overlapping windows.
+
+    :param first_samples: indexes of the first sample of each window
+    :param expected: expected window indexes of each run
+    """
+    actual = split_overlapping_windows(np.array(first_samples, dtype=int))
+    assert [run.tolist() for run in actual] == expected
+
+
+def _slice_samples(samples: np.ndarray, start: int, count: int) -> np.ndarray:
+    return samples[start : start + count]
+
+
+def test_get_windows() -> None:
+    """Test reading FFT windows, including ones past the end of audio."""
+    samples = np.arange(WINDOW_SIZE * 3, dtype=np.float32)
+    read_samples = functools.partial(_slice_samples, samples)
+    first_samples = np.array([0, 64, WINDOW_SIZE * 2 + 64])
+
+    windows = get_windows(read_samples, first_samples)
+
+    assert windows.shape == (3, WINDOW_SIZE)
+    np.testing.assert_array_equal(windows[0], samples[0:WINDOW_SIZE])
+    np.testing.assert_array_equal(windows[1], samples[64 : WINDOW_SIZE + 64])
+    np.testing.assert_array_equal(
+        windows[2][: WINDOW_SIZE - 64], samples[WINDOW_SIZE * 2 + 64 :]
+    )
+    assert not windows[2][WINDOW_SIZE - 64 :].any()
+
+
+def test_compute_shared_columns(tmp_path: Path) -> None:
+    """Test computing spectrogram columns into shared memory.
+
+    :param tmp_path: temporary directory
+    """
+    samples = np.sin(np.arange(WINDOW_SIZE * 4, dtype=np.float32) / 10)
+    samples_path = tmp_path / "samples"
+    samples_path.write_bytes(b"\0" * 16 + samples.tobytes())
+    first_samples = np.array([[0, 100], [WINDOW_SIZE * 2, WINDOW_SIZE * 3]])
+
+    shared_memory = SharedMemory(create=True, size=COLUMN_SIZE * 4)
+    try:
+        count = compute_shared_columns(
+            str(samples_path),
+            16,
+            len(samples),
+            first_samples,
+            shared_memory.name,
+            COLUMN_SIZE,
+        )
+        actual = np.ndarray(
+            (count, COLUMN_SIZE),
+            dtype=np.uint8,
+            buffer=shared_memory.buf,
+            offset=COLUMN_SIZE,
+        ).copy()
+    finally:
+        shared_memory.close()
+        shared_memory.unlink()
+
+    expected = spectrum_to_columns(
+        np.fft.rfft(
+            get_windows(
+                lambda start, count: samples[start : start + count],
+                first_samples.ravel(),
+            ),
+            axis=1,
+        )
+    )
+    expected = np.maximum(expected[0::2], expected[1::2])
+    assert count == 2
+    np.testing.assert_array_equal(actual, expected)
+    assert actual.any()
+
+
+@pytest.mark.parametrize(
+    "blocks_per_pixel,expected",
+    [
+        (0, 0),
+        (0.5, 0),
+        (1, 0),
+        (1.9, 0),
+        (2, 1),
+        (1000, 9),
+        (1e12, LEVEL_COUNT - 1),
+    ],
+)
+def test_get_level(blocks_per_pixel: float, expected: int) -> None:
+    """Test picking the pyramid level matching the zoom.
+
+    :param blocks_per_pixel: how many blocks fall on one pixel
+    :param expected: expected pyramid level
+    """
+    assert get_level(blocks_per_pixel) == expected
+
+
+def test_get_level_first_samples() -> None:
+    """Test spreading FFT windows over the spans of pyramid columns."""
+    np.testing.assert_array_equal(
+        get_level_first_samples(np.array([0, 3]), 0),
+        [[0], [3 << DERIVATION_DISTANCE]],
+    )
+
+    span = 1 << (DERIVATION_DISTANCE + 5)
+    actual = get_level_first_samples(np.array([2, 7]), 5)
+    assert actual.shape == (2, POOL_SIZE)
+    np.testing.assert_array_equal(actual[:, 0], [2 * span, 7 * span])
+    np.testing.assert_array_equal(np.diff(actual, axis=1), span // POOL_SIZE)
+
+
+def test_pool_columns() -> None:
+    """Test that pooling keeps the loudest value of each frequency."""
+    columns = np.array([[1, 5], [4, 2], [0, 0], [3, 3]], dtype=np.uint8)
+    np.testing.assert_array_equal(pool_columns(columns, 2), [[4, 5], [3, 3]])
+    np.testing.assert_array_equal(pool_columns(columns, 1), columns)
+
+
+@pytest.mark.parametrize("volume", [0, 25, 100, 250])
+def test_intensity_table_applies_volume(volume: float) -> None:
+    """Test that volume applied to volume-independent columns matches
+    scaling the log magnitudes directly.
+
+    :param volume: playback volume in percent
+    """
+    spectrum = np.linspace(0, WINDOW_SIZE, 10 * COLUMN_SIZE).reshape(
+        10, COLUMN_SIZE
+    )
+    log_magnitudes = np.log10(spectrum * 9 / np.sqrt(2 * WINDOW_SIZE) + 1)
+    expected = np.clip(log_magnitudes * int(255 * volume / 100), 0, 255)
+
+    actual = get_intensity_table(volume)[spectrum_to_columns(spectrum)]
+    assert actual.dtype == np.uint8
+    np.testing.assert_allclose(
+        np.flip(actual, axis=1), expected, atol=255 * volume / 100 / 100 + 1
+    )
@@ -0,0 +1,119 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.ui.audio.spectrogram_cache module."""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pytest
+
+from bubblesub import cache
+from bubblesub.spectrogram import COLUMN_SIZE
+from bubblesub.ui.audio import spectrogram_cache
+from bubblesub.ui.audio.spectrogram_cache import (
+    TILE_SIZE,
+    SpectrogramTileCache,
+    prune_tiles,
+)
+
+
+@pytest.fixture(name="cache_dir")
+def fixture_cache_dir(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Path:
+    """Redirect cache files to a temporary directory.
+
+    :param tmp_path: temporary directory
+    :param monkeypatch: pytest monkeypatch fixture
+    :return: path to the cache directory
+    """
+    cache_dir = tmp_path / "cache"
+    cache_dir.mkdir()
+    monkeypatch.setattr(cache, "get_cache_dir", lambda: cache_dir)
+    monkeypatch.setattr(spectrogram_cache, "get_cache_dir", lambda: cache_dir)
+    return cache_dir
+
+
+def test_columns_survive_reopening(cache_dir: Path) -> None:
+    """Test that stored columns can be read back by a new cache instance.
+
+    :param cache_dir: path to the cache directory
+    """
+    block_indexes = np.array([0, 5, TILE_SIZE + 1])
+    columns = np.arange(3 * COLUMN_SIZE, dtype=np.uint8).reshape(
+        3, COLUMN_SIZE
+    )
+    tiles = SpectrogramTileCache("test", max_size=1 << 30)
+    tiles.put_columns(0, block_indexes, columns)
+    tiles.close()
+
+    tiles = SpectrogramTileCache("test", max_size=1 << 30)
+    found, actual = tiles.get_columns(
+        0, [0, 1, 5, TILE_SIZE + 1, 10 * TILE_SIZE]
+    )
+    assert found == [0, 5, TILE_SIZE + 1]
+    np.testing.assert_array_equal(actual, columns)
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_levels_are_stored_separately(cache_dir: Path) -> None:
+    """Test that columns of different pyramid levels don't overwrite each
+    other.
+
+    :param cache_dir: path to the cache directory
+    """
+    tiles = SpectrogramTileCache("test", max_size=1 << 30)
+    tiles.put_columns(0, np.array([3]), np.ones((1, COLUMN_SIZE), np.uint8))
+    tiles.put_columns(2, np.array([3]), np.zeros((1, COLUMN_SIZE), np.uint8))
+
+    _found, level_0 = tiles.get_columns(0, [3])
+    _found, level_2 = tiles.get_columns(2, [3])
+    assert level_0.all()
+    assert not level_2.any()
+    assert not tiles.get_columns(1, [3])[0]
+    tiles.close()
+    assert len(list(cache_dir.iterdir())) == 2
+
+
+def test_columns_are_ignored_after_closing(cache_dir: Path) -> None:
+    """Test that a closed cache neither stores nor returns columns.
+
+    :param cache_dir: path to the cache directory
+    """
+    tiles = SpectrogramTileCache("test", max_size=1 << 30)
+    tiles.close()
+    tiles.put_columns(0, np.array([0]), np.ones((1, COLUMN_SIZE), np.uint8))
+    assert not tiles.get_columns(0, [0])[0]
+    assert not list(cache_dir.iterdir())
+
+
+def test_prune_tiles(cache_dir: Path) -> None:
+    """Test that pruning removes the least recently used tiles first.
+
+    :param cache_dir: path to the cache directory
+    """
+    paths = [cache_dir / f"tile-{i}{cache.TILE_SUFFIX}" for i in range(3)]
+    for i, path in enumerate(paths):
+        path.write_bytes(b"x" * 8192)
+        os.utime(path, (i, i))
+    (cache_dir / "other.dat").write_bytes(b"x" * 8192)
+
+    remaining_size = prune_tiles(8192, keep={paths[0]})
+    assert paths[0].exists()
+    assert not paths[1].exists()
+    assert not paths[2].exists()
+    assert remaining_size <= 8192
+    assert (cache_dir / "other.dat").exists()
@@ -0,0 +1,120 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.ui.audio.base module."""
+
+from typing import Any
+from unittest.mock import MagicMock
+
+import numpy as np
+import pytest
+from PyQt5.QtCore import QPoint, QRect
+from PyQt5.QtGui import QPainter, QPixmap, QRegion
+
+from bubblesub.ui.audio.base import (
+    BaseLocalAudioWidget,
+    DirtyReason,
+    RenderScheduler,
+    fill_with_nearest_rows,
+)
+
+
+class _OverlayWidget(BaseLocalAudioWidget):
+    def __init__(self) -> None:
+        """Initialize self."""
+        super().__init__(MagicMock(), MagicMock(), None)
+        self.background_renders = 0
+        self.overlay_rects: list[QRect] = []
+
+    def _get_paint_cache_key(self) -> int:
+        return 0
+
+    def _draw_background(self, painter: QPainter) -> None:
+        self.background_renders += 1
+
+    def _get_overlay_rects(self) -> list[QRect]:
+        return self.overlay_rects
+
+
+@pytest.mark.parametrize(
+    "available,expected",
+    [
+        ([0, 0, 0, 0, 0, 0], [0, 0, 0, 0, 0, 0]),
+        ([1, 1, 1, 1, 1, 1], [1, 2, 3, 4, 5, 6]),
+        ([0, 0, 1, 0, 0, 0], [3, 3, 3, 3, 3, 3]),
+        ([1, 0, 0, 0, 0, 1], [1, 1, 1, 6, 6, 6]),
+        ([0, 1, 0, 1, 0, 0], [2, 2, 2, 4, 4, 4]),
+    ],
+)
+def test_fill_with_nearest_rows(
+    available: list[int], expected: list[int]
+) -> None:
+    """Test replacing unavailable rows with the nearest available ones.
+
+    :param available: which rows are available
+    :param expected: expected first value of each row after filling
+    """
+    rows = np.arange(1, 7)[:, np.newaxis].repeat(3, axis=1)
+    rows[~np.array(available, dtype=bool)] = 0
+    fill_with_nearest_rows(rows, np.array(available, dtype=bool))
+    np.testing.assert_array_equal(rows[:, 0], expected)
+    np.testing.assert_array_equal(rows[:, 2], expected)
+
+
+def test_overlay_reuses_background(qapp: Any) -> None:
+    """Test that moving the overlay doesn't render the background again.
+
+    :param qapp: test QApplication
+    """
+    widget = _OverlayWidget()
+    widget.resize(100, 20)
+    target = QPixmap(100, 20)
+
+    widget.render(target)
+    assert widget.background_renders == 1
+
+    widget.overlay_rects = [QRect(10, 0, 3, 20)]
+    widget.update_overlay()
+    widget.render(target, QPoint(), QRegion(10, 0, 3, 20))
+    assert widget.background_renders == 1
+
+    widget.render(target)
+    assert widget.background_renders == 2
+
+
+def test_render_scheduler_coalesces_reasons(qapp: Any) -> None:
+    """Test that a burst of repaint requests results in a single flush.
+
+    :param qapp: test QApplication
+    """
+    scheduler = RenderScheduler()
+    widget = MagicMock()
+    other_widget = MagicMock()
+
+    scheduler.mark_dirty(widget, DirtyReason.VIEW)
+    scheduler.mark_dirty(widget, DirtyReason.SELECTION)
+    scheduler.mark_dirty(widget, DirtyReason.VIEW)
+    scheduler.mark_dirty(other_widget, DirtyReason.PLAYHEAD)
+    scheduler.flush()
+    scheduler.flush()
+
+    widget.flush_repaint.assert_called_once_with(
+        {DirtyReason.VIEW, DirtyReason.SELECTION}
+    )
+    other_widget.flush_repaint.assert_called_once_with({DirtyReason.PLAYHEAD})
+    assert scheduler.reason_counts[DirtyReason.VIEW] == 2
+    assert scheduler.reason_counts[DirtyReason.SELECTION] == 1
+    assert scheduler.flush_count == 2
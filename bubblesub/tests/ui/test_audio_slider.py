@@ -0,0 +1,98 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.ui.audio.audio_slider module."""
+
+# pylint: disable=protected-access
+
+from typing import Any
+from unittest.mock import MagicMock
+
+from ass_parser import AssEvent, AssEventList
+
+from bubblesub.ui.audio.audio_slider import AudioSlider, SubtitleCoverage
+from bubblesub.ui.audio.base import DirtyReason
+
+
+def test_reset() -> None:
+    """Test counting subtitles per pixel column, clipped to the widget."""
+    events = [
+        AssEvent(start=0, end=400),
+        AssEvent(start=200, end=600),
+        AssEvent(start=900, end=700),
+        AssEvent(start=-500, end=100),
+        AssEvent(start=900, end=2000),
+    ]
+    coverage = SubtitleCoverage()
+
+    coverage.reset(events, width=10, origin=0, size=1000)
+
+    assert coverage.counts.tolist() == [2, 1, 2, 2, 1, 1, 0, 1, 1, 1]
+
+
+def test_incremental_updates() -> None:
+    """Test that updating the counts matches counting from scratch."""
+    events = [AssEvent(start=0, end=400), AssEvent(start=200, end=600)]
+    coverage = SubtitleCoverage()
+    coverage.reset(events, width=10, origin=0, size=1000)
+    revision = coverage.revision
+
+    new_event = AssEvent(start=500, end=1000)
+    events.append(new_event)
+    coverage.add([new_event])
+    events[0].end = 100
+    coverage.update(events[0])
+    coverage.remove([events.pop(1)])
+
+    expected = SubtitleCoverage()
+    expected.reset(events, width=10, origin=0, size=1000)
+    assert coverage.counts.tolist() == expected.counts.tolist()
+    assert coverage.revision > revision
+
+
+def test_update_without_moving() -> None:
+    """Test that changes not affecting the columns keep the revision."""
+    event = AssEvent(start=0, end=400)
+    coverage = SubtitleCoverage()
+    coverage.reset([event], width=10, origin=0, size=1000)
+    revision = coverage.revision
+
+    event.text = "test"
+    event.end = 401
+    coverage.update(event)
+
+    assert coverage.revision == revision
+
+
+def test_repeated_load_subscribes_once(qapp: Any) -> None:
+    """Test that loading the same event list again doesn't stack handlers.
+
+    :param qapp: test QApplication
+    """
+    api = MagicMock()
+    api.subs.events = AssEventList()
+    render_scheduler = MagicMock()
+    slider = AudioSlider(api, MagicMock(), render_scheduler, None)
+    slider._coverage.reset([], width=10, origin=0, size=1000)
+
+    slider._on_subs_load()
+    slider._on_subs_load()
+    api.subs.events.append(AssEvent(start=0, end=1000))
+
+    assert slider._coverage.counts.tolist() == [1] * 10
+    render_scheduler.mark_dirty.assert_called_once_with(
+        slider, DirtyReason.EVENTS
+    )
@@ -0,0 +1,94 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.ui.audio.pixmap_cache module."""
+
+from typing import Any
+
+import numpy as np
+from PyQt5.QtGui import QImage, QPainter
+
+from bubblesub.ui.audio.pixmap_cache import TILE_WIDTH, PixmapTileCache
+
+
+class _Renderer:
+    def __init__(self, complete: bool = True) -> None:
+        self.complete = complete
+        self.rendered: list[float] = []
+
+    def __call__(
+        self, pts_range: np.ndarray, height: int
+    ) -> tuple[QImage, bool]:
+        self.rendered.append(float(pts_range[0]))
+        image = QImage(len(pts_range), height, QImage.Format_RGB32)
+        image.fill(0)
+        return image, self.complete
+
+
+def _draw(
+    tiles: PixmapTileCache,
+    renderer: _Renderer,
+    view_start: int,
+    render_key: Any = None,
+) -> bool:
+    target = QImage(TILE_WIDTH * 2, 10, QImage.Format_RGB32)
+    painter = QPainter(target)
+    try:
+        return tiles.draw(
+            painter, view_start, TILE_WIDTH * 2, render_key, renderer
+        )
+    finally:
+        painter.end()
+
+
+def test_scrolling_renders_only_new_tiles(qapp: Any) -> None:
+    """Test that scrolling reuses tiles rendered so far.
+
+    :param qapp: test QApplication
+    """
+    tiles = PixmapTileCache(1 << 30)
+    renderer = _Renderer()
+
+    assert _draw(tiles, renderer, 0)
+    assert renderer.rendered == [0, TILE_WIDTH]
+
+    renderer.rendered.clear()
+    _draw(tiles, renderer, 10)
+    assert renderer.rendered == [TILE_WIDTH * 2]
+
+    renderer.rendered.clear()
+    _draw(tiles, renderer, 10, render_key="other")
+    assert len(renderer.rendered) == 3
+
+
+def test_incomplete_tiles_are_not_cached(qapp: Any) -> None:
+    """Test that tiles rendered from incomplete data are rendered again.
+
+    :param qapp: test QApplication
+    """
+    tiles = PixmapTileCache(1 << 30)
+    renderer = _Renderer(complete=False)
+
+    assert not _draw(tiles, renderer, 0)
+    assert not _draw(tiles, renderer, 0)
+    assert len(renderer.rendered) == 4
+
+    renderer.complete = True
+    renderer.rendered.clear()
+    _draw(tiles, renderer, 0)
+    tiles.invalidate()
+    _draw(tiles, renderer, 0)
+    assert len(renderer.rendered) == 4
@@ -0,0 +1,51 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Tests for bubblesub.ui.audio.video_preview module."""
+
+# pylint: disable=protected-access
+
+from typing import Any
+from unittest.mock import MagicMock, patch
+
+import numpy as np
+
+from bubblesub.ui.audio.video_preview import BAND_DTYPE, VideoPreview
+
+
+def test_black_frames_complete_tile(qapp: Any) -> None:
+    """Test that decoded black frames are not mistaken for missing ones.
+
+    :param qapp: test QApplication
+    """
+    band = np.zeros(4, dtype=BAND_DTYPE)
+    band["pixels"][0] = 255
+    band["decoded"][:3] = True
+    stream = MagicMock()
+    stream.frame_idx_from_pts.side_effect = lambda pts: pts
+    preview = VideoPreview(MagicMock(), MagicMock(), None)
+
+    with patch.object(preview._worker, "get_band", return_value=band):
+        image, complete = preview._render_video_band_tile(
+            stream, np.array([0, 1, 2]), 1
+        )
+        assert complete
+        assert image.pixelColor(1, 0).black() == 255
+
+        _image, complete = preview._render_video_band_tile(
+            stream, np.array([2, 3]), 1
+        )
+        assert not complete
@@ -14,14 +14,13 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-import bisect
-from typing import TYPE_CHECKING, Any, Literal, Optional, Union
+import functools
+from typing import Optional, Union
 
-import ffms2
 import numpy as np
 from ass_parser import AssEvent
 from ass_tag_parser import ass_to_plaintext
-from PyQt5.QtCore import QEvent, QObject, QPoint, Qt, pyqtSignal
+from PyQt5.QtCore import QEvent, QObject, QPoint, QRect, Qt
 from PyQt5.QtGui import (
     QBrush,
     QCursor,
@@ -30,134 +29,43 @@ from PyQt5.QtGui import (
     QKeyEvent,
     QMouseEvent,
     QPainter,
-    QPaintEvent,
     QPen,
-    QPixmap,
     QPolygonF,
     QResizeEvent,
 )
 from PyQt5.QtWidgets import QApplication, QWidget
-from sortedcontainers import SortedDict
 
 from bubblesub.api import Api
 from bubblesub.api.audio_stream import AudioStream
-from bubblesub.api.threading import QueueWorker
+from bubblesub.api.audio_view import AudioPreviewMode
 from bubblesub.errors import ResourceUnavailable
-from bubblesub.ui.audio.base import SLIDER_SIZE, BaseLocalAudioWidget, DragMode
+from bubblesub.spectrogram import (
+    DERIVATION_DISTANCE,
+    LEVEL_COUNT,
+    get_intensity_table,
+    get_level,
+)
+from bubblesub.ui.audio.base import (
+    SLIDER_SIZE,
+    VIDEO_MARKER_WIDTH,
+    BaseLocalAudioWidget,
+    DirtyReason,
+    DragMode,
+    RenderScheduler,
+    fill_with_nearest_rows,
+)
+from bubblesub.ui.audio.pixmap_cache import PixmapTileCache
+from bubblesub.ui.audio.spectrum_worker import (
+    CHUNK_SIZE,
+    ProcessSpectrumWorker,
+    SpectrumWorker,
+)
+from bubblesub.ui.audio.waveform import WaveformRenderer
 from bubblesub.ui.themes import ThemeManager
 from bubblesub.ui.util import blend_colors
 from bubblesub.util import chunks
 
-try:
-    import pyfftw
-except ImportError:
-    pyfftw = None
-
-
-DERIVATION_SIZE = 10
-DERIVATION_DISTANCE = 6
-CHUNK_SIZE = 50
-
-
-if TYPE_CHECKING:
-    # pylint: disable=unsubscriptable-object
-    SpectrumColumn = np.ndarray[Literal[1], "np.dtype[np.uint8]"]
-else:
-    # prevent runtime TypeError: 'numpy._DTypeMeta' object is not subscriptable
-    SpectrumColumn = Any
-
-
-class SpectrumWorkerSignals(QObject):
-    finished = pyqtSignal()
-
-
-class SpectrumWorker(QueueWorker):
-    def __init__(self, api: Api) -> None:
-        super().__init__(api.log)
-        self.signals = SpectrumWorkerSignals()
-        self._api = api
-
-        self.cache: dict[int, SpectrumColumn] = SortedDict()
-
-        if pyfftw is not None:
-            self._input = pyfftw.empty_aligned(
-                2 << DERIVATION_SIZE, dtype=np.float32
-            )
-            self._output = pyfftw.empty_aligned(
-                (1 << DERIVATION_SIZE) + 1, dtype=np.complex64
-            )
-            self._fftw = pyfftw.FFTW(
-                self._input, self._output, flags=("FFTW_MEASURE",)
-            )
-        else:
-            self._input = np.empty(2 << DERIVATION_SIZE, dtype=np.float32)
-            self._output = np.empty(
-                (1 << DERIVATION_SIZE) + 1, dtype=np.complex64
-            )
-            self._fftw = None
-
-    def _process_task(self, task: Any) -> None:
-        anything_changed = False
-        for block_idx in task:
-            out = self._get_spectrogram_for_block_idx(block_idx)
-            if out is not None:
-                self.cache[block_idx] = out
-                anything_changed = True
-        if anything_changed:
-            self.signals.finished.emit()
-
-    def _get_spectrogram_for_block_idx(
-        self, block_idx: int
-    ) -> Optional[SpectrumColumn]:
-        if self._fftw is None:
-            return None
-
-        try:
-            audio_stream = self._api.audio.current_stream
-            video_stream = self._api.video.current_stream
-
-            first_sample = block_idx << DERIVATION_DISTANCE
-            sample_count = 2 << DERIVATION_SIZE
-
-            if video_stream and video_stream.timecodes:
-                first_sample -= (
-                    video_stream.timecodes[0]
-                    * audio_stream.sample_rate
-                    // 1000
-                )
-            first_sample = max(first_sample, 0)
-
-            samples = audio_stream.get_samples(first_sample, sample_count)
-            samples = np.mean(samples, axis=1)
-            sample_fmt = audio_stream.sample_format
-
-            if sample_fmt == ffms2.FFMS_FMT_S16:
-                samples /= 32768.0
-            elif sample_fmt == ffms2.FFMS_FMT_S32:
-                samples /= 4_294_967_296.0
-            elif sample_fmt not in (ffms2.FFMS_FMT_FLT, ffms2.FFMS_FMT_DBL):
-                raise RuntimeError(f"unknown sample format: {sample_fmt}")
-
-            self._input[0 : len(samples)] = samples
-
-            out = self._fftw()
-
-            scale_factor = 9 / np.sqrt(2 * (2 << DERIVATION_SIZE))
-            out = np.log10(
-                np.sqrt(
-                    np.real(out) * np.real(out) + np.imag(out) * np.imag(out)
-                )
-                * scale_factor
-                + 1
-            )
-
-            out *= int(255 * self._api.playback.volume / 100)
-            out = np.clip(out, 0, 255)
-            out = np.flip(out, axis=0)
-            out = out.astype(dtype=np.uint8)
-            return out
-        except ResourceUnavailable:
-            return None
+PIXMAP_CACHE_SIZE = 64 * 1024 * 1024
 
 
 class SubtitleRect:
@@ -206,17 +114,24 @@ class SubtitleRect:
 
 class AudioPreview(BaseLocalAudioWidget):
     def __init__(
-        self, api: Api, theme_mgr: ThemeManager, parent: QWidget
+        self,
+        api: Api,
+        theme_mgr: ThemeManager,
+        render_scheduler: RenderScheduler,
+        parent: QWidget,
     ) -> None:
-        super().__init__(api, parent)
+        super().__init__(api, render_scheduler, parent)
         self._theme_mgr = theme_mgr
 
         self.setMinimumHeight(int(SLIDER_SIZE * 1.5))
         self._rects: list[SubtitleRect] = []
 
         self._mouse_pos: Optional[QPoint] = None
+        self._intensity_colors: list[int] = []
         self._color_table: list[int] = []
-        self._pixels: np.ndarray = np.zeros([0, 0], dtype=np.uint8)
+        self._spectrogram_tiles = PixmapTileCache(PIXMAP_CACHE_SIZE)
+        self._waveform = WaveformRenderer(PIXMAP_CACHE_SIZE)
+        self._view_generation = 0
 
         self._generate_color_table()
 
@@ -229,19 +144,23 @@ class AudioPreview(BaseLocalAudioWidget):
         api.audio.stream_loaded.connect(self._on_audio_state_change)
         api.audio.stream_unloaded.connect(self._on_audio_state_change)
         api.audio.current_stream_switched.connect(self._on_audio_state_change)
+        api.audio.stream_changed.connect(self._on_audio_stream_change)
+        api.audio.view.mode_changed.connect(self._on_mode_change)
         api.audio.view.view_changed.connect(self._on_audio_view_change)
 
-        api.audio.view.selection_changed.connect(self.repaint_if_needed)
-        api.playback.current_pts_changed.connect(
-            self.repaint, Qt.ConnectionType.DirectConnection
+        api.audio.view.selection_changed.connect(
+            lambda: self.schedule_repaint(DirtyReason.SELECTION)
         )
+        api.playback.current_pts_changed.connect(self._on_playhead_move)
         api.subs.loaded.connect(self._on_subs_load)
         api.playback.volume_changed.connect(self._on_volume_change)
         api.gui.terminated.connect(self.shutdown)
 
-        self._spectrum_worker = SpectrumWorker(self._api)
+        self._spectrum_worker = self._create_spectrum_worker()
         self._api.threading.schedule_runnable(self._spectrum_worker)
-        self._spectrum_worker.signals.finished.connect(self.repaint)
+        self._spectrum_worker.signals.finished.connect(
+            self._on_spectrum_update
+        )
 
         self._show_text_on_spectrogram = api.cfg.opt["audio"][
             "show_text_on_spectrogram"
@@ -249,21 +168,34 @@ class AudioPreview(BaseLocalAudioWidget):
 
     def _on_subs_load(self) -> None:
         self._api.subs.events.changed.subscribe(
-            lambda _event: self.repaint_if_needed()
+            lambda _event: self.schedule_repaint(DirtyReason.EVENTS)
         )
 
     def shutdown(self) -> None:
         self._spectrum_worker.stop()
 
+    def _on_spectrum_update(self) -> None:
+        self.schedule_repaint(DirtyReason.DATA)
+
+    def _create_spectrum_worker(self) -> SpectrumWorker:
+        process_count = self._api.cfg.opt["audio"]["spectrogram_processes"]
+        if process_count > 0:
+            try:
+                return ProcessSpectrumWorker(self._api, process_count)
+            except (OSError, ImportError, NotImplementedError) as ex:
+                self._api.log.warn(
+                    f"cannot start spectrogram worker processes ({ex}), "
+                    "falling back to a single worker thread"
+                )
+        return SpectrumWorker(self._api)
+
     def _get_paint_cache_key(self) -> int:
         with self._api.video.stream_lock:
             return hash(
                 (
                     # subtitle rectangles
-                    tuple(
-                        (event.start, event.end, event.text)
-                        for event in self._api.subs.events
-                    ),
+                    self._api.subs.events_revision,
+                    self._api.subs.selection_revision,
                     # frames, keyframes
                     (
                         self._api.video.current_stream.uid
@@ -276,8 +208,6 @@ class AudioPreview(BaseLocalAudioWidget):
                     # audio selection
                     self._api.audio.view.selection_start,
                     self._api.audio.view.selection_end,
-                    # video position
-                    self._api.playback.current_pts,
                     # volume
                     self._api.playback.volume,
                 )
@@ -295,25 +225,32 @@ class AudioPreview(BaseLocalAudioWidget):
         self._generate_color_table()
 
     def resizeEvent(self, event: QResizeEvent) -> None:
-        height = (1 << DERIVATION_SIZE) + 1
-        self._pixels = np.zeros([height, self.width()], dtype=np.uint8)
         self._schedule_current_audio_view()
 
-    def paintEvent(self, event: QPaintEvent) -> None:
-        painter = QPainter()
-        painter.begin(self)
-
-        try:
-            self._recompute_rects(painter)
+    def _draw_background(self, painter: QPainter) -> None:
+        self._recompute_rects(painter)
+        if self._view.mode == AudioPreviewMode.WAVEFORM:
+            self._draw_waveform(painter)
+        else:
             self._draw_spectrogram(painter)
-            self._draw_subtitle_rects(painter)
-            self._draw_selection(painter)
-            self._draw_frame(painter, bottom_line=False)
-            self._draw_keyframes(painter)
-            self._draw_video_pos(painter)
-            self._draw_mouse(painter)
-        finally:
-            painter.end()
+        self._draw_subtitle_rects(painter)
+        self._draw_selection(painter)
+        self._draw_frame(painter, bottom_line=False)
+        self._draw_keyframes(painter)
+
+    def _draw_overlay(self, painter: QPainter) -> None:
+        self._draw_video_pos(painter)
+        self._draw_mouse(painter)
+
+    def _get_overlay_rects(self) -> list[QRect]:
+        rects = []
+        video_pos_rect = self._get_video_pos_rect()
+        if video_pos_rect:
+            rects.append(video_pos_rect)
+        mouse_x = self._get_mouse_x()
+        if mouse_x is not None:
+            rects.append(QRect(mouse_x - 1, 0, 3, self.height()))
+        return rects
 
     def mousePressEvent(self, event: QMouseEvent) -> None:
         ctrl = event.modifiers() & Qt.KeyboardModifier.ControlModifier
@@ -370,7 +307,7 @@ class AudioPreview(BaseLocalAudioWidget):
         super().mouseMoveEvent(event)
 
     def _generate_color_table(self) -> None:
-        self._color_table = [
+        self._intensity_colors = [
             blend_colors(
                 self.palette().window().color(),
                 self.palette().text().color(),
@@ -378,6 +315,8 @@ class AudioPreview(BaseLocalAudioWidget):
             )
             for i in range(256)
         ]
+        self._waveform.set_palette(self.palette())
+        self._update_color_table()
         self._pens = {
             color: QPen(
                 self._theme_mgr.get_color(color), 1, Qt.PenStyle.SolidLine
@@ -389,9 +328,20 @@ class AudioPreview(BaseLocalAudioWidget):
             for color in self._theme_mgr.current_theme.palette.keys()
         }
 
+    def _update_color_table(self) -> None:
+        # the spectrogram columns don't depend on the volume - it's applied
+        # here so that changing it takes only a repaint
+        self._color_table = [
+            self._intensity_colors[intensity]
+            for intensity in get_intensity_table(
+                float(self._api.playback.volume)
+            )
+        ]
+        self._spectrogram_tiles.invalidate()
+
     def _on_volume_change(self) -> None:
-        self._spectrum_worker.cache.clear()
-        self._schedule_current_audio_view()
+        self._update_color_table()
+        self.schedule_repaint(DirtyReason.DATA)
 
     def _on_audio_view_change(self) -> None:
         self._schedule_current_audio_view()
@@ -404,34 +354,94 @@ class AudioPreview(BaseLocalAudioWidget):
             delay = 0
             sample_rate = 0
 
-        self.repaint_if_needed()
-        self._spectrum_worker.clear_tasks()
+        self.schedule_repaint(DirtyReason.VIEW)
+        # columns don't depend on the view, so only the pending tasks of
+        # superseded views are dropped, but not the running ones
+        self._view_generation += 1
+        generation = self._view_generation
+        self._spectrum_worker.clear_tasks(lambda group: group != generation)
 
-        min_pts = self.pts_from_x(0)
-        max_pts = self.pts_from_x(self.width() * 2 - 1)
-        min_pts -= delay
-        max_pts -= delay
+        if self._view.mode == AudioPreviewMode.WAVEFORM:
+            try:
+                self._api.audio.current_stream.build_waveform_summary()
+            except ResourceUnavailable:
+                pass
+            return
 
-        pts_range = np.linspace(min_pts, max_pts, self.width())
-        block_idx_range = np.round(pts_range * sample_rate / 1000.0).astype(
-            dtype=np.int32
-        ) // (2**DERIVATION_DISTANCE)
+        level = self._get_spectrogram_level(sample_rate)
+        pts_range = np.linspace(
+            self.pts_from_x(0),
+            self.pts_from_x(self.width() * 2 - 1),
+            self.width(),
+        )
+        block_idx_range = np.unique(
+            self._get_block_indexes(level, delay, sample_rate, pts_range)
+        )
 
-        blocks_to_update = [
-            block_idx
-            for block_idx in block_idx_range
-            if block_idx not in self._spectrum_worker.cache
+        _columns, computed = self._spectrum_worker.get_columns(
+            level, block_idx_range
+        )
+        missing_blocks = [
+            int(block_idx) for block_idx in block_idx_range[~computed]
         ]
+        blocks_to_update = self._spectrum_worker.load_cached_columns(
+            level, missing_blocks
+        )
+        if len(blocks_to_update) != len(missing_blocks):
+            self.schedule_repaint(DirtyReason.DATA)
+
+        # fill in the area the user is looking at first
+        focus_block_idx = int(
+            self._get_block_indexes(
+                level, delay, sample_rate, np.array([self._get_focus_pts()])
+            )[0]
+        )
+        blocks_to_update.sort(
+            key=lambda block_idx: abs(block_idx - focus_block_idx)
+        )
         for chunk in chunks(blocks_to_update, size=CHUNK_SIZE):
-            self._spectrum_worker.schedule_task(reversed(chunk))
+            self._spectrum_worker.schedule_task(
+                (level, chunk),
+                priority=abs(chunk[0] - focus_block_idx),
+                group=generation,
+            )
+
+    def _get_focus_pts(self) -> float:
+        current_pts = self._api.playback.current_pts
+        if self._view.view_start <= current_pts <= self._view.view_end:
+            return current_pts
+        return self._view.view_start + self._view.view_size / 2
+
+    def _get_spectrogram_level(self, sample_rate: int) -> int:
+        # pick the level so that zoomed out views never compute columns
+        # that would end up sharing a pixel
+        samples_per_pixel = (
+            self._view.view_size * sample_rate / 1000.0 / max(self.width(), 1)
+        )
+        return get_level(samples_per_pixel / (1 << DERIVATION_DISTANCE))
+
+    def _get_block_indexes(
+        self, level: int, delay: int, sample_rate: int, pts_range: np.ndarray
+    ) -> np.ndarray:
+        samples = np.round((pts_range - delay) * sample_rate / 1000.0)
+        return samples.astype(dtype=np.int64) >> (DERIVATION_DISTANCE + level)
 
     def _on_audio_state_change(self, stream: AudioStream) -> None:
-        self._spectrum_worker.cache.clear()
+        self._spectrum_worker.clear_tasks()
+        self._spectrum_worker.clear_cache()
+        self._spectrogram_tiles.invalidate()
+        self._waveform.invalidate()
+        self._schedule_current_audio_view()
+
+    def _on_audio_stream_change(self, stream: AudioStream) -> None:
+        # the waveform summary got built or the delay changed
+        self.schedule_repaint(DirtyReason.DATA)
+
+    def _on_mode_change(self) -> None:
+        self.schedule_repaint(DirtyReason.DATA)
         self._schedule_current_audio_view()
 
     def _draw_spectrogram(self, painter: QPainter) -> None:
-        pixels = self._pixels.transpose()
-        zero_column = np.zeros([pixels.shape[1]], dtype=np.uint8)
         try:
             delay = self._api.audio.current_stream.delay
             sample_rate = self._api.audio.current_stream.sample_rate
@@ -439,59 +449,92 @@ class AudioPreview(BaseLocalAudioWidget):
             delay = 0
             sample_rate = 0
 
-        cached_blocks = (
-            list(self._spectrum_worker.cache.keys())
-            if self._spectrum_worker
-            else []
+        level = self._get_spectrogram_level(sample_rate)
+        complete = self._spectrogram_tiles.draw(
+            painter,
+            self._view.view_start,
+            self._view.view_size,
+            (delay, sample_rate),
+            functools.partial(
+                self._render_spectrogram_tile, level, delay, sample_rate
+            ),
         )
+        if complete and sample_rate > 0:
+            self._api.open_pipeline.mark_spectrogram_ready()
 
-        min_pts = self.pts_from_x(0)
-        max_pts = self.pts_from_x(self.width() - 1)
-        min_pts -= delay
-        max_pts -= delay
-
-        pts_range = np.linspace(min_pts, max_pts, self.width())
-        block_idx_range = np.round(pts_range * sample_rate / 1000.0).astype(
-            dtype=np.int32
-        ) // (2**DERIVATION_DISTANCE)
-
-        for x, block_idx in enumerate(block_idx_range):
-            column = zero_column
-
-            column = self._spectrum_worker.cache.get(block_idx, zero_column)
-
-            if cached_blocks and column is zero_column:
-                tmp = bisect.bisect_left(cached_blocks, block_idx)
-                if tmp == len(cached_blocks):
-                    tmp -= 1
-                nearest_block_idx = cached_blocks[tmp]
-                column = self._spectrum_worker.cache[nearest_block_idx]
+    def _render_spectrogram_tile(
+        self,
+        level: int,
+        delay: int,
+        sample_rate: int,
+        pts_range: np.ndarray,
+        height: int,
+    ) -> tuple[QImage, bool]:
+        block_idx_range = self._get_block_indexes(
+            level, delay, sample_rate, pts_range
+        )
+        columns, computed = self._spectrum_worker.get_columns(
+            level, block_idx_range
+        )
+        complete = sample_rate > 0 and bool(computed.all())
+
+        # until the columns are computed, show coarser ones covering them
+        available = computed.copy()
+        for coarser_level in range(level + 1, LEVEL_COUNT):
+            if available.all():
+                break
+            coarser_columns, coarser_computed = (
+                self._spectrum_worker.get_columns(
+                    coarser_level,
+                    block_idx_range >> (coarser_level - level),
+                )
+            )
+            fill = coarser_computed & ~available
+            columns[fill] = coarser_columns[fill]
+            available |= fill
 
-            pixels[x] = column
+        fill_with_nearest_rows(columns, available)
+        pixels = np.ascontiguousarray(columns.transpose())
 
         image = QImage(
-            self._pixels.data,
-            self._pixels.shape[1],
-            self._pixels.shape[0],
-            self._pixels.strides[0],  # pylint: disable=unsubscriptable-object
+            pixels.data,
+            pixels.shape[1],
+            pixels.shape[0],
+            pixels.strides[0],
             QImage.Format_Indexed8,
         )
         image.setColorTable(self._color_table)
-        painter.save()
-        painter.scale(1, painter.viewport().height() / (pixels.shape[1] - 1))
-        painter.drawPixmap(0, 0, QPixmap.fromImage(image))
-        painter.restore()
+        # scaling makes a copy that doesn't refer to the pixels anymore
+        return image.scaled(pixels.shape[1], height), complete
+
+    def _draw_waveform(self, painter: QPainter) -> None:
+        try:
+            audio_stream = self._api.audio.current_stream
+            sample_offset = self._spectrum_worker.get_sample_offset(
+                audio_stream
+            )
+        except ResourceUnavailable:
+            return
+
+        complete = self._waveform.draw(
+            painter,
+            self._view.view_start,
+            self._view.view_size,
+            audio_stream,
+            sample_offset,
+            float(self._api.playback.volume),
+        )
+        if complete:
+            self._api.open_pipeline.mark_spectrogram_ready()
 
     def _draw_keyframes(self, painter: QPainter) -> None:
         h = painter.viewport().height()
         painter.setPen(self._pens["spectrogram/keyframe"])
         try:
-            keyframes = self._api.video.current_stream.keyframes
-            timecodes = self._api.video.current_stream.timecodes
+            timecodes = self._api.video.current_stream.keyframe_timecodes
         except ResourceUnavailable:
             return
-        for keyframe in keyframes:
-            timecode = timecodes[keyframe]
+        for timecode in timecodes:
             x = round(self.pts_to_x(timecode))
             painter.drawLine(x, 0, x, h)
 
@@ -499,7 +542,9 @@ class AudioPreview(BaseLocalAudioWidget):
         self._rects[:] = []
 
         h = painter.viewport().height()
-        for i, event in enumerate(self._api.subs.events):
+        for event in self._api.subs.events_in_range(
+            self.pts_from_x(-1), self.pts_from_x(self.width() + 1)
+        ):
             x1 = round(self.pts_to_x(event.start))
             x2 = round(self.pts_to_x(event.end))
             if x1 > x2:
@@ -507,7 +552,7 @@ class AudioPreview(BaseLocalAudioWidget):
             if x2 < 0 or x1 >= self.width():
                 continue
 
-            is_selected = i in self._api.subs.selected_indexes
+            is_selected = event.index in self._api.subs.selected_indexes
             self._rects.append(
                 SubtitleRect(
                     painter, x1, 0, x2, h, event=event, is_selected=is_selected
@@ -581,7 +626,7 @@ class AudioPreview(BaseLocalAudioWidget):
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(self._brushes["spectrogram/video-marker"])
 
-        width = 7
+        width = VIDEO_MARKER_WIDTH
         polygon = QPolygonF()
         for x, y in [
             (x - width // 2, 0),
@@ -596,15 +641,20 @@ class AudioPreview(BaseLocalAudioWidget):
 
         painter.drawPolygon(polygon)
 
-    def _draw_mouse(self, painter: QPainter) -> None:
+    def _get_mouse_x(self) -> Optional[int]:
         if not self._mouse_pos:
-            return
+            return None
         pts = self.pts_from_x(self._mouse_pos.x())
         try:
             pts = self._api.video.current_stream.align_pts_to_near_frame(pts)
         except ResourceUnavailable:
             pass
-        x = round(self.pts_to_x(pts))
+        return round(self.pts_to_x(pts))
+
+    def _draw_mouse(self, painter: QPainter) -> None:
+        x = self._get_mouse_x()
+        if x is None:
+            return
 
         painter.setPen(self._pens["spectrogram/mouse-marker"])
         painter.setBrush(Qt.BrushStyle.NoBrush)
@@ -614,30 +664,8 @@ class AudioPreview(BaseLocalAudioWidget):
         self, event: Union[QKeyEvent, QMouseEvent, None]
     ) -> None:
         pos = self.mapFromGlobal(QCursor().pos())
-
-        if self._mouse_pos:
-            pts = self.pts_from_x(self._mouse_pos.x())
-            try:
-                pts = self._api.video.current_stream.align_pts_to_near_frame(
-                    pts
-                )
-            except ResourceUnavailable:
-                pass
-            x = int(self.pts_to_x(pts))
-            self.update(x, 0, x, self.height())
-
         self._mouse_pos = pos if self.geometry().contains(pos) else None
-
-        if self._mouse_pos:
-            pts = self.pts_from_x(self._mouse_pos.x())
-            try:
-                pts = self._api.video.current_stream.align_pts_to_near_frame(
-                    pts
-                )
-            except ResourceUnavailable:
-                pass
-            x = int(self.pts_to_x(pts))
-            self.update(x, 0, x, self.height())
+        self.schedule_repaint(DirtyReason.MOUSE)
 
         if self._drag_mode or not event:
             return
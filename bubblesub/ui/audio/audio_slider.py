@@ -14,67 +14,225 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QBrush, QMouseEvent, QPainter, QPaintEvent, QPen
+from collections.abc import Iterable
+from typing import Any, Optional
+
+import numpy as np
+from ass_parser import (
+    AssEvent,
+    AssEventList,
+    ObservableSequenceItemInsertionEvent,
+    ObservableSequenceItemModificationEvent,
+    ObservableSequenceItemRemovalEvent,
+)
+from PyQt5.QtCore import QRect, Qt
+from PyQt5.QtGui import QBrush, QImage, QMouseEvent, QPainter, QPen
 from PyQt5.QtWidgets import QWidget
 
 from bubblesub.api import Api
 from bubblesub.ui.audio.base import (
     SLIDER_SIZE,
     BaseGlobalAudioWidget,
+    DirtyReason,
     DragMode,
+    RenderScheduler,
 )
 from bubblesub.ui.themes import ThemeManager
 
+SUBTITLE_ALPHA = 40
+
+
+class SubtitleCoverage:
+    """Number of subtitles covering each pixel column of the slider.
+
+    The counts are updated event by event as subtitles change, so keeping
+    them current and drawing them doesn't depend on the number of
+    subtitles in the file.
+    """
+
+    def __init__(self) -> None:
+        """Initialize self."""
+        self.counts = np.zeros(0, dtype=np.int32)
+        self.revision = 0
+        self._width = 0
+        self._origin = 0
+        self._size = 1
+        self._spans: dict[int, tuple[int, int]] = {}
+
+    @property
+    def geometry(self) -> tuple[int, int, int]:
+        """Return pixel width and time range the counts were computed for.
+
+        :return: width, first pts and pts range size
+        """
+        return (self._width, self._origin, self._size)
+
+    def reset(
+        self, events: Iterable[AssEvent], width: int, origin: int, size: int
+    ) -> None:
+        """Recompute the counts from scratch.
+
+        :param events: events to count
+        :param width: number of pixel columns
+        :param origin: pts of the first column
+        :param size: pts range covered by all columns
+        """
+        self._width = width
+        self._origin = origin
+        self._size = max(1, size)
+        self._spans = {id(event): self._get_span(event) for event in events}
+        self._rebuild()
+
+    def add(self, events: Iterable[AssEvent]) -> None:
+        """Count given events in.
+
+        :param events: events to add
+        """
+        events = list(events)
+        self.remove(events)
+        if len(events) > len(self._spans):
+            for event in events:
+                self._spans[id(event)] = self._get_span(event)
+            self._rebuild()
+            return
+        for event in events:
+            span = self._get_span(event)
+            self._spans[id(event)] = span
+            self._apply(span, 1)
+
+    def remove(self, events: Iterable[AssEvent]) -> None:
+        """Count given events out.
+
+        :param events: events to remove
+        """
+        for event in events:
+            span = self._spans.pop(id(event), None)
+            if span is not None:
+                self._apply(span, -1)
+
+    def update(self, event: AssEvent) -> None:
+        """Move given event after its times changed.
+
+        :param event: changed event
+        """
+        old_span = self._spans.get(id(event))
+        if old_span is None:
+            return
+        new_span = self._get_span(event)
+        if new_span == old_span:
+            return
+        self._spans[id(event)] = new_span
+        self._apply(old_span, -1)
+        self._apply(new_span, 1)
+
+    def _get_span(self, event: AssEvent) -> tuple[int, int]:
+        scale = self._width / self._size
+        x1, x2 = sorted(
+            (
+                round((event.start - self._origin) * scale),
+                round((event.end - self._origin) * scale),
+            )
+        )
+        return (
+            min(max(x1, 0), self._width),
+            min(max(x2, 0), self._width),
+        )
+
+    def _apply(self, span: tuple[int, int], delta: int) -> None:
+        if span[0] < span[1]:
+            self.counts[span[0] : span[1]] += delta
+            self.revision += 1
+
+    def _rebuild(self) -> None:
+        diff = np.zeros(self._width + 1, dtype=np.int32)
+        if self._spans:
+            spans = np.array(list(self._spans.values()), dtype=np.int64)
+            np.add.at(diff, spans[:, 0], 1)
+            np.add.at(diff, spans[:, 1], -1)
+        self.counts = np.cumsum(diff[:-1], dtype=np.int32)
+        self.revision += 1
+
 
 class AudioSlider(BaseGlobalAudioWidget):
     def __init__(
-        self, api: Api, theme_mgr: ThemeManager, parent: QWidget
+        self,
+        api: Api,
+        theme_mgr: ThemeManager,
+        render_scheduler: RenderScheduler,
+        parent: Optional[QWidget],
     ) -> None:
-        super().__init__(api, parent)
+        super().__init__(api, render_scheduler, parent)
         self._theme_mgr = theme_mgr
+        self._coverage = SubtitleCoverage()
+        self._coverage_image: Optional[QImage] = None
+        self._coverage_image_key: Optional[tuple[int, int]] = None
+        self._observed_events: Optional[AssEventList] = None
 
         self.setFixedHeight(SLIDER_SIZE)
 
-        api.audio.view.selection_changed.connect(self.repaint_if_needed)
-        api.audio.view.view_changed.connect(self.repaint_if_needed)
-        api.playback.current_pts_changed.connect(
-            self.repaint, Qt.ConnectionType.DirectConnection
+        api.audio.view.selection_changed.connect(
+            lambda: self.schedule_repaint(DirtyReason.SELECTION)
         )
+        api.audio.view.view_changed.connect(
+            lambda: self.schedule_repaint(DirtyReason.VIEW)
+        )
+        api.playback.current_pts_changed.connect(self._on_playhead_move)
         api.subs.loaded.connect(self._on_subs_load)
 
     def _on_subs_load(self) -> None:
-        self._api.subs.events.changed.subscribe(
-            lambda _event: self.repaint_if_needed()
-        )
+        events = self._api.subs.events
+        self._coverage.reset(events, *self._coverage.geometry)
+
+        # every load brings a new event list; subscribe to each one once
+        if events is self._observed_events:
+            return
+        self._observed_events = events
+        events.items_inserted.subscribe(self._on_items_inserted)
+        events.items_removed.subscribe(self._on_items_removed)
+        events.items_modified.subscribe(self._on_item_modified)
+        events.changed.subscribe(self._on_events_change)
+
+    def _on_items_inserted(
+        self, event: ObservableSequenceItemInsertionEvent
+    ) -> None:
+        self._coverage.add(event.items)
+
+    def _on_items_removed(
+        self, event: ObservableSequenceItemRemovalEvent
+    ) -> None:
+        self._coverage.remove(event.items)
+
+    def _on_item_modified(
+        self, event: ObservableSequenceItemModificationEvent
+    ) -> None:
+        self._coverage.update(event.item)
+
+    def _on_events_change(self, _event: Any) -> None:
+        self.schedule_repaint(DirtyReason.EVENTS)
 
     def _get_paint_cache_key(self) -> int:
         with self._api.video.stream_lock:
             return hash(
                 (
                     # subtitle rectangles
-                    tuple(
-                        (event.start, event.end)
-                        for event in self._api.subs.events
-                    ),
+                    self._api.subs.events_revision,
                     # audio view
                     self._api.audio.view.view_start,
                     self._api.audio.view.view_end,
-                    # video position
-                    self._api.playback.current_pts,
                 )
             )
 
-    def paintEvent(self, event: QPaintEvent) -> None:
-        painter = QPainter()
-        painter.begin(self)
-        try:
-            self._draw_subtitle_rects(painter)
-            self._draw_slider(painter)
-            self._draw_video_pos(painter)
-            self._draw_frame(painter, bottom_line=True)
-        finally:
-            painter.end()
+    def _draw_background(self, painter: QPainter) -> None:
+        self._draw_subtitle_rects(painter)
+        self._draw_slider(painter)
+        self._draw_frame(painter, bottom_line=True)
+
+    def _draw_overlay(self, painter: QPainter) -> None:
+        self._draw_video_pos(painter)
+
+    def _get_overlay_rects(self) -> list[QRect]:
+        rect = self._get_video_pos_rect()
+        return [rect] if rect else []
 
     def mousePressEvent(self, event: QMouseEvent) -> None:
         if event.button() == Qt.MouseButton.LeftButton:
@@ -98,15 +256,32 @@ class AudioSlider(BaseGlobalAudioWidget):
         painter.drawLine(x, 0, x, self.height())
 
     def _draw_subtitle_rects(self, painter: QPainter) -> None:
-        h = self.height()
-        painter.setPen(Qt.PenStyle.NoPen)
+        geometry = (self.width(), self._view.min, max(1, self._view.size))
+        if self._coverage.geometry != geometry:
+            self._coverage.reset(self._api.subs.events, *geometry)
+
         color = self.palette().highlight().color()
-        color.setAlpha(40)
-        painter.setBrush(QBrush(color))
-        for line in self._api.subs.events:
-            x1 = round(self.pts_to_x(line.start))
-            x2 = round(self.pts_to_x(line.end))
-            painter.drawRect(x1, 0, x2 - x1, h - 1)
+        key = (self._coverage.revision, color.rgb())
+        if self._coverage_image is None or self._coverage_image_key != key:
+            self._coverage_image = self._render_coverage_image(color.rgb())
+            self._coverage_image_key = key
+
+        painter.drawImage(
+            QRect(0, 0, self.width(), self.height() - 1),
+            self._coverage_image,
+        )
+
+    def _render_coverage_image(self, rgb: int) -> QImage:
+        # each subtitle used to be drawn as a translucent rectangle, so
+        # compose the opacity of as many layers as there are subtitles
+        opacity = 1 - (1 - SUBTITLE_ALPHA / 255) ** self._coverage.counts
+        alpha = np.round(opacity * 255).astype(np.uint32)
+        pixels = ((alpha << 24) | (rgb & 0xFFFFFF)).tobytes()
+        image = QImage(
+            pixels, len(alpha), 1, len(pixels), QImage.Format_ARGB32
+        )
+        # copying detaches the image from the pixels
+        return image.copy()
 
     def _draw_slider(self, painter: QPainter) -> None:
         h = self.height()
@@ -14,39 +14,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
-from PyQt5.QtCore import QPoint, Qt
-from PyQt5.QtGui import (
-    QFont,
-    QMouseEvent,
-    QPainter,
-    QPaintEvent,
-    QPen,
-    QPolygonF,
-)
+from PyQt5.QtCore import QPoint, QRect, Qt
+from PyQt5.QtGui import QFont, QMouseEvent, QPainter, QPen, QPolygonF
 from PyQt5.QtWidgets import QWidget
 
 from bubblesub.api import Api
 from bubblesub.errors import ResourceUnavailable
-from bubblesub.ui.audio.base import SLIDER_SIZE, BaseLocalAudioWidget, DragMode
+from bubblesub.ui.audio.base import (
+    SLIDER_SIZE,
+    VIDEO_MARKER_WIDTH,
+    BaseLocalAudioWidget,
+    DirtyReason,
+    DragMode,
+    RenderScheduler,
+)
 from bubblesub.ui.themes import ThemeManager
 
 
 class AudioTimeline(BaseLocalAudioWidget):
     def __init__(
-        self, api: Api, theme_mgr: ThemeManager, parent: QWidget
+        self,
+        api: Api,
+        theme_mgr: ThemeManager,
+        render_scheduler: RenderScheduler,
+        parent: QWidget,
     ) -> None:
-        super().__init__(api, parent)
+        super().__init__(api, render_scheduler, parent)
         self._theme_mgr = theme_mgr
         self.setFixedHeight(SLIDER_SIZE)
 
-        api.audio.stream_loaded.connect(self.repaint_if_needed)
-        api.audio.stream_unloaded.connect(self.repaint_if_needed)
-        api.audio.current_stream_switched.connect(self.repaint_if_needed)
+        api.audio.stream_loaded.connect(self._on_stream_change)
+        api.audio.stream_unloaded.connect(self._on_stream_change)
+        api.audio.current_stream_switched.connect(self._on_stream_change)
 
-        api.audio.view.view_changed.connect(self.repaint_if_needed)
-        api.playback.current_pts_changed.connect(
-            self.repaint, Qt.ConnectionType.DirectConnection
+        api.audio.view.view_changed.connect(
+            lambda: self.schedule_repaint(DirtyReason.VIEW)
         )
+        api.playback.current_pts_changed.connect(self._on_playhead_move)
 
     def _get_paint_cache_key(self) -> int:
         with self._api.video.stream_lock:
@@ -61,21 +65,20 @@ class AudioTimeline(BaseLocalAudioWidget):
                     # audio view
                     self._api.audio.view.view_start,
                     self._api.audio.view.view_end,
-                    # video position
-                    self._api.playback.current_pts,
                 )
             )
 
-    def paintEvent(self, event: QPaintEvent) -> None:
-        painter = QPainter()
-        painter.begin(self)
-        try:
-            self._draw_scale(painter)
-            self._draw_frame(painter, bottom_line=False)
-            self._draw_keyframes(painter)
-            self._draw_video_pos(painter)
-        finally:
-            painter.end()
+    def _draw_background(self, painter: QPainter) -> None:
+        self._draw_scale(painter)
+        self._draw_frame(painter, bottom_line=False)
+        self._draw_keyframes(painter)
+
+    def _draw_overlay(self, painter: QPainter) -> None:
+        self._draw_video_pos(painter)
+
+    def _get_overlay_rects(self) -> list[QRect]:
+        rect = self._get_video_pos_rect()
+        return [rect] if rect else []
 
     def mousePressEvent(self, event: QMouseEvent) -> None:
         if event.button() == Qt.MouseButton.LeftButton:
@@ -131,12 +134,10 @@ class AudioTimeline(BaseLocalAudioWidget):
         color = self._theme_mgr.get_color("spectrogram/keyframe")
         painter.setPen(QPen(color, 1, Qt.PenStyle.SolidLine))
         try:
-            keyframes = self._api.video.current_stream.keyframes
-            timecodes = self._api.video.current_stream.timecodes
+            timecodes = self._api.video.current_stream.keyframe_timecodes
         except ResourceUnavailable:
             return
-        for keyframe in keyframes:
-            timecode = timecodes[keyframe]
+        for timecode in timecodes:
             x = round(self.pts_to_x(timecode))
             painter.drawLine(x, 0, x, h)
 
@@ -147,7 +148,7 @@ class AudioTimeline(BaseLocalAudioWidget):
         painter.setPen(Qt.PenStyle.NoPen)
         painter.setBrush(self._theme_mgr.get_color("spectrogram/video-marker"))
 
-        width = 7
+        width = VIDEO_MARKER_WIDTH
         polygon = QPolygonF()
         for x, y in [
             (x - width // 2, 0),
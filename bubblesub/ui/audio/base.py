@@ -15,13 +15,26 @@
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
 import enum
+import math
+import time
+from collections import Counter
 from copy import copy
 from dataclasses import dataclass
 from typing import Optional, cast
 
+import numpy as np
 from ass_parser import AssEvent
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QMouseEvent, QPainter, QPen, QWheelEvent
+from PyQt5.QtCore import QObject, QRect, QSize, Qt, QTimer
+from PyQt5.QtGui import (
+    QGuiApplication,
+    QMouseEvent,
+    QPainter,
+    QPaintEvent,
+    QPen,
+    QPixmap,
+    QRegion,
+    QWheelEvent,
+)
 from PyQt5.QtWidgets import QWidget
 
 from bubblesub.api import Api
@@ -29,6 +42,8 @@ from bubblesub.api.audio_view import AudioViewApi
 from bubblesub.errors import ResourceUnavailable
 
 SLIDER_SIZE = 20
+VIDEO_MARKER_WIDTH = 7
+DEFAULT_REFRESH_RATE = 60.0
 
 
 class DragMode(enum.Enum):
@@ -43,6 +58,23 @@ class DragMode(enum.Enum):
     SUBTITLE_SPLIT = 9
 
 
+class DirtyReason(enum.Enum):
+    VIEW = "view"
+    SELECTION = "selection"
+    EVENTS = "events"
+    STREAM = "stream"
+    DATA = "data"
+    PLAYHEAD = "playhead"
+    MOUSE = "mouse"
+
+    def __str__(self) -> str:
+        return self.value
+
+
+# reasons that only move the markers drawn over the background
+OVERLAY_REASONS = frozenset({DirtyReason.PLAYHEAD, DirtyReason.MOUSE})
+
+
 @dataclass
 class InsertionPoint:
     idx: int
@@ -50,6 +82,23 @@ class InsertionPoint:
     end: int
 
 
+def fill_with_nearest_rows(rows: np.ndarray, available: np.ndarray) -> None:
+    """Replace rows that aren't available with the nearest available ones.
+
+    :param rows: array to fill in place, one row per pixel column
+    :param available: boolean array telling which rows are available
+    """
+    available_xs = np.flatnonzero(available)
+    if not available_xs.size or len(available_xs) == len(rows):
+        return
+    missing_xs = np.flatnonzero(~available)
+    pos = np.searchsorted(available_xs, missing_xs)
+    left = available_xs[np.maximum(pos - 1, 0)]
+    right = available_xs[np.minimum(pos, len(available_xs) - 1)]
+    nearest = np.where(missing_xs - left <= right - missing_xs, left, right)
+    rows[missing_xs] = rows[nearest]
+
+
 def try_align_pts_to_near_frame(api: Api, pts: int) -> int:
     try:
         return api.video.current_stream.align_pts_to_near_frame(pts)
@@ -256,7 +305,7 @@ class SubtitleSplitDragModeExecutor(DragModeExecutor):
         super().begin_drag(event, pts)
         self.source_events[:] = [
             source_event
-            for source_event in self._api.subs.events
+            for source_event in self._api.subs.events_at(pts)
             if source_event.start <= pts <= source_event.end
         ]
         self.copied_events[:] = []
@@ -278,16 +327,96 @@ class SubtitleSplitDragModeExecutor(DragModeExecutor):
             ass_event.start = pts
 
 
+class RenderScheduler(QObject):
+    """Collects repaint requests of the audio widgets and passes them on at
+    most once per display frame.
+
+    A burst of signals fired by a single user action thus results in a
+    single paint of each affected widget.
+    """
+
+    def __init__(self, parent: Optional[QObject] = None) -> None:
+        """Initialize self.
+
+        :param parent: owner object
+        """
+        super().__init__(parent)
+        self.reason_counts: Counter[DirtyReason] = Counter()
+        self.flush_count = 0
+        self._dirty: dict["BaseAudioWidget", set[DirtyReason]] = {}
+        self._last_flush = -math.inf
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self.flush)
+
+    @property
+    def frame_interval(self) -> float:
+        """Return how long a single display frame lasts.
+
+        :return: frame duration in seconds
+        """
+        screen = QGuiApplication.primaryScreen()
+        refresh_rate = screen.refreshRate() if screen else 0
+        if refresh_rate <= 0:
+            refresh_rate = DEFAULT_REFRESH_RATE
+        return 1 / refresh_rate
+
+    def mark_dirty(
+        self, widget: "BaseAudioWidget", reason: DirtyReason
+    ) -> None:
+        """Request repainting given widget with the next frame.
+
+        :param widget: widget to repaint
+        :param reason: what changed
+        """
+        self.reason_counts[reason] += 1
+        self._dirty.setdefault(widget, set()).add(reason)
+        if not self._timer.isActive():
+            delay = self._last_flush + self.frame_interval - time.monotonic()
+            self._timer.start(math.ceil(max(0.0, delay) * 1000))
+
+    def flush(self) -> None:
+        """Repaint all widgets marked as dirty right away."""
+        self._timer.stop()
+        dirty = self._dirty
+        self._dirty = {}
+        self._last_flush = time.monotonic()
+        self.flush_count += 1
+        for widget, reasons in dirty.items():
+            widget.flush_repaint(reasons)
+
+
 class BaseAudioWidget(QWidget):
-    def __init__(self, api: Api, parent: QWidget) -> None:
+    def __init__(
+        self,
+        api: Api,
+        render_scheduler: RenderScheduler,
+        parent: Optional[QWidget],
+    ) -> None:
         super().__init__(parent)
         self._api = api
+        self._render_scheduler = render_scheduler
         self._drag_mode: Optional[DragMode] = None
         self._drag_mode_executors = {
             executor.drag_mode: executor(self._api)
             for executor in DragModeExecutor.__subclasses__()
         }
         self._last_paint_cache_key = 0
+        self._background: Optional[QPixmap] = None
+        self._overlay_rects: list[QRect] = []
+        self._overlay_damage = QRegion()
+
+    def schedule_repaint(self, reason: DirtyReason) -> None:
+        self._render_scheduler.mark_dirty(self, reason)
+
+    def flush_repaint(self, reasons: set[DirtyReason]) -> None:
+        # data changes aren't reflected by the paint cache keys
+        if DirtyReason.DATA in reasons:
+            self.repaint()
+        elif reasons - OVERLAY_REASONS:
+            self.repaint_if_needed()
+        if reasons & OVERLAY_REASONS:
+            self.update_overlay()
 
     def repaint(self) -> None:
         self._last_paint_cache_key = self._get_paint_cache_key()
@@ -299,6 +428,88 @@ class BaseAudioWidget(QWidget):
             self._last_paint_cache_key = paint_cache_key
             self.update()
 
+    def update_overlay(self) -> None:
+        """Repaint the overlay without repainting the background.
+
+        Only the strips covered by the overlay before and after the change
+        are repainted.
+        """
+        rects = self._get_overlay_rects()
+        if rects == self._overlay_rects:
+            return
+        for rect in self._overlay_rects + rects:
+            self._overlay_damage = self._overlay_damage.united(rect)
+            self.update(rect)
+        self._overlay_rects = rects
+
+    def paintEvent(self, event: QPaintEvent) -> None:
+        # anything but the overlay moving, including updates requested by
+        # Qt itself, might have changed the background
+        if (
+            self._background is None
+            or self._background.size() != self._get_background_size()
+            or not event.region().subtracted(self._overlay_damage).isEmpty()
+        ):
+            self._background = self._render_background()
+        self._overlay_damage = QRegion()
+
+        painter = QPainter()
+        painter.begin(self)
+        try:
+            painter.drawPixmap(0, 0, self._background)
+            self._draw_overlay(painter)
+        finally:
+            painter.end()
+        self._overlay_rects = self._get_overlay_rects()
+
+    def _get_background_size(self) -> QSize:
+        ratio = self.devicePixelRatioF()
+        return QSize(round(self.width() * ratio), round(self.height() * ratio))
+
+    def _render_background(self) -> QPixmap:
+        pixmap = QPixmap(self._get_background_size())
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        pixmap.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter()
+        painter.begin(pixmap)
+        try:
+            # make the painter use widget coordinates regardless of the
+            # pixel ratio, as if it painted on the widget itself
+            painter.setViewport(self.rect())
+            painter.setWindow(self.rect())
+            painter.setFont(self.font())
+            self._draw_background(painter)
+        finally:
+            painter.end()
+        return pixmap
+
+    def _on_stream_change(self, _stream: object) -> None:
+        self.schedule_repaint(DirtyReason.STREAM)
+
+    def _on_playhead_move(self) -> None:
+        self.schedule_repaint(DirtyReason.PLAYHEAD)
+
+    def _draw_background(self, painter: QPainter) -> None:
+        raise NotImplementedError("not implemented")
+
+    def _draw_overlay(self, painter: QPainter) -> None:
+        pass
+
+    def _get_overlay_rects(self) -> list[QRect]:
+        return []
+
+    def _get_video_pos_rect(self) -> Optional[QRect]:
+        if not self._api.playback.current_pts:
+            return None
+        x = round(self.pts_to_x(self._api.playback.current_pts))
+        return QRect(
+            x - VIDEO_MARKER_WIDTH // 2 - 1,
+            0,
+            VIDEO_MARKER_WIDTH + 2,
+            self.height(),
+        )
+
     def _get_paint_cache_key(self) -> int:
         raise NotImplementedError("not implemented")
 
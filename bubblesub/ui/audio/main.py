@@ -23,6 +23,7 @@ from bubblesub.api import Api
 from bubblesub.ui.audio.audio_preview import AudioPreview
 from bubblesub.ui.audio.audio_slider import AudioSlider
 from bubblesub.ui.audio.audio_timeline import AudioTimeline
+from bubblesub.ui.audio.base import RenderScheduler
 from bubblesub.ui.audio.video_preview import VideoPreview
 from bubblesub.ui.themes import ThemeManager
 
@@ -42,10 +43,19 @@ class Audio(QSplitter):
     ) -> None:
         super().__init__(parent)
         self._api = api
-        self._audio_timeline = AudioTimeline(self._api, theme_mgr, self)
-        self._audio_preview = AudioPreview(self._api, theme_mgr, self)
-        self._video_preview = VideoPreview(self._api, self)
-        self._slider = AudioSlider(self._api, theme_mgr, self)
+        self._render_scheduler = RenderScheduler(self)
+        self._audio_timeline = AudioTimeline(
+            self._api, theme_mgr, self._render_scheduler, self
+        )
+        self._audio_preview = AudioPreview(
+            self._api, theme_mgr, self._render_scheduler, self
+        )
+        self._video_preview = VideoPreview(
+            self._api, self._render_scheduler, self
+        )
+        self._slider = AudioSlider(
+            self._api, theme_mgr, self._render_scheduler, self
+        )
 
         self.setObjectName("spectrogram")
         self.setFocusPolicy(Qt.FocusPolicy.StrongFocus)
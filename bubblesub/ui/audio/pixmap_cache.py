@@ -0,0 +1,113 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Rendered audio widget strips cached in view space."""
+
+import math
+from collections.abc import Callable, Hashable
+from typing import Any
+
+import numpy as np
+from PyQt5.QtGui import QImage, QPainter, QPixmap
+
+from bubblesub.cache import LruCache
+
+TILE_WIDTH = 256
+
+
+def get_pixmap_size(pixmap: QPixmap) -> int:
+    """Return how much memory given pixmap takes.
+
+    :param pixmap: pixmap to measure
+    :return: size in bytes
+    """
+    return pixmap.width() * pixmap.height() * pixmap.depth() // 8
+
+
+class PixmapTileCache:
+    """Pixmaps of fixed-width tiles of an audio widget.
+
+    Tiles are aligned to absolute pixel positions at the current zoom, so
+    scrolling reuses the tiles rendered so far and only renders the strip
+    that comes into view. Changing the zoom, the widget size or the render
+    key drops all tiles. Tiles rendered from incomplete data are never
+    cached, so that they're rendered again once the data is there.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize self.
+
+        :param max_size: maximum total size of the cached pixmaps in bytes
+        """
+        self._tiles: LruCache[int, QPixmap] = LruCache(
+            max_size, get_pixmap_size
+        )
+        self._key: Any = None
+
+    def invalidate(self) -> None:
+        """Drop all cached tiles."""
+        self._tiles.clear()
+
+    def draw(
+        self,
+        painter: QPainter,
+        view_start: int,
+        view_size: int,
+        render_key: Hashable,
+        render: Callable[[np.ndarray, int], tuple[QImage, bool]],
+    ) -> bool:
+        """Draw the tiles covering the painter viewport.
+
+        :param painter: painter to draw with
+        :param view_start: PTS at the left edge of the viewport
+        :param view_size: PTS range covered by the viewport
+        :param render_key:
+            anything the rendered pixels depend on besides the zoom
+        :param render:
+            function returning the image of a tile and whether it's complete
+            given the PTS of each tile pixel column and the viewport height
+        :return: whether all drawn tiles were complete
+        """
+        width = painter.viewport().width()
+        height = painter.viewport().height()
+        if not view_size or not width:
+            return False
+
+        key = (view_size, width, height, render_key)
+        if key != self._key:
+            self._tiles.clear()
+            self._key = key
+
+        scale = width / view_size
+        origin_x = view_start * scale
+        first_tile_idx = math.floor(origin_x / TILE_WIDTH)
+        last_tile_idx = math.floor((origin_x + width - 1) / TILE_WIDTH)
+
+        complete = True
+        for tile_idx in range(first_tile_idx, last_tile_idx + 1):
+            pixmap = self._tiles.get(tile_idx)
+            if pixmap is None:
+                pts = (np.arange(TILE_WIDTH) + tile_idx * TILE_WIDTH) / scale
+                image, tile_complete = render(pts, height)
+                pixmap = QPixmap.fromImage(image)
+                if tile_complete:
+                    self._tiles.put(tile_idx, pixmap)
+                else:
+                    complete = False
+            painter.drawPixmap(
+                round(tile_idx * TILE_WIDTH - origin_x), 0, pixmap
+            )
+        return complete
@@ -0,0 +1,196 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Persistent spectrogram columns."""
+
+import os
+import threading
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from bubblesub.cache import TILE_SUFFIX, get_cache_dir, get_cache_file_path
+from bubblesub.spectrogram import COLUMN_SIZE
+
+TILE_SIZE = 1024
+
+
+def _get_disk_usage(path: Path) -> int:
+    stat = path.stat()
+    # tiles are sparse files - count only the blocks actually written to
+    blocks = getattr(stat, "st_blocks", None)
+    return stat.st_size if blocks is None else blocks * 512
+
+
+def prune_tiles(max_size: int, keep: set[Path]) -> int:
+    """Delete least recently used spectrogram tiles until they fit in given
+    size.
+
+    :param max_size: maximum total size of the tiles in bytes
+    :param keep: tiles that must not be deleted
+    :return: total size of the remaining tiles in bytes
+    """
+    cache_dir = get_cache_dir()
+    if not cache_dir.exists():
+        return 0
+    tiles: list[tuple[float, int, Path]] = []
+    for path in cache_dir.iterdir():
+        if path.suffix != TILE_SUFFIX:
+            continue
+        try:
+            tiles.append((path.stat().st_mtime, _get_disk_usage(path), path))
+        except FileNotFoundError:
+            continue
+
+    total_size = sum(size for _mtime, size, _path in tiles)
+    for _mtime, size, path in sorted(tiles):
+        if total_size <= max_size:
+            break
+        if path not in keep:
+            path.unlink(missing_ok=True)
+            total_size -= size
+    return total_size
+
+
+class SpectrogramTileCache:
+    """Spectrogram columns of a single audio source stored on disk.
+
+    Columns of each pyramid level are grouped into fixed-size memory-mapped
+    tiles, which are opened lazily once any of their columns is looked up.
+    Each tile starts with one flag per column telling whether the column was
+    computed, followed by the columns themselves.
+    """
+
+    def __init__(self, cache_name: str, max_size: int) -> None:
+        """Initialize self.
+
+        :param cache_name:
+            name identifying the audio source and the spectrogram parameters
+        :param max_size: maximum total size of all tiles on disk in bytes
+        """
+        self._cache_name = cache_name
+        self._max_size = max_size
+        self._tiles: dict[tuple[int, int], Optional[np.memmap]] = {}
+        self._disk_usage: Optional[int] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def get_columns(
+        self, level: int, block_indexes: list[int]
+    ) -> tuple[list[int], np.ndarray]:
+        """Read computed columns.
+
+        :param level: pyramid level of the columns
+        :param block_indexes: which columns to read
+        :return:
+            block indexes of the columns found on disk and a 2-D array with
+            one column per row
+        """
+        found: list[int] = []
+        columns: list[np.ndarray] = []
+        with self._lock:
+            for block_idx in block_indexes:
+                tile_idx, offset = divmod(block_idx, TILE_SIZE)
+                tile = self._get_tile((level, tile_idx), create=False)
+                if tile is not None and tile[offset]:
+                    found.append(block_idx)
+                    columns.append(self._get_tile_columns(tile)[offset])
+        if not columns:
+            return found, np.empty((0, COLUMN_SIZE), dtype=np.uint8)
+        return found, np.array(columns)
+
+    def put_columns(
+        self, level: int, block_indexes: np.ndarray, columns: np.ndarray
+    ) -> None:
+        """Store computed columns.
+
+        :param level: pyramid level of the columns
+        :param block_indexes: which columns to store
+        :param columns: 2-D array with one column per row
+        """
+        with self._lock:
+            for block_idx, column in zip(block_indexes, columns):
+                if block_idx < 0:
+                    continue
+                tile_idx, offset = divmod(int(block_idx), TILE_SIZE)
+                tile = self._get_tile((level, tile_idx), create=True)
+                if tile is None:
+                    continue
+                self._get_tile_columns(tile)[offset] = column
+                tile[offset] = 1
+
+    def close(self) -> None:
+        """Write pending changes to disk and release the tiles."""
+        with self._lock:
+            self._closed = True
+            for tile in self._tiles.values():
+                if tile is not None:
+                    tile.flush()
+            self._tiles.clear()
+
+    def _get_tile_path(self, tile_key: tuple[int, int]) -> Path:
+        level, tile_idx = tile_key
+        return get_cache_file_path(
+            f"{self._cache_name}-{level}-{tile_idx}", TILE_SUFFIX
+        )
+
+    def _get_tile_columns(self, tile: np.memmap) -> np.ndarray:
+        return tile[TILE_SIZE:].reshape(TILE_SIZE, COLUMN_SIZE)
+
+    def _get_tile(
+        self, tile_key: tuple[int, int], create: bool
+    ) -> Optional[np.memmap]:
+        if tile_key[1] < 0 or self._closed:
+            return None
+        tile = self._tiles.get(tile_key)
+        if tile is not None or (tile_key in self._tiles and not create):
+            return tile
+
+        path = self._get_tile_path(tile_key)
+        shape = (TILE_SIZE * (COLUMN_SIZE + 1),)
+        try:
+            if path.exists() and path.stat().st_size == shape[0]:
+                tile = np.memmap(path, dtype=np.uint8, mode="r+", shape=shape)
+                os.utime(path)
+            elif create and self._reserve_disk_space(shape[0]):
+                path.parent.mkdir(parents=True, exist_ok=True)
+                tile = np.memmap(path, dtype=np.uint8, mode="w+", shape=shape)
+        except (OSError, ValueError):
+            tile = None
+
+        self._tiles[tile_key] = tile
+        return tile
+
+    def _reserve_disk_space(self, size: int) -> bool:
+        # the directory is scanned only once the estimated usage, which
+        # assumes new tiles get filled completely, exceeds the limit
+        if (
+            self._disk_usage is None
+            or self._disk_usage + size > self._max_size
+        ):
+            self._disk_usage = prune_tiles(
+                self._max_size - size,
+                keep={
+                    self._get_tile_path(tile_key)
+                    for tile_key, tile in self._tiles.items()
+                    if tile is not None
+                },
+            )
+            if self._disk_usage + size > self._max_size:
+                return False
+        self._disk_usage += size
+        return True
@@ -0,0 +1,423 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Background computation of the spectrogram shown in the audio preview."""
+
+import functools
+import multiprocessing
+import queue
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing.shared_memory import SharedMemory
+from typing import Any, Optional
+
+import numpy as np
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from bubblesub.api import Api
+from bubblesub.api.audio_stream import AudioStream
+from bubblesub.api.threading import QueueWorker
+from bubblesub.cache import get_source_cache_name
+from bubblesub.errors import ResourceUnavailable
+from bubblesub.spectrogram import (
+    COLUMN_SIZE,
+    DERIVATION_DISTANCE,
+    DERIVATION_SIZE,
+    POOL_SIZE,
+    WINDOW_SIZE,
+    compute_shared_columns,
+    get_level_first_samples,
+    get_windows,
+    pool_columns,
+    spectrum_to_columns,
+)
+from bubblesub.ui.audio.spectrogram_cache import (
+    TILE_SIZE,
+    SpectrogramTileCache,
+)
+
+try:
+    import pyfftw
+except ImportError:
+    pyfftw = None
+
+
+CHUNK_SIZE = 50
+
+
+class SpectrumWorkerSignals(QObject):
+    finished = pyqtSignal()
+
+
+class SpectrumWorker(QueueWorker):
+    def __init__(self, api: Api) -> None:
+        super().__init__(api.log)
+        self.signals = SpectrumWorkerSignals()
+        self._api = api
+
+        self._view_cache = api.audio.view_cache
+        self._view_cache_lock = threading.Lock()
+        self._tiles: Optional[SpectrogramTileCache] = None
+        self._tiles_name: Optional[str] = None
+        self._tiles_lock = threading.Lock()
+
+        if pyfftw is not None:
+            self._input = pyfftw.empty_aligned(
+                (CHUNK_SIZE * POOL_SIZE, WINDOW_SIZE), dtype=np.float32
+            )
+            self._output = pyfftw.empty_aligned(
+                (CHUNK_SIZE * POOL_SIZE, COLUMN_SIZE), dtype=np.complex64
+            )
+            self._fftw = pyfftw.FFTW(
+                self._input, self._output, axes=(1,), flags=("FFTW_MEASURE",)
+            )
+        else:
+            self._fftw = None
+
+    def _process_task(self, task: Any) -> None:
+        level, block_indexes = task
+        block_indexes = np.unique(np.fromiter(block_indexes, dtype=np.int64))
+        # tasks of superseded views can overlap the current ones
+        _columns, computed = self.get_columns(level, block_indexes)
+        block_indexes = block_indexes[~computed]
+        anything_changed = False
+        for start in range(0, len(block_indexes), CHUNK_SIZE):
+            chunk = block_indexes[start : start + CHUNK_SIZE]
+            if self._process_chunk(level, chunk):
+                anything_changed = True
+        if anything_changed:
+            self.signals.finished.emit()
+
+    def load_cached_columns(
+        self, level: int, block_indexes: list[int]
+    ) -> list[int]:
+        """Load columns computed in earlier sessions from the disk cache.
+
+        :param level: pyramid level of the columns
+        :param block_indexes: columns to look up
+        :return: block indexes that still need to be computed
+        """
+        tiles = self._get_tiles()
+        if tiles is None:
+            return block_indexes
+        found, columns = tiles.get_columns(level, block_indexes)
+        if found:
+            self._put_memory_columns(level, np.array(found), columns)
+        found_set = set(found)
+        return [
+            block_idx
+            for block_idx in block_indexes
+            if block_idx not in found_set
+        ]
+
+    def get_columns(
+        self, level: int, block_indexes: np.ndarray
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Read columns held in memory.
+
+        :param level: pyramid level of the columns
+        :param block_indexes: which columns to read
+        :return:
+            2-D array with one column per row, zeroed for columns that
+            weren't computed yet, and a boolean array telling which columns
+            were computed
+        """
+        columns = np.zeros((len(block_indexes), COLUMN_SIZE), dtype=np.uint8)
+        computed = np.zeros(len(block_indexes), dtype=bool)
+        tile_indexes, offsets = np.divmod(block_indexes, TILE_SIZE)
+        for tile_idx in np.unique(tile_indexes):
+            tile = self._view_cache.get(("spectrogram", level, int(tile_idx)))
+            if tile is None:
+                continue
+            mask = tile_indexes == tile_idx
+            computed[mask] = tile[offsets[mask], 0] != 0
+            columns[mask] = tile[offsets[mask], 1:]
+        return columns, computed
+
+    def clear_cache(self) -> None:
+        """Drop the columns of all levels held in memory."""
+        self._view_cache.discard(lambda key: key[0] == "spectrogram")
+
+    def _put_memory_columns(
+        self, level: int, block_indexes: np.ndarray, columns: np.ndarray
+    ) -> None:
+        # memory tiles mirror the disk ones: each row starts with a flag
+        # telling whether the column was computed
+        tile_indexes, offsets = np.divmod(block_indexes, TILE_SIZE)
+        with self._view_cache_lock:
+            for tile_idx in np.unique(tile_indexes):
+                key = ("spectrogram", level, int(tile_idx))
+                tile = self._view_cache.get(key)
+                if tile is None:
+                    tile = np.zeros(
+                        (TILE_SIZE, COLUMN_SIZE + 1), dtype=np.uint8
+                    )
+                    self._view_cache.put(key, tile)
+                mask = tile_indexes == tile_idx
+                tile[offsets[mask], 0] = 1
+                tile[offsets[mask], 1:] = columns[mask]
+
+    def _finished(self) -> None:
+        with self._tiles_lock:
+            if self._tiles is not None:
+                self._tiles.close()
+                self._tiles = None
+
+    def _process_chunk(self, level: int, block_indexes: np.ndarray) -> bool:
+        # grab the tiles before computing so that columns computed for an
+        # outdated stream never end up in the tiles of the new one
+        tiles = self._get_tiles()
+        columns = self._get_spectrogram_for_block_indexes(level, block_indexes)
+        if columns is None:
+            return False
+        self._store_columns(level, block_indexes, columns, tiles)
+        return True
+
+    def _store_columns(
+        self,
+        level: int,
+        block_indexes: np.ndarray,
+        columns: np.ndarray,
+        tiles: Optional[SpectrogramTileCache],
+    ) -> None:
+        self._put_memory_columns(level, block_indexes, columns)
+        if tiles is not None:
+            tiles.put_columns(level, block_indexes, columns)
+
+    def _get_tiles(self) -> Optional[SpectrogramTileCache]:
+        # columns depend on the audio source and on how it's aligned to the
+        # video, so each combination has its own tiles
+        max_size = self._api.cfg.opt["audio"]["spectrogram_cache_size"]
+        try:
+            audio_stream = self._api.audio.current_stream
+            tiles_name = get_source_cache_name(
+                audio_stream.path,
+                f"spectrogram-{DERIVATION_SIZE}-{DERIVATION_DISTANCE}"
+                f"-{POOL_SIZE}-{self.get_sample_offset(audio_stream)}",
+            )
+        except (ResourceUnavailable, OSError):
+            tiles_name = None
+
+        with self._tiles_lock:
+            if tiles_name != self._tiles_name:
+                if self._tiles is not None:
+                    self._tiles.close()
+                self._tiles = (
+                    SpectrogramTileCache(tiles_name, max_size * 1024 * 1024)
+                    if tiles_name is not None and max_size > 0
+                    else None
+                )
+                self._tiles_name = tiles_name
+            return self._tiles
+
+    def get_sample_offset(self, audio_stream: AudioStream) -> int:
+        """Return where the first video frame falls within the audio.
+
+        :param audio_stream: audio stream
+        :return: index of the sample
+        """
+        video_stream = self._api.video.current_stream
+        if video_stream and len(video_stream.timecodes):
+            return (
+                int(video_stream.timecodes[0])
+                * audio_stream.sample_rate
+                // 1000
+            )
+        return 0
+
+    def _get_first_samples(
+        self, audio_stream: AudioStream, level: int, block_indexes: np.ndarray
+    ) -> np.ndarray:
+        first_samples = get_level_first_samples(block_indexes, level)
+        first_samples -= self.get_sample_offset(audio_stream)
+        return np.maximum(first_samples, 0)
+
+    def _get_spectrogram_for_block_indexes(
+        self, level: int, block_indexes: np.ndarray
+    ) -> Optional[np.ndarray]:
+        try:
+            audio_stream = self._api.audio.current_stream
+            first_samples = self._get_first_samples(
+                audio_stream, level, block_indexes
+            )
+            windows = get_windows(
+                audio_stream.get_mono_samples, first_samples.ravel()
+            )
+        except ResourceUnavailable:
+            return None
+
+        if self._fftw is not None:
+            self._input[0 : len(windows)] = windows
+            spectrum = self._fftw()[0 : len(windows)]
+        else:
+            spectrum = np.fft.rfft(windows, axis=1)
+        return pool_columns(
+            spectrum_to_columns(spectrum), first_samples.shape[1]
+        )
+
+
+class ProcessSpectrumWorker(SpectrumWorker):
+    """Spectrum worker that spreads the computation over worker processes.
+
+    The processes read the samples straight from the decoded audio disk
+    cache and write the columns into a shared memory buffer. Until the
+    current audio stream is cached, or if the processes die, the columns
+    are computed on the worker thread instead.
+    """
+
+    def __init__(self, api: Api, process_count: int) -> None:
+        """Initialize self.
+
+        :param api: core API
+        :param process_count: number of worker processes
+        """
+        super().__init__(api)
+        self._slot_size = CHUNK_SIZE * COLUMN_SIZE
+        self._generation = 0
+        self._futures: set["Future[int]"] = set()
+        self._free_slots: queue.Queue[int] = queue.Queue()
+        for slot in range(process_count * 2):
+            self._free_slots.put(slot)
+
+        self._shared_memory: Optional[SharedMemory] = SharedMemory(
+            create=True, size=self._slot_size * process_count * 2
+        )
+        self._executor: Optional[ProcessPoolExecutor] = ProcessPoolExecutor(
+            max_workers=process_count,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+
+    def clear_tasks(
+        self, predicate: Optional[Callable[[Hashable], bool]] = None
+    ) -> None:
+        """Remove remaining tasks.
+
+        Removing all tasks drops results of the running ones as well.
+
+        :param predicate:
+            function telling whether to remove the tasks of given group;
+            if omitted, all tasks are removed
+        """
+        if predicate is None:
+            self._generation += 1
+            for future in list(self._futures):
+                future.cancel()
+        super().clear_tasks(predicate)
+
+    def _finished(self) -> None:
+        super()._finished()
+        executor = self._executor
+        self._executor = None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        if self._shared_memory is not None:
+            self._shared_memory.close()
+            self._shared_memory.unlink()
+            self._shared_memory = None
+
+    def _process_chunk(self, level: int, block_indexes: np.ndarray) -> bool:
+        try:
+            audio_stream = self._api.audio.current_stream
+            pcm_cache = audio_stream.pcm_cache
+            samples_path = (
+                pcm_cache.mono_samples.filename if pcm_cache else None
+            )
+            if (
+                pcm_cache is None
+                or samples_path is None
+                or self._executor is None
+            ):
+                return super()._process_chunk(level, block_indexes)
+            samples = pcm_cache.mono_samples
+            first_samples = self._get_first_samples(
+                audio_stream, level, block_indexes
+            )
+        except ResourceUnavailable:
+            return False
+
+        assert self._shared_memory
+        tiles = self._get_tiles()
+        generation = self._generation
+        slot = self._free_slots.get()
+        try:
+            future = self._executor.submit(
+                compute_shared_columns,
+                samples_path,
+                samples.offset,
+                len(samples),
+                first_samples,
+                self._shared_memory.name,
+                slot * self._slot_size,
+            )
+        except BrokenProcessPool:
+            self._free_slots.put(slot)
+            self._on_process_pool_broken()
+            return super()._process_chunk(level, block_indexes)
+
+        self._futures.add(future)
+        future.add_done_callback(
+            functools.partial(
+                self._on_chunk_done,
+                level,
+                block_indexes,
+                tiles,
+                slot,
+                generation,
+            )
+        )
+        return False
+
+    def _on_chunk_done(
+        self,
+        level: int,
+        block_indexes: np.ndarray,
+        tiles: Optional[SpectrogramTileCache],
+        slot: int,
+        generation: int,
+        future: "Future[int]",
+    ) -> None:
+        self._futures.discard(future)
+        try:
+            if future.cancelled() or generation != self._generation:
+                return
+            if isinstance(future.exception(), BrokenProcessPool):
+                self._on_process_pool_broken()
+                return
+            count = future.result()
+            assert self._shared_memory
+            columns = np.ndarray(
+                (count, COLUMN_SIZE),
+                dtype=np.uint8,
+                buffer=self._shared_memory.buf,
+                offset=slot * self._slot_size,
+            ).copy()
+            self._store_columns(level, block_indexes, columns, tiles)
+            self.signals.finished.emit()
+        except Exception as ex:  # pylint: disable=broad-except
+            self._log_api.error(f"error computing spectrogram ({ex})")
+        finally:
+            self._free_slots.put(slot)
+
+    def _on_process_pool_broken(self) -> None:
+        if self._executor is not None:
+            self._log_api.warn(
+                "spectrogram worker processes died, "
+                "falling back to a single worker thread"
+            )
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
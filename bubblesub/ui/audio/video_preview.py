@@ -14,29 +14,43 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+import functools
 import threading
-import uuid
-from typing import Any
+from concurrent.futures import CancelledError
+from typing import Any, Optional
 
 import numpy as np
 from PyQt5.QtCore import QObject, QSize, pyqtSignal
-from PyQt5.QtGui import QImage, QPainter, QPaintEvent, QPixmap, QResizeEvent
+from PyQt5.QtGui import QImage, QPainter
 from PyQt5.QtWidgets import QSizePolicy, QWidget
 
 from bubblesub.api import Api
+from bubblesub.api.decode_executor import DecodePriority
 from bubblesub.api.log import LogApi
 from bubblesub.api.threading import QueueWorker
 from bubblesub.api.video import VideoApi
 from bubblesub.api.video_stream import VideoStream
-from bubblesub.cache import load_cache, save_cache
+from bubblesub.cache import LruCache, load_cache, save_cache
 from bubblesub.errors import ResourceUnavailable
-from bubblesub.ui.audio.base import BaseLocalAudioWidget
+from bubblesub.ui.audio.base import (
+    BaseLocalAudioWidget,
+    DirtyReason,
+    RenderScheduler,
+    fill_with_nearest_rows,
+)
+from bubblesub.ui.audio.pixmap_cache import PixmapTileCache
 from bubblesub.util import chunks, sanitize_file_name
 
 _CACHE_LOCK = threading.Lock()
 BAND_RESOLUTION = 30
 CHUNK_SIZE = 500
 VIDEO_BAND_SIZE = 10
+PIXMAP_CACHE_SIZE = 16 * 1024 * 1024
+# decoded frames can't be told apart from undecoded ones by their pixels,
+# since a black frame is all zeros as well
+BAND_DTYPE = np.dtype(
+    [("pixels", np.uint8, (BAND_RESOLUTION, 3)), ("decoded", np.bool_)]
+)
 
 
 class VideoBandWorkerSignals(QObject):
@@ -44,30 +58,78 @@ class VideoBandWorkerSignals(QObject):
 
 
 class VideoBandWorker(QueueWorker):
-    def __init__(self, log_api: LogApi, video_api: VideoApi) -> None:
+    def __init__(
+        self,
+        log_api: LogApi,
+        video_api: VideoApi,
+        view_cache: LruCache[tuple[Any, ...], np.ndarray],
+    ) -> None:
         super().__init__(log_api)
         self.signals = VideoBandWorkerSignals()
         self._video_api = video_api
-
-        self.cache: dict[uuid.UUID, np.ndarray] = {}
+        self._view_cache = view_cache
 
         video_api.stream_loaded.connect(self._on_video_stream_load)
+        video_api.stream_unloaded.connect(self._on_video_stream_unload)
+
+    def get_band(self, stream: VideoStream) -> Optional[np.ndarray]:
+        """Return video band pixels of given stream.
+
+        Bands evicted from memory are read back from the disk cache.
+
+        :param stream: video stream
+        :return:
+            array with one row of pixels and a decoded flag per frame or
+            None if the stream isn't loaded
+        """
+        with _CACHE_LOCK:
+            band = self._view_cache.get(("video-band", stream.uid))
+            if band is not None:
+                return band
+            if not stream.is_ready:
+                return None
+            band = load_cache(self._get_cache_name(stream))
+            if (
+                band is None
+                or band.dtype != BAND_DTYPE
+                or band.shape[0] != len(stream.timecodes)
+            ):
+                band = np.zeros(len(stream.timecodes), dtype=BAND_DTYPE)
+            self._view_cache.put(("video-band", stream.uid), band)
+            return band
 
     def _process_task(self, task: Any) -> None:
         stream, frame_indexes = task
+        band = self.get_band(stream)
+        if band is None:
+            return
         anything_changed = False
-        for frame_idx in frame_indexes:
-            frame = stream.get_frame(frame_idx, 1, BAND_RESOLUTION)
+        requests = [
+            (
+                frame_idx,
+                stream.request_frame(
+                    frame_idx,
+                    1,
+                    BAND_RESOLUTION,
+                    priority=DecodePriority.BACKGROUND,
+                    use_cache=False,
+                ),
+            )
+            for frame_idx in frame_indexes
+        ]
+        for frame_idx, request in requests:
+            try:
+                frame = request.result()
+            except CancelledError:
+                return
             if frame is None:
                 continue
-            frame = frame.reshape(BAND_RESOLUTION, 3)
-            with _CACHE_LOCK:
-                self.cache[stream.uid][frame_idx] = frame
+            band[frame_idx] = (frame.reshape(BAND_RESOLUTION, 3), True)
             anything_changed = True
         if anything_changed:
             self.signals.cache_updated.emit()
-            cache_name = self._get_cache_name(stream)
-            save_cache(cache_name, self.cache[stream.uid])
+            # the band might get evicted from memory at any time
+            save_cache(self._get_cache_name(stream), band)
 
     def _get_cache_name(self, stream: VideoStream) -> str:
         try:
@@ -77,48 +139,45 @@ class VideoBandWorker(QueueWorker):
         return sanitize_file_name(stream.path) + f"-{size}-video-band"
 
     def _on_video_stream_unload(self, stream: VideoStream) -> None:
+        self.clear_tasks(lambda uid: uid == stream.uid)
         with _CACHE_LOCK:
-            # pylint: disable=fixme
-            # TODO: this also clears queue for unrelated streams!
-            self.clear_tasks()
-            cache_name = self._get_cache_name(stream)
-            save_cache(cache_name, self.cache[stream.uid])
-            del self.cache[stream.uid]
+            self._view_cache.discard(
+                lambda key: key == ("video-band", stream.uid)
+            )
 
     def _on_video_stream_load(self, stream: VideoStream) -> None:
-        with _CACHE_LOCK:
-            cache_name = self._get_cache_name(stream)
-            cache = load_cache(cache_name)
-            if cache is None:
-                cache = np.zeros(
-                    [len(stream.timecodes), BAND_RESOLUTION, 3], dtype=np.uint8
-                )
-            self.cache[stream.uid] = cache
-
-            not_cached_frames = [
-                frame_idx
-                for frame_idx in range(cache.shape[0])
-                if not np.count_nonzero(cache[frame_idx])
-            ]
-            for chunk in chunks(not_cached_frames, CHUNK_SIZE):
-                self._queue.put((stream, chunk))
+        band = self.get_band(stream)
+        if band is None:
+            return
+        not_cached_frames = np.flatnonzero(~band["decoded"]).tolist()
+        for chunk in chunks(not_cached_frames, CHUNK_SIZE):
+            self.schedule_task((stream, chunk), group=stream.uid)
 
 
 class VideoPreview(BaseLocalAudioWidget):
-    def __init__(self, api: Api, parent: QWidget) -> None:
-        super().__init__(api, parent)
+    def __init__(
+        self,
+        api: Api,
+        render_scheduler: RenderScheduler,
+        parent: Optional[QWidget],
+    ) -> None:
+        super().__init__(api, render_scheduler, parent)
         self.setSizePolicy(QSizePolicy.Ignored, QSizePolicy.Preferred)
 
-        self._pixels: np.ndarray = np.zeros([0, 0, 3], dtype=np.uint8)
+        self._tiles = PixmapTileCache(PIXMAP_CACHE_SIZE)
 
-        self._worker = VideoBandWorker(api.log, api.video)
-        self._worker.signals.cache_updated.connect(self.repaint)
+        self._worker = VideoBandWorker(
+            api.log, api.video, api.audio.view_cache
+        )
+        self._worker.signals.cache_updated.connect(self._on_band_update)
         self._api.threading.schedule_runnable(self._worker)
 
-        api.video.stream_loaded.connect(self.repaint_if_needed)
-        api.video.stream_unloaded.connect(self.repaint_if_needed)
-        api.video.current_stream_switched.connect(self.repaint_if_needed)
-        api.audio.view.view_changed.connect(self.repaint_if_needed)
+        api.video.stream_loaded.connect(self._on_stream_change)
+        api.video.stream_unloaded.connect(self._on_stream_change)
+        api.video.current_stream_switched.connect(self._on_stream_change)
+        api.audio.view.view_changed.connect(
+            lambda: self.schedule_repaint(DirtyReason.VIEW)
+        )
         api.gui.terminated.connect(self.shutdown)
 
     def sizeHint(self) -> QSize:
@@ -143,52 +202,46 @@ class VideoPreview(BaseLocalAudioWidget):
     def shutdown(self) -> None:
         self._worker.stop()
 
-    def resizeEvent(self, event: QResizeEvent) -> None:
-        self._pixels = np.zeros(
-            [BAND_RESOLUTION, self.width(), 3], dtype=np.uint8
-        )
+    def _on_band_update(self) -> None:
+        self.schedule_repaint(DirtyReason.DATA)
 
-    def paintEvent(self, event: QPaintEvent) -> None:
-        painter = QPainter()
-
-        painter.begin(self)
-        try:
-            self._draw_video_band(painter)
-            self._draw_frame(painter, bottom_line=False)
-        finally:
-            painter.end()
+    def _draw_background(self, painter: QPainter) -> None:
+        self._draw_video_band(painter)
+        self._draw_frame(painter, bottom_line=False)
 
     def _draw_video_band(self, painter: QPainter) -> None:
         try:
             current_stream = self._api.video.current_stream
-            pixels = self._pixels.transpose(1, 0, 2)
-
-            min_pts = self.pts_from_x(0)
-            max_pts = self.pts_from_x(self.width() - 1)
-
-            pts_range = np.linspace(min_pts, max_pts, self.width())
-            frame_idx_range = current_stream.frame_idx_from_pts(pts_range)
-
-            cache = self._worker.cache.get(current_stream.uid)
-            if cache is not None:
-                for x, frame_idx in enumerate(frame_idx_range):
-                    pixels[x] = cache[frame_idx]
-
-            # pylint: disable=unsubscriptable-object
-            image = QImage(
-                self._pixels.data,
-                self._pixels.shape[1],
-                self._pixels.shape[0],
-                self._pixels.strides[0],
-                QImage.Format_RGB888,
-            )
-            # pylint: enable=unsubscriptable-object
-
-            painter.save()
-            painter.scale(
-                1, painter.viewport().height() / (BAND_RESOLUTION - 1)
-            )
-            painter.drawPixmap(0, 0, QPixmap.fromImage(image))
-            painter.restore()
         except ResourceUnavailable:
-            pass
+            return
+        self._tiles.draw(
+            painter,
+            self._view.view_start,
+            self._view.view_size,
+            current_stream.uid,
+            functools.partial(self._render_video_band_tile, current_stream),
+        )
+
+    def _render_video_band_tile(
+        self, stream: VideoStream, pts_range: np.ndarray, height: int
+    ) -> tuple[QImage, bool]:
+        pixels = np.zeros([BAND_RESOLUTION, len(pts_range), 3], dtype=np.uint8)
+        complete = False
+        band = self._worker.get_band(stream)
+        if band is not None:
+            entries = band[stream.frame_idx_from_pts(pts_range)]
+            rows = entries["pixels"]
+            available = entries["decoded"]
+            complete = bool(available.all())
+            fill_with_nearest_rows(rows, available)
+            pixels[:] = rows.transpose(1, 0, 2)
+
+        image = QImage(
+            pixels.data,
+            pixels.shape[1],
+            pixels.shape[0],
+            pixels.strides[0],  # pylint: disable=unsubscriptable-object
+            QImage.Format_RGB888,
+        )
+        # scaling makes a copy that doesn't refer to the pixels anymore
+        return image.scaled(pixels.shape[1], height), complete
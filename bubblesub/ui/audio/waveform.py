@@ -0,0 +1,159 @@
+# bubblesub - ASS subtitle editor
+# Copyright (C) 2018 Marcin Kurczewski
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program.  If not, see <https://www.gnu.org/licenses/>.
+
+"""Waveform drawn by the audio preview."""
+
+import functools
+from typing import Optional
+
+import numpy as np
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import QColor, QImage, QPainter, QPalette
+
+from bubblesub.api.audio_stream import AudioStream
+from bubblesub.api.waveform import (
+    MAX,
+    MIN,
+    RMS,
+    WaveformSummary,
+    get_level,
+    get_pixel_summary,
+)
+from bubblesub.ui.audio.pixmap_cache import PixmapTileCache
+from bubblesub.ui.util import array_to_polygon, blend_colors
+
+
+class WaveformRenderer:
+    """Draws the peak and RMS envelope of an audio stream.
+
+    The envelope is rendered from the waveform summary of the stream in
+    cached tiles, see PixmapTileCache.
+    """
+
+    def __init__(self, max_size: int) -> None:
+        """Initialize self.
+
+        :param max_size: maximum total size of the cached tiles in bytes
+        """
+        self._tiles = PixmapTileCache(max_size)
+        self._background_color = QColor()
+        self._peak_color = QColor()
+        self._rms_color = QColor()
+
+    def set_palette(self, palette: QPalette) -> None:
+        """Pick the colors from given widget palette.
+
+        :param palette: palette of the widget to draw on
+        """
+        self._background_color = palette.window().color()
+        self._peak_color = QColor(
+            blend_colors(palette.window().color(), palette.text().color(), 0.5)
+        )
+        self._rms_color = palette.text().color()
+        self._tiles.invalidate()
+
+    def invalidate(self) -> None:
+        """Drop all cached tiles."""
+        self._tiles.invalidate()
+
+    def draw(
+        self,
+        painter: QPainter,
+        view_start: int,
+        view_size: int,
+        audio_stream: AudioStream,
+        sample_offset: int,
+        volume: float,
+    ) -> bool:
+        """Draw the waveform covering the painter viewport.
+
+        :param painter: painter to draw with
+        :param view_start: PTS at the left edge of the viewport
+        :param view_size: PTS range covered by the viewport
+        :param audio_stream: audio stream to draw
+        :param sample_offset: index of the first sample of the stream
+        :param volume: playback volume in percent
+        :return: whether the waveform summary was ready
+        """
+        summary = audio_stream.waveform_summary
+        return self._tiles.draw(
+            painter,
+            view_start,
+            view_size,
+            (
+                audio_stream.uid,
+                audio_stream.delay,
+                summary is not None,
+                volume,
+            ),
+            functools.partial(
+                self._render_tile, audio_stream, summary, sample_offset, volume
+            ),
+        )
+
+    def _render_tile(
+        self,
+        audio_stream: AudioStream,
+        summary: Optional[WaveformSummary],
+        sample_offset: int,
+        volume: float,
+        pts_range: np.ndarray,
+        height: int,
+    ) -> tuple[QImage, bool]:
+        image = QImage(len(pts_range), height, QImage.Format_RGB32)
+        image.fill(self._background_color)
+        if summary is None:
+            return image, False
+
+        # one more edge past the last pixel column ends its sample range
+        pts_edges = np.append(pts_range, 2 * pts_range[-1] - pts_range[-2])
+        first_samples = np.round(
+            (pts_edges - audio_stream.delay) * audio_stream.sample_rate / 1000
+        ).astype(dtype=np.int64)
+        first_samples -= sample_offset
+        level = get_level(
+            (first_samples[-1] - first_samples[0]) / len(pts_range)
+        )
+        rows, _within = get_pixel_summary(summary, first_samples, level)
+        rows = np.clip(rows * volume / 100, -1, 1)
+
+        middle = (height - 1) / 2
+        xs = np.arange(len(pts_range)) + 0.5
+        tops = middle - rows[:, MAX] * middle
+        bottoms = np.maximum(middle - rows[:, MIN] * middle, tops + 1)
+        rms = rows[:, RMS] * middle
+
+        painter = QPainter(image)
+        try:
+            painter.setPen(Qt.PenStyle.NoPen)
+            for color, upper, lower in [
+                (self._peak_color, tops, bottoms),
+                (self._rms_color, middle - rms, middle + rms),
+            ]:
+                painter.setBrush(color)
+                painter.drawPolygon(
+                    array_to_polygon(
+                        np.concatenate(
+                            [
+                                np.column_stack([xs, upper]),
+                                np.column_stack([xs, lower])[::-1],
+                            ]
+                        )
+                    )
+                )
+        finally:
+            painter.end()
+        return image, True
@@ -55,6 +55,7 @@ class MpvWidget(QOpenGLWidget):
 
         self._destroyed = False
         self._need_subs_refresh = False
+        self._subs_revision = 0
 
         self.mpv = MPV(ytdl=False, loglevel="info", log_handler=print)
         self.mpv_gl = None
@@ -94,7 +95,6 @@ class MpvWidget(QOpenGLWidget):
         self._timer.setInterval(api.cfg.opt["video"]["subs_sync_interval"])
         self._timer.timeout.connect(self._refresh_subs_if_needed)
 
-        api.subs.loaded.connect(self._on_subs_load)
         api.video.stream_created.connect(self._on_video_state_change)
         api.video.stream_unloaded.connect(self._on_video_state_change)
         api.video.current_stream_switched.connect(self._on_video_state_change)
@@ -173,17 +173,6 @@ class MpvWidget(QOpenGLWidget):
             self.mpv_gl.update_cb = self.on_update_fake
             self.mpv_gl.free()
 
-    def _on_subs_load(self) -> None:
-        self._api.subs.script_info.changed.subscribe(
-            lambda _event: self._on_subs_change()
-        )
-        self._api.subs.events.changed.subscribe(
-            lambda _event: self._on_subs_change()
-        )
-        self._api.subs.styles.changed.subscribe(
-            lambda _event: self._on_subs_change()
-        )
-
     def _on_video_state_change(self, stream: VideoStream) -> None:
         self._sync_media()
         self._need_subs_refresh = True
@@ -215,7 +204,10 @@ class MpvWidget(QOpenGLWidget):
         self._timer.stop()
 
     def _refresh_subs_if_needed(self) -> None:
-        if self._need_subs_refresh:
+        if (
+            self._need_subs_refresh
+            or self._subs_revision != self._api.subs.revision
+        ):
             self._refresh_subs()
 
     def _refresh_subs(self) -> None:
@@ -226,10 +218,12 @@ class MpvWidget(QOpenGLWidget):
                 self.mpv.command("sub_remove")
             except mpv.MPVError:
                 pass
+        revision = self._api.subs.revision
         with io.StringIO() as handle:
             write_ass(self._api.subs.ass_file, handle)
             self.mpv.command("sub_add", "memory://" + handle.getvalue())
         self._need_subs_refresh = False
+        self._subs_revision = revision
 
     def _set_end(self, end: Optional[int]) -> None:
         if not self._api.playback.is_ready:
@@ -276,9 +270,6 @@ class MpvWidget(QOpenGLWidget):
         except mpv.MPVError:
             pass
 
-    def _on_subs_change(self) -> None:
-        self._need_subs_refresh = True
-
     def _on_mpv_unload(self) -> None:
         self._api.playback.state = PlaybackFrontendState.NOT_READY
 
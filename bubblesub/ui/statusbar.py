@@ -14,29 +14,38 @@
 # You should have received a copy of the GNU General Public License
 # along with this program.  If not, see <https://www.gnu.org/licenses/>.
 
+from typing import Any
+
 from PyQt5.QtWidgets import QFrame, QLabel, QStatusBar, QWidget
 
 import bubblesub.api
 import bubblesub.util
+from bubblesub.api.base_stream import BaseStream
+from bubblesub.api.base_streams_api import BaseStreamsApi
 
 
 class StatusBar(QStatusBar):
     def __init__(self, api: bubblesub.api.Api, parent: QWidget) -> None:
         super().__init__(parent)
         self._api = api
+        self._streams_apis: list[BaseStreamsApi[Any]] = [api.audio, api.video]
         self._subs_label = QLabel(self)
         self._video_frame_label = QLabel(self)
         self._audio_selection_label = QLabel(self)
+        self._streams_label = QLabel(self)
+        self._streams_label.hide()
         self.setSizeGripEnabled(False)
 
         self.setObjectName("status")
         self._audio_selection_label.setObjectName("status-audio-label")
         self._video_frame_label.setObjectName("status-frame-label")
+        self._streams_label.setObjectName("status-streams-label")
 
         for label in [
             self._subs_label,
             self._video_frame_label,
             self._audio_selection_label,
+            self._streams_label,
         ]:
             label.setFrameStyle(QFrame.Panel | QFrame.Sunken)
             label.setLineWidth(1)
@@ -44,12 +53,19 @@ class StatusBar(QStatusBar):
         self.addPermanentWidget(self._subs_label)
         self.addPermanentWidget(self._video_frame_label)
         self.addPermanentWidget(self._audio_selection_label)
+        self.addPermanentWidget(self._streams_label)
 
         api.subs.selection_changed.connect(self._on_subs_selection_change)
         api.playback.current_pts_changed.connect(self._on_current_pts_change)
         api.audio.view.selection_changed.connect(
             self._on_audio_selection_change
         )
+        for streams_api in self._streams_apis:
+            streams_api.stream_created.connect(self._on_stream_state_change)
+            streams_api.stream_progressed.connect(self._on_stream_state_change)
+            streams_api.stream_loaded.connect(self._on_stream_state_change)
+            streams_api.stream_errored.connect(self._on_stream_state_change)
+            streams_api.stream_unloaded.connect(self._on_stream_state_change)
 
     def _on_subs_selection_change(self) -> None:
         count = len(self._api.subs.selected_indexes)
@@ -111,3 +127,21 @@ class StatusBar(QStatusBar):
             f"{bubblesub.util.ms_to_str(self._api.audio.view.selection_size)}"
             ")"
         )
+
+    def _on_stream_state_change(self) -> None:
+        def format_stream(stream: BaseStream) -> str:
+            ret = f"{stream.path.name} {stream.load_progress:.0%}"
+            eta = stream.load_eta
+            if eta is not None:
+                ret += f" (ETA {bubblesub.util.ms_to_str(int(eta * 1000))})"
+            return ret
+
+        loading = [
+            format_stream(stream)
+            for streams_api in self._streams_apis
+            for stream in streams_api.streams
+            if not stream.ready_event.is_set() and stream.load_progress > 0
+        ]
+
+        self._streams_label.setVisible(bool(loading))
+        self._streams_label.setText("Indexing: " + ", ".join(loading))
@@ -21,6 +21,7 @@ from functools import partial, wraps
 from pathlib import Path
 from typing import Any, Optional, cast
 
+import numpy as np
 from PyQt5.QtCore import (
     QAbstractItemModel,
     QDir,
@@ -39,6 +40,7 @@ from PyQt5.QtGui import (
     QPainter,
     QPaintEvent,
     QPixmap,
+    QPolygonF,
     qRgb,
 )
 from PyQt5.QtWidgets import (
@@ -131,6 +133,21 @@ def blend_colors(color1: QColor, color2: QColor, ratio: float) -> int:
     )
 
 
+def array_to_polygon(points: np.ndarray) -> QPolygonF:
+    """Build a polygon out of an array of points without a Python loop.
+
+    :param points: array with one row of x and y coordinates per point
+    :return: polygon
+    """
+    polygon = QPolygonF(len(points))
+    buffer = polygon.data()
+    if buffer is None:
+        return polygon
+    buffer.setsize(points.size * np.dtype(np.float64).itemsize)
+    buffer[:] = np.ascontiguousarray(points, dtype=np.float64).tobytes()
+    return polygon
+
+
 class ColorPickerPreview(QFrame):
     def __init__(self, parent: QWidget) -> None:
         super().__init__(parent)